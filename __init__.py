@@ -3,13 +3,32 @@ Blueprint principal pour le système de restaurant
 Gère les routes client et admin avec API REST
 """
 
-from flask import Blueprint, render_template, request, jsonify, redirect, session, send_from_directory, url_for
+from flask import Blueprint, render_template, request, jsonify, redirect, session, send_from_directory, url_for, current_app, abort, stream_with_context, make_response
 from functools import wraps
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+import click
+import math
 import os
+import time
 
 from .database import db
-from .models import MenuCategory, MenuItem, Order, OrderItem, AdminUser
+from .models import MenuCategory, MenuItem, Order, OrderItem, AdminUser, ArchivedOrder, ORDER_STATUSES, can_transition
+from .cache import menu_cache, price_index
+from .events import order_events
+from .stats import order_stats, stats_cache
+from .reports import record_order, record_status_change, backfill_sales, sales_report
+from .archive import archive_orders, archive_horizon, archived_totals, ARCHIVABLE_STATUSES, ARCHIVE_BATCH_SIZE
+from .menu_io import import_menu, export_menu
+from .auth import admin_cache, login_retry_after, login_user_limiter, needs_rehash
+from .carts import table_carts, CartConflict, CartFull, DEFAULT_TTL
+from .eta import prep_estimator
+from . import eta
+from . import idempotency, images, outbox
+from .assets import AssetManifest, split_hashed_name, is_hashed_upload, IMMUTABLE_MAX_AGE
+from .responses import install_json_provider, compress_response
+from . import profiling
 
 # Créer le Blueprint avec chemins relatifs corrects
 restaurant_bp = Blueprint(
@@ -21,15 +40,135 @@ restaurant_bp = Blueprint(
     static_url_path='/static'
 )
 
+# ============================================
+# INSTRUMENTATION (OPT-IN)
+# ============================================
+
+def setup_profiling(state):
+    """Activer l'instrumentation si app.config['RESTAURANT_PROFILING']['enabled']"""
+    options = profiling.options_for(state.app)
+    if options['enabled']:
+        profiling.install(options)
+        state.app.extensions['restaurant_profiling'] = options
+
+restaurant_bp.record_once(setup_profiling)
+
+@restaurant_bp.before_request
+def start_request_profiling():
+    options = current_app.extensions.get('restaurant_profiling')
+    if options:
+        profiling.start_request(options)
+
+# Enregistré avant la compression : exécuté après elle, la durée l'inclut
+@restaurant_bp.after_request
+def finish_request_profiling(response):
+    options = current_app.extensions.get('restaurant_profiling')
+    if options:
+        return profiling.finish_request(response, request, options)
+    return response
+
+@restaurant_bp.teardown_request
+def abandon_request_profiling(exc):
+    profiling.abandon_request()
+
+# ============================================
+# COUCHE DE RÉPONSE (JSON COMPACT, COMPRESSION)
+# ============================================
+
+restaurant_bp.record_once(lambda state: install_json_provider(state.app))
+
+@restaurant_bp.after_request
+def compress_restaurant_response(response):
+    """gzip / brotli selon Accept-Encoding pour les réponses du restaurant"""
+    return compress_response(response, request)
+
+# ============================================
+# FILE DE TÂCHES (OUTBOX)
+# ============================================
+
+def setup_outbox(state):
+    """Gestionnaires configurés dans app.config['OUTBOX'] (imprimante cuisine, webhook)"""
+    options = outbox.options_for(state.app)
+    outbox.configure_handlers(options)
+    state.app.extensions['restaurant_outbox'] = options
+
+restaurant_bp.record_once(setup_outbox)
+
+@restaurant_bp.before_request
+def start_outbox_workers():
+    """Pool démarré à la première requête du processus (pas à l'import : un serveur
+    qui forke ses workers perdrait les threads) ; reprend les tâches en attente"""
+    if outbox.handlers:
+        outbox.workers.ensure_started(current_app._get_current_object(), current_app.extensions['restaurant_outbox'])
+
+# ============================================
+# PANIERS DE TABLE
+# ============================================
+
+def setup_carts(state):
+    """Durée de vie des paniers inactifs (app.config['TABLE_CART_TTL'], en secondes)"""
+    table_carts.ttl = state.app.config.get('TABLE_CART_TTL', DEFAULT_TTL)
+
+restaurant_bp.record_once(setup_carts)
+
+# ============================================
+# ESTIMATION DES DÉLAIS (ETA)
+# ============================================
+
+def setup_eta(state):
+    """Réglages de app.config['ORDER_ETA'] (postes en cuisine, durée par défaut...)"""
+    prep_estimator.configure(eta.options_for(state.app))
+
+restaurant_bp.record_once(setup_eta)
+
+# ============================================
+# ASSETS STATIQUES EMPREINTÉS
+# ============================================
+
+STATIC_FOLDER = os.path.join(os.path.dirname(__file__), 'static')
+asset_manifest = AssetManifest(STATIC_FOLDER)
+
+# Empreintes calculées une fois, à l'enregistrement du blueprint
+restaurant_bp.record_once(lambda state: asset_manifest.preload())
+
+@restaurant_bp.app_template_global()
+def asset_url(path):
+    """URL immuable d'un fichier de static/ : {{ asset_url('css/client.css') }}"""
+    return url_for('restaurant.serve_asset', filename=asset_manifest.hashed_path(path))
+
+@restaurant_bp.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Servir un asset empreinté, mis en cache un an côté navigateur"""
+    path, digest = split_hashed_name(filename)
+    if digest is None or path.startswith('uploads/'):
+        abort(404)
+    try:
+        current = asset_manifest.fingerprint(path)
+    except OSError:
+        abort(404)
+    if digest != current:
+        # Page en cache qui référence une ancienne version
+        return redirect(url_for('restaurant.serve_asset', filename=asset_manifest.hashed_path(path)))
+    
+    response = send_from_directory(STATIC_FOLDER, path, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.immutable = True
+    if response.status_code == 200:
+        # Assets petits : charger le corps pour qu'il puisse être compressé
+        response.direct_passthrough = False
+        response.make_sequence()
+    return response
+
 # ============================================
 # DECORATEUR ADMIN AVEC FUNCTOOLS.WRAPS
 # ============================================
 
 def admin_required(f):
-    """Décorateur pour protéger les routes admin"""
+    """Décorateur pour protéger les routes admin (compte actif, vérifié via admin_cache)"""
     @wraps(f)
     def wrapper(*args, **kwargs):
-        if 'admin_id' not in session:
+        admin_id = session.get('admin_id')
+        if admin_id is None or not admin_cache.is_active(admin_id):
+            session.clear()
             return redirect(url_for('restaurant.admin_login'))
         return f(*args, **kwargs)
     return wrapper
@@ -63,15 +202,32 @@ def admin_login():
         if not username or not password:
             return render_template('admin/login.html', error='Veuillez remplir tous les champs')
         
+        # Limite vérifiée avant check_password_hash, volontairement coûteux
+        retry_after = math.ceil(login_retry_after(request.remote_addr or '', username))
+        if retry_after:
+            response = make_response(render_template(
+                'admin/login.html', error=f'Trop de tentatives, réessayez dans {retry_after} s'
+            ), 429)
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        
         admin = AdminUser.query.filter_by(username=username).first()
         
-        if admin and admin.check_password(password):
+        if admin and admin.is_active and admin.check_password(password):
+            login_user_limiter.reset(username.lower())
+            # Hash plus ancien que les paramètres configurés : le refaire avec le mot de passe en clair
+            method = current_app.config.get('PASSWORD_HASH_METHOD')
+            if needs_rehash(admin.password_hash, method):
+                admin.set_password(password, method)
+                db.session.commit()
+            admin_cache.invalidate(admin.id)
+            
             session['admin_id'] = admin.id
             session['admin_username'] = admin.username
             session.permanent = True
             return redirect(url_for('restaurant.admin_dashboard'))
         
-        return render_template('admin/login.html', error='Identifiants invalides')
+        return render_template('admin/login.html', error='Identifiants invalides'), 401
     
     return render_template('admin/login.html')
 
@@ -91,28 +247,15 @@ def admin_logout():
 def admin_dashboard():
     """Dashboard admin avec statistiques"""
     try:
-        total_orders = Order.query.count()
-        pending_orders = Order.query.filter_by(status='pending').count()
-        preparing_orders = Order.query.filter_by(status='preparing').count()
-        ready_orders = Order.query.filter_by(status='ready').count()
-        
-        today = datetime.utcnow().date()
-        today_orders = Order.query.filter(
-            db.func.date(Order.created_at) == today
-        ).count()
-        
-        today_revenue = db.session.query(db.func.sum(Order.total)).filter(
-            db.func.date(Order.created_at) == today,
-            Order.status != 'cancelled'
-        ).scalar() or 0
+        stats = stats_cache.get('dashboard', lambda: order_stats(archived=archived_totals()))
         
         return render_template('admin/dashboard.html', 
-                             total_orders=total_orders,
-                             pending_orders=pending_orders,
-                             preparing_orders=preparing_orders,
-                             ready_orders=ready_orders,
-                             today_orders=today_orders,
-                             today_revenue=round(today_revenue, 2))
+                             total_orders=stats['total'],
+                             pending_orders=stats['by_status']['pending'],
+                             preparing_orders=stats['by_status']['preparing'],
+                             ready_orders=stats['by_status']['ready'],
+                             today_orders=stats['today_orders'],
+                             today_revenue=stats['today_revenue'])
     except Exception as e:
         return render_template('admin/dashboard.html',
                              total_orders=0,
@@ -139,35 +282,51 @@ def admin_orders():
 # API CLIENT - MENU
 # ============================================
 
+def build_menu_payload():
+    """Construire le menu client (catégories avec items disponibles) en deux requêtes"""
+    categories = MenuCategory.query.order_by(MenuCategory.order).all()
+    items = MenuItem.query.filter_by(available=True).order_by(MenuItem.order).all()
+    
+    items_by_category = {}
+    for item in items:
+        items_by_category.setdefault(item.category_id, []).append(item)
+    
+    result = []
+    for cat in categories:
+        cat_items = items_by_category.get(cat.id)
+        if cat_items:
+            result.append({
+                'id': cat.id,
+                'name': cat.name,
+                'description': cat.description or '',
+                'items': [{
+                    'id': item.id,
+                    'name': item.name,
+                    'description': item.description or '',
+                    'price': float(item.price),
+                    'image_url': item.image_url or '',
+                    'image_srcset': images.image_srcset(item.image_url, UPLOAD_FOLDER),
+                    'available': item.available
+                } for item in cat_items]
+            })
+    return result
+
 @restaurant_bp.route('/api/client/menu')
 def api_client_menu():
-    """Récupérer le menu pour les clients"""
+    """Récupérer le menu pour les clients (mis en cache, avec ETag)"""
     try:
-        categories = MenuCategory.query.order_by(MenuCategory.order).all()
-        result = []
+        body, etag = menu_cache.get(
+            lambda: current_app.json.dumps(build_menu_payload()).encode('utf-8')
+        )
         
-        for cat in categories:
-            items = MenuItem.query.filter_by(
-                category_id=cat.id, 
-                available=True
-            ).order_by(MenuItem.order).all()
-            
-            if items:
-                result.append({
-                    'id': cat.id,
-                    'name': cat.name,
-                    'description': cat.description or '',
-                    'items': [{
-                        'id': item.id,
-                        'name': item.name,
-                        'description': item.description or '',
-                        'price': float(item.price),
-                        'image_url': item.image_url or '',
-                        'available': item.available
-                    } for item in items]
-                })
-        
-        return jsonify(result)
+        # Comparaison faible : la version compressée porte un ETag faible
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -175,54 +334,359 @@ def api_client_menu():
 # API CLIENT - COMMANDES
 # ============================================
 
+# Quantité maximale d'un même item sur une ligne de commande
+MAX_LINE_QUANTITY = 100
+
+def json_int(value):
+    """Entier d'un champ JSON : nombre entier ou chaîne de chiffres
+    
+    ValueError pour les booléens et les décimaux (int() tronquerait 1.7 en 1).
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'Entier attendu : {value!r}')
+    return int(value)
+
+def load_price_index():
+    """Prix, disponibilité et nom de chaque item, en une requête"""
+    rows = db.session.query(MenuItem.id, MenuItem.price, MenuItem.available, MenuItem.name).all()
+    return {
+        item_id: (float(price), bool(available), name)
+        for item_id, price, available, name in rows
+    }
+
+def replayed_response(payload):
+    """Réponse rejouée pour une Idempotency-Key déjà traitée"""
+    response = jsonify(payload)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
 @restaurant_bp.route('/api/client/order', methods=['POST'])
 def api_client_order():
-    """Créer une nouvelle commande"""
+    """Créer une nouvelle commande
+    
+    Avec un en-tête Idempotency-Key, un renvoi de la même commande (réseau instable)
+    rejoue la réponse d'origine au lieu de créer un doublon.
+    """
     try:
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+        if len(idempotency_key) > idempotency.MAX_KEY_LENGTH:
+            return jsonify({'error': 'Idempotency-Key trop longue'}), 400
+        
         data = request.get_json()
         
-        if not data:
+        # Une clé n'est rejouée que pour le même corps (422 sinon)
+        fingerprint = idempotency.request_fingerprint(request.path, data) if idempotency_key else None
+        if idempotency_key:
+            replay = idempotency.lookup(idempotency_key, fingerprint)
+            if replay is not None:
+                return replayed_response(replay)
+        
+        if not data or not isinstance(data, dict):
             return jsonify({'error': 'Données manquantes'}), 400
         
-        table_number = data.get('table_number', '').strip()
+        table_number = data.get('table_number', '')
+        table_number = cart_table_number(table_number) if isinstance(table_number, str) else None
         if not table_number:
             return jsonify({'error': 'Numéro de table requis'}), 400
         
         items = data.get('items', [])
+        if not isinstance(items, list):
+            return jsonify({'error': 'items doit être une liste'}), 400
         if not items:
             return jsonify({'error': 'Panier vide'}), 400
         
-        total = sum(float(item.get('price', 0)) * int(item.get('quantity', 1)) for item in items)
+        return place_order(table_number, items, idempotency_key, fingerprint)
         
-        order = Order(
-            table_number=table_number, 
-            total=total,
-            status='pending'
-        )
-        db.session.add(order)
-        db.session.flush()
-        
-        for item in items:
-            order_item = OrderItem(
-                order_id=order.id, 
-                menu_item_id=int(item['id']), 
-                quantity=int(item.get('quantity', 1)), 
-                unit_price=float(item.get('price', 0))
-            )
-            db.session.add(order_item)
+    except idempotency.KeyReused as e:
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def place_order(table_number, items, idempotency_key='', fingerprint=None):
+    """Valider les lignes puis créer la commande, ses cumuls et ses tâches
+    
+    fingerprint : empreinte de la requête, enregistrée avec idempotency_key.
+    Retourne la réponse HTTP (400 si une ligne est invalide) ; les exceptions
+    (dont idempotency.KeyReused) sont laissées à l'appelant.
+    """
+    # Les prix viennent du serveur, jamais du client
+    prices = price_index.get(load_price_index)
+    order_items = []
+    for item in items:
+        try:
+            menu_item_id = json_int(item['id'])
+            quantity = json_int(item.get('quantity', 1))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Article invalide'}), 400
+        if not 1 <= quantity <= MAX_LINE_QUANTITY:
+            return jsonify({'error': 'Quantité invalide'}), 400
         
-        db.session.commit()
+        entry = prices.get(menu_item_id)
+        if entry is None:
+            return jsonify({'error': f'Item inconnu : {menu_item_id}'}), 400
+        price, available, name = entry
+        if not available:
+            return jsonify({'error': f'Item indisponible : {name}'}), 400
         
-        return jsonify({
-            'success': True, 
-            'order_id': order.id,
-            'message': 'Commande enregistrée avec succès'
+        order_items.append(OrderItem(
+            menu_item_id=menu_item_id, 
+            quantity=quantity, 
+            unit_price=price
+        ))
+    
+    total = round(sum(line.unit_price * line.quantity for line in order_items), 2)
+    
+    # ETA : plats de la commande et file de la cuisine, sans relire l'historique
+    ready_in = prep_estimator.estimate(
+        [line.menu_item_id for line in order_items], prep_estimator.queue_depth()
+    )
+    order = Order(
+        table_number=table_number, 
+        total=total,
+        status='pending',
+        estimated_ready_at=datetime.utcnow() + timedelta(seconds=round(ready_in))
+    )
+    db.session.add(order)
+    db.session.flush()
+    
+    # Lignes insérées en un seul executemany
+    for line in order_items:
+        line.order_id = order.id
+    db.session.execute(db.insert(OrderItem), [{
+        'order_id': line.order_id,
+        'menu_item_id': line.menu_item_id,
+        'quantity': line.quantity,
+        'unit_price': line.unit_price
+    } for line in order_items])
+    
+    record_order(order, order_items)
+    # Ticket cuisine, notifications : exécutés hors requête par les workers
+    if outbox.handlers:
+        outbox.enqueue_order(order, order_items, {line.menu_item_id: prices[line.menu_item_id][2]
+                                                  for line in order_items})
+    order_id = order.id
+    payload = {
+        'success': True, 
+        'order_id': order_id,
+        'total': total,
+        'estimated_ready_at': order.estimated_ready_at.isoformat(),
+        'eta_minutes': math.ceil(ready_in / 60),
+        'message': 'Commande enregistrée avec succès'
+    }
+    
+    if idempotency_key:
+        remembered_at = idempotency.remember(idempotency_key, order_id, payload, fingerprint)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Même clé envoyée en parallèle : l'autre requête a gagné
+        db.session.rollback()
+        replay = idempotency.lookup(idempotency_key, fingerprint) if idempotency_key else None
+        if replay is None:
+            raise
+        return replayed_response(replay)
+    if idempotency_key:
+        idempotency.remembered(idempotency_key, payload, fingerprint, remembered_at)
+    
+    stats_cache.clear()
+    prep_estimator.queue_changed(1)
+    publish_order(order_id)
+    if outbox.handlers:
+        outbox.workers.wake(current_app._get_current_object(), current_app.extensions['restaurant_outbox'])
+    
+    return jsonify(payload)
+
+# ============================================
+# API CLIENT - PANIERS DE TABLE
+# ============================================
+# Un panier par table, partagé par les appareils des convives, commandé en
+# une seule fois (voir carts.py)
+
+# Longueur de Order.table_number
+MAX_TABLE_NUMBER_LENGTH = 50
+
+def cart_table_number(raw):
+    """Numéro de table nettoyé, ou None s'il est vide ou trop long"""
+    table_number = raw.strip()
+    if not table_number or len(table_number) > MAX_TABLE_NUMBER_LENGTH:
+        return None
+    return table_number
+
+def serialize_cart(snapshot):
+    """Panier avec noms et prix courants du menu"""
+    prices = price_index.get(load_price_index)
+    items = []
+    for item_id, quantity, version in snapshot['lines']:
+        price, available, name = prices.get(item_id, (0.0, False, ''))
+        items.append({
+            'id': item_id,
+            'name': name,
+            'price': price,
+            'available': available,
+            'quantity': quantity,
+            'version': version,
+            'total': round(price * quantity, 2)
         })
+    return {
+        'table_number': snapshot['table_number'],
+        'version': snapshot['version'],
+        'items': items,
+        'total': round(sum(item['total'] for item in items), 2)
+    }
+
+def cart_conflict_response(error):
+    return jsonify({'error': str(error), 'cart': serialize_cart(error.snapshot)}), 409
+
+def orderable_item(item_id):
+    """Message d'erreur si l'item ne peut pas être ajouté au panier, sinon None"""
+    entry = price_index.get(load_price_index).get(item_id)
+    if entry is None:
+        return f'Item inconnu : {item_id}'
+    if not entry[1]:
+        return f'Item indisponible : {entry[2]}'
+    return None
+
+@restaurant_bp.route('/api/client/cart/<table_number>')
+def api_client_cart(table_number):
+    """Panier de la table ; ETag = version, les appareils interrogent en If-None-Match"""
+    try:
+        table_number = cart_table_number(table_number)
+        if table_number is None:
+            return jsonify({'error': 'Numéro de table invalide'}), 400
         
+        snapshot = table_carts.get(table_number)
+        etag = f"cart-{snapshot['version']}"
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(serialize_cart(snapshot))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@restaurant_bp.route('/api/client/cart/<table_number>/items', methods=['POST'])
+def api_client_cart_add(table_number):
+    """Ajouter (delta > 0) ou retirer (delta < 0) des unités d'un item, sans condition de version"""
+    try:
+        table_number = cart_table_number(table_number)
+        if table_number is None:
+            return jsonify({'error': 'Numéro de table invalide'}), 400
+        data = request.get_json(silent=True) or {}
+        try:
+            item_id = int(data['id'])
+            delta = int(data.get('delta', 1))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Article invalide'}), 400
+        if not delta or abs(delta) > MAX_LINE_QUANTITY:
+            return jsonify({'error': 'Quantité invalide'}), 400
+        if delta > 0:
+            error = orderable_item(item_id)
+            if error:
+                return jsonify({'error': error}), 400
+        
+        snapshot = table_carts.add(table_number, item_id, delta, MAX_LINE_QUANTITY)
+        return jsonify(serialize_cart(snapshot))
+    except CartFull as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@restaurant_bp.route('/api/client/cart/<table_number>/items/<int:item_id>', methods=['PUT'])
+def api_client_cart_line(table_number, item_id):
+    """Fixer la quantité d'une ligne (0 : la retirer)
+    
+    version : version de la ligne vue par l'appareil (0 si elle n'existait pas) ;
+    409 avec le panier à jour si un autre appareil l'a modifiée depuis.
+    """
+    try:
+        table_number = cart_table_number(table_number)
+        if table_number is None:
+            return jsonify({'error': 'Numéro de table invalide'}), 400
+        data = request.get_json(silent=True) or {}
+        try:
+            quantity = int(data['quantity'])
+            version = int(data['version'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'quantity et version requis'}), 400
+        if not 0 <= quantity <= MAX_LINE_QUANTITY:
+            return jsonify({'error': 'Quantité invalide'}), 400
+        if quantity:
+            error = orderable_item(item_id)
+            if error:
+                return jsonify({'error': error}), 400
+        
+        snapshot = table_carts.set(table_number, item_id, quantity, version)
+        return jsonify(serialize_cart(snapshot))
+    except CartConflict as e:
+        return cart_conflict_response(e)
+    except CartFull as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@restaurant_bp.route('/api/client/cart/<table_number>/checkout', methods=['POST'])
+def api_client_cart_checkout(table_number):
+    """Commander tout le panier de la table en une seule commande
+    
+    version : dernière version du panier vue par l'appareil ; 409 avec le panier
+    à jour si un autre appareil l'a modifié depuis. Idempotency-Key comme pour
+    /api/client/order. Si la commande échoue, le panier est remis en place.
+    """
+    try:
+        table_number = cart_table_number(table_number)
+        if table_number is None:
+            return jsonify({'error': 'Numéro de table invalide'}), 400
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+        if len(idempotency_key) > idempotency.MAX_KEY_LENGTH:
+            return jsonify({'error': 'Idempotency-Key trop longue'}), 400
+        data = request.get_json(silent=True) or {}
+        fingerprint = idempotency.request_fingerprint(request.path, data) if idempotency_key else None
+        # Deux envois simultanés de la même clé : le second attend le premier et
+        # rejoue sa réponse (sinon le panier déjà retiré donnerait un 409)
+        with idempotency.exclusive(idempotency_key):
+            return checkout_cart(table_number, data, idempotency_key, fingerprint)
+    except CartConflict as e:
+        return cart_conflict_response(e)
+    except idempotency.KeyReused as e:
+        return jsonify({'error': str(e)}), 422
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def checkout_cart(table_number, data, idempotency_key, fingerprint):
+    """Rejouer la clé, sinon retirer le panier à la version attendue et le commander
+    
+    Lève CartConflict (409) ou idempotency.KeyReused (422) ; le panier est remis
+    en place si la commande échoue.
+    """
+    # Avant de toucher au panier : un renvoi trouve le panier déjà commandé
+    if idempotency_key:
+        replay = idempotency.lookup(idempotency_key, fingerprint)
+        if replay is not None:
+            return replayed_response(replay)
+    
+    try:
+        version = int(data['version'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'version requise'}), 400
+    
+    cart = table_carts.checkout(table_number, version)
+    if cart is None:
+        return jsonify({'error': 'Panier vide'}), 400
+    
+    items = [{'id': item_id, 'quantity': quantity} for item_id, (quantity, _) in cart.lines.items()]
+    try:
+        response = make_response(place_order(table_number, items, idempotency_key, fingerprint))
+    except Exception:
+        table_carts.restore(cart, MAX_LINE_QUANTITY)
+        raise
+    if response.status_code != 200:
+        table_carts.restore(cart, MAX_LINE_QUANTITY)
+    return response
+
 # ============================================
 # API ADMIN - CATEGORIES
 # ============================================
@@ -244,6 +708,7 @@ def api_admin_categories():
             )
             db.session.add(category)
             db.session.commit()
+            menu_cache.invalidate()
             
             return jsonify({'success': True, 'id': category.id})
         
@@ -285,10 +750,12 @@ def api_admin_category(category_id):
             if 'order' in data:
                 category.order = int(data['order'])
             db.session.commit()
+            menu_cache.invalidate()
             return jsonify({'success': True})
         
         db.session.delete(category)
         db.session.commit()
+        menu_cache.invalidate()
         return jsonify({'success': True})
         
     except Exception as e:
@@ -320,6 +787,7 @@ def api_admin_items():
             )
             db.session.add(item)
             db.session.commit()
+            menu_cache.invalidate()
             
             return jsonify({'success': True, 'id': item.id})
         
@@ -377,114 +845,443 @@ def api_admin_item(item_id):
             if 'order' in data:
                 item.order = int(data['order'])
             db.session.commit()
+            menu_cache.invalidate()
             return jsonify({'success': True})
         
         db.session.delete(item)
         db.session.commit()
+        menu_cache.invalidate()
         return jsonify({'success': True})
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# ============================================
+# API ADMIN - IMPORT / EXPORT DU MENU
+# ============================================
+
+MENU_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+def menu_format():
+    """Format demandé par ?format=, sinon déduit du Content-Type (NDJSON par défaut)"""
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt if fmt in MENU_FORMATS else None
+    return 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+
+@restaurant_bp.route('/api/admin/menu/import', methods=['POST'])
+@admin_required
+def api_admin_menu_import():
+    """Créer / mettre à jour catégories et items depuis un CSV ou NDJSON (une ligne par item)"""
+    fmt = menu_format()
+    if fmt is None:
+        return jsonify({'error': 'Format invalide (csv ou ndjson)'}), 400
+    try:
+        report = import_menu(request.stream, fmt)
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'Fichier non UTF-8'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        # Les lots déjà validés sont en base même en cas d'erreur
+        menu_cache.invalidate()
+    
+    return jsonify({'success': True, **report})
+
+@restaurant_bp.route('/api/admin/menu/export')
+@admin_required
+def api_admin_menu_export():
+    """Menu complet en CSV ou NDJSON, produit au fil de l'eau"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in MENU_FORMATS:
+        return jsonify({'error': 'Format invalide (csv ou ndjson)'}), 400
+    
+    response = current_app.response_class(
+        stream_with_context(export_menu(fmt)),
+        mimetype=MENU_FORMATS[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=menu.{fmt}'
+    return response
+
 # ============================================
 # API ADMIN - ORDERS
 # ============================================
 
+def with_order_lines(query):
+    """Charger les lignes et leurs items de menu en lot (nombre de requêtes fixe)"""
+    return query.options(
+        selectinload(Order.items).selectinload(OrderItem.menu_item)
+    )
+
+def serialize_order(order):
+    """Représentation JSON d'une commande avec ses lignes"""
+    items_list = []
+    for order_item in order.items:
+        menu_item = order_item.menu_item
+        unit_price = float(order_item.unit_price) if order_item.unit_price else 0
+        items_list.append({
+            'name': menu_item.name if menu_item else 'Item supprimé',
+            'quantity': order_item.quantity,
+            'unit_price': unit_price,
+            'total': order_item.quantity * unit_price
+        })
+    
+    return {
+        'id': order.id,
+        'table_number': order.table_number or 'N/A',
+        'status': order.status,
+        'created_at': order.created_at.isoformat() if order.created_at else datetime.utcnow().isoformat(),
+        'updated_at': order.updated_at.isoformat() if order.updated_at else datetime.utcnow().isoformat(),
+        'total': float(order.total) if order.total else 0,
+        'estimated_ready_at': order.estimated_ready_at.isoformat() if order.estimated_ready_at else None,
+        'items': items_list
+    }
+
+def publish_order(order_id):
+    """Diffuser l'état courant d'une commande aux écrans abonnés"""
+    if not order_events.subscriber_count:
+        return
+    order = with_order_lines(Order.query).filter_by(id=order_id).first()
+    if order:
+        order_events.publish('order', serialize_order(order))
+
+# Taille des pages de commandes (?limit=)
+ORDERS_PAGE_DEFAULT = 50
+ORDERS_PAGE_MAX = 200
+
+def parse_date_bound(value, end=False):
+    """Date ISO (jour entier) ou datetime ISO ; une borne de fin « jour » inclut ce jour"""
+    bound = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        bound += timedelta(days=1)
+    return bound
+
+def filter_orders(query, args, model=Order):
+    """Appliquer les filtres statut / table / période (?from=, ?to=) d'une requête
+    
+    model : Order, ou ArchivedOrder pour filtrer l'archive.
+    """
+    status = args.get('status', 'all')
+    if status and status != 'all':
+        query = query.filter(model.status == status)
+    
+    table = args.get('table', '').strip()
+    if table:
+        query = query.filter(model.table_number == table)
+    
+    if args.get('from'):
+        query = query.filter(model.created_at >= parse_date_bound(args['from']))
+    if args.get('to'):
+        query = query.filter(model.created_at < parse_date_bound(args['to'], end=True))
+    
+    return query
+
+def paginate_orders(query, cursor=None, limit=ORDERS_PAGE_DEFAULT):
+    """Pagination par clé (created_at, id) décroissante : coût constant par page
+    
+    Retourne (commandes, curseur de la page suivante ou None).
+    """
+    if cursor:
+        created_at, order_id = cursor.rsplit(',', 1)
+        created_at, order_id = datetime.fromisoformat(created_at), int(order_id)
+        query = query.filter(db.or_(
+            Order.created_at < created_at,
+            db.and_(Order.created_at == created_at, Order.id < order_id)
+        ))
+    
+    orders = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        next_cursor = f'{last.created_at.isoformat()},{last.id}'
+    return orders, next_cursor
+
 @restaurant_bp.route('/api/admin/orders')
 @admin_required
 def api_admin_orders():
-    """Lister les commandes avec filtrage"""
+    """Lister les commandes par pages, avec filtrage
+    
+    Filtres : ?status=, ?table=, ?from=, ?to= ; pagination : ?limit=, ?cursor=.
+    Avec ?since=<curseur>, renvoie seulement les commandes créées ou modifiées
+    depuis ce curseur (tous statuts confondus) et un nouveau curseur.
+    """
     try:
-        status = request.args.get('status', 'all')
-        
-        query = Order.query
-        if status and status != 'all':
-            query = query.filter_by(status=status)
-        
-        orders = query.order_by(Order.created_at.desc()).all()
-        
-        result = []
-        for order in orders:
-            items_list = []
-            for order_item in order.items:
-                menu_item = MenuItem.query.get(order_item.menu_item_id)
-                items_list.append({
-                    'name': menu_item.name if menu_item else 'Item supprimé',
-                    'quantity': order_item.quantity,
-                    'unit_price': float(order_item.unit_price) if order_item.unit_price else 0,
-                    'total': order_item.quantity * (float(order_item.unit_price) if order_item.unit_price else 0)
-                })
-            
-            result.append({
-                'id': order.id,
-                'table_number': order.table_number or 'N/A',
-                'status': order.status,
-                'created_at': order.created_at.isoformat() if order.created_at else datetime.utcnow().isoformat(),
-                'updated_at': order.updated_at.isoformat() if order.updated_at else datetime.utcnow().isoformat(),
-                'total': float(order.total) if order.total else 0,
-                'items': items_list
-            })
+        if 'since' in request.args:
+            return api_admin_orders_delta(request.args.get('since', ''))
+        
+        # Point de départ du flux incrémental (?since=), lu avant la page
+        feed_cursor = db.session.query(db.func.max(Order.updated_at)).scalar() or datetime(1970, 1, 1)
+        
+        try:
+            limit = min(max(int(request.args.get('limit', ORDERS_PAGE_DEFAULT)), 1), ORDERS_PAGE_MAX)
+            query = filter_orders(with_order_lines(Order.query), request.args)
+            orders, next_cursor = paginate_orders(query, request.args.get('cursor'), limit)
+        except ValueError:
+            return jsonify({'error': 'Paramètres invalides'}), 400
+        
+        return jsonify({
+            'orders': [serialize_order(order) for order in orders],
+            'next_cursor': next_cursor,
+            'feed_cursor': feed_cursor.isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Deux transactions peuvent commiter dans le désordre de leurs updated_at :
+# on renvoie une fenêtre déjà vue, le client fusionne par id
+ORDER_FEED_MARGIN = timedelta(seconds=2)
+
+def order_feed_lookback():
+    """Fenêtre relue par le flux incrémental
+    
+    updated_at est daté en Python avant la prise du verrou d'écriture : une
+    écriture qui attend ce verrou (jusqu'au busy_timeout SQLite) peut commiter
+    une ligne datée d'autant avant le curseur déjà rendu.
+    """
+    busy_timeout = int(current_app.config.get('SQLITE_PRAGMAS', {}).get('busy_timeout', 0))
+    return timedelta(milliseconds=busy_timeout) + ORDER_FEED_MARGIN
+
+def api_admin_orders_delta(since):
+    """Flux incrémental des commandes pour l'écran cuisine"""
+    try:
+        # L'historique passe par les pages, qui fournissent le curseur de départ
+        try:
+            cursor = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({'error': 'Curseur invalide'}), 400
+        
+        orders = with_order_lines(Order.query).filter(
+            Order.updated_at > cursor - order_feed_lookback()
+        ).order_by(Order.updated_at, Order.id).all()
+        
+        if orders:
+            cursor = max(cursor, orders[-1].updated_at)
         
-        return jsonify(result)
+        return jsonify({
+            'orders': [serialize_order(order) for order in orders],
+            'cursor': cursor.isoformat()
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@restaurant_bp.route('/api/admin/orders/stream')
+@admin_required
+def api_admin_orders_stream():
+    """Flux SSE des nouvelles commandes et changements de statut"""
+    subscription = order_events.subscribe()
+    response = current_app.response_class(
+        order_events.stream(subscription),
+        mimetype='text/event-stream'
+    )
+    # Si le client part avant la première trame, le générateur ne démarre jamais
+    response.call_on_close(lambda: order_events.unsubscribe(subscription))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @restaurant_bp.route('/api/admin/orders/<int:order_id>/status', methods=['PUT'])
 @admin_required
 def api_admin_order_status(order_id):
-    """Modifier le statut d'une commande"""
+    """Modifier le statut d'une commande (transitions de ORDER_TRANSITIONS)"""
     try:
-        order = Order.query.get(order_id)
+        order = with_order_lines(Order.query).filter_by(id=order_id).first()
         if not order:
             return jsonify({'error': 'Commande non trouvée'}), 404
         
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Objet JSON attendu : {"status": ...}'}), 400
         new_status = data.get('status')
         
-        valid_statuses = ['pending', 'preparing', 'ready', 'delivered', 'cancelled']
-        if new_status not in valid_statuses:
+        if new_status not in ORDER_STATUSES:
             return jsonify({'error': f'Statut invalide'}), 400
+        if new_status == order.status:
+            return jsonify({'success': True, 'new_status': new_status, 'order': serialize_order(order)})
+        if not can_transition(order.status, new_status):
+            return jsonify({'error': f'Transition invalide : {order.status} → {new_status}'}), 409
         
-        order.status = new_status
-        order.updated_at = datetime.utcnow()
+        transition = apply_status(order, new_status, datetime.utcnow())
+        # Sérialisée avant le commit, qui expirerait l'objet
+        payload = serialize_order(order)
         db.session.commit()
+        stats_cache.clear()
+        prep_estimator.apply([transition])
+        order_events.publish('order', payload)
         
-        return jsonify({'success': True, 'new_status': new_status})
+        return jsonify({'success': True, 'new_status': new_status, 'order': payload})
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Commandes modifiables en un appel
+STATUS_BATCH_MAX = 200
+
+def apply_status(order, new_status, now):
+    """Changer le statut (transition déjà validée) et reporter l'effet sur les cumuls et l'ETA
+    
+    Retourne la transition à passer à prep_estimator.apply() après le commit.
+    """
+    transition = prep_estimator.record_transition(order, order.status, new_status, now)
+    record_status_change(order, order.status, new_status)
+    order.status = new_status
+    order.updated_at = now
+    return transition
+
+@restaurant_bp.route('/api/admin/orders/status', methods=['PUT'])
+@admin_required
+def api_admin_orders_status():
+    """Changer le statut de plusieurs commandes en une transaction
+    
+    {"status": ..., "order_ids": [...]} : toutes ou aucune (409 avec les refus).
+    {"status": ..., "table": "7"} : les commandes de la table pouvant passer à ce statut.
+    Retourne les commandes modifiées, à fusionner côté client.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Objet JSON attendu : {"status": ...}'}), 400
+        new_status = data.get('status')
+        if new_status not in ORDER_STATUSES:
+            return jsonify({'error': 'Statut invalide'}), 400
+        
+        order_ids = data.get('order_ids')
+        table = str(data.get('table') or '').strip()
+        if order_ids is not None:
+            if (not isinstance(order_ids, list) or not order_ids or len(order_ids) > STATUS_BATCH_MAX
+                    or not all(isinstance(order_id, int) and not isinstance(order_id, bool) for order_id in order_ids)):
+                return jsonify({'error': f'order_ids : 1 à {STATUS_BATCH_MAX} identifiants'}), 400
+            orders = with_order_lines(Order.query).filter(Order.id.in_(order_ids)).all()
+            
+            found = {order.id for order in orders}
+            rejected = [{'id': order_id, 'error': 'Commande non trouvée'}
+                        for order_id in dict.fromkeys(order_ids) if order_id not in found]
+            rejected += [{'id': order.id, 'error': f'Transition invalide : {order.status} → {new_status}'}
+                         for order in orders
+                         if order.status != new_status and not can_transition(order.status, new_status)]
+            if rejected:
+                return jsonify({'error': 'Transitions refusées', 'rejected': rejected}), 409
+        elif table:
+            sources = [status for status in ORDER_STATUSES if can_transition(status, new_status)]
+            orders = with_order_lines(Order.query).filter(
+                Order.table_number == table, Order.status.in_(sources)
+            ).order_by(Order.id).limit(STATUS_BATCH_MAX).all()
+        else:
+            return jsonify({'error': 'order_ids ou table requis'}), 400
+        
+        now = datetime.utcnow()
+        changed = [order for order in orders if order.status != new_status]
+        transitions = [apply_status(order, new_status, now) for order in changed]
+        # Sérialisées avant le commit, qui expirerait les objets
+        payloads = [serialize_order(order) for order in changed]
+        if changed:
+            db.session.commit()
+            stats_cache.clear()
+            prep_estimator.apply(transitions)
+        
+        for payload in payloads:
+            order_events.publish('order', payload)
+        return jsonify({'success': True, 'status': new_status, 'orders': payloads})
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def archived_order_stats(args):
+    """Lignes (statut, nombre, CA) de l'archive concernées par les filtres de la requête
+    
+    L'archive n'est parcourue que si les filtres peuvent y correspondre.
+    """
+    status = args.get('status', 'all') or 'all'
+    if status != 'all' and status not in ARCHIVABLE_STATUSES:
+        return []
+    if status == 'all' and not any(args.get(name) for name in ('table', 'from', 'to')):
+        return archived_totals()
+    
+    horizon = archive_horizon()
+    if horizon is None or (args.get('from') and parse_date_bound(args['from']) > horizon):
+        return []
+    return filter_orders(ArchivedOrder.query, args, ArchivedOrder).with_entities(
+        ArchivedOrder.status, db.func.count(ArchivedOrder.id), db.func.sum(ArchivedOrder.total)
+    ).group_by(ArchivedOrder.status).all()
+
 @restaurant_bp.route('/api/admin/orders/stats')
 @admin_required
 def api_admin_order_stats():
-    """Statistiques des commandes"""
+    """Statistiques des commandes (mêmes filtres ?table=, ?from=, ?to= que la liste)"""
     try:
-        total = Order.query.count()
-        by_status = {}
-        for status in ['pending', 'preparing', 'ready', 'delivered', 'cancelled']:
-            by_status[status] = Order.query.filter_by(status=status).count()
+        try:
+            orders = filter_orders(Order.query, request.args)
+        except ValueError:
+            return jsonify({'error': 'Paramètres invalides'}), 400
         
-        total_revenue = db.session.query(db.func.sum(Order.total)).filter(
-            Order.status != 'cancelled'
-        ).scalar() or 0
+        key = tuple(sorted(request.args.items()))
+        stats = stats_cache.get(key, lambda: order_stats(orders, archived=archived_order_stats(request.args)))
         
         return jsonify({
-            'total': total, 
-            'by_status': by_status,
-            'total_revenue': round(float(total_revenue), 2)
+            'total': stats['total'], 
+            'by_status': stats['by_status'],
+            'total_revenue': stats['total_revenue'],
+            'today_orders': stats['today_orders'],
+            'today_revenue': stats['today_revenue']
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ============================================
+# API ADMIN - RAPPORTS
+# ============================================
+
+@restaurant_bp.route('/api/admin/reports/sales')
+@admin_required
+def api_admin_sales_report():
+    """CA par jour / semaine / mois et meilleurs items, lus depuis les cumuls"""
+    try:
+        period = request.args.get('period', 'day')
+        if period not in ('day', 'week', 'month'):
+            return jsonify({'error': 'Période invalide'}), 400
+        
+        try:
+            end = date.fromisoformat(request.args['to']) if request.args.get('to') else datetime.utcnow().date()
+            start = date.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(days=29)
+            top = min(max(int(request.args.get('top', 10)), 1), 50)
+        except ValueError:
+            return jsonify({'error': 'Paramètres invalides'}), 400
+        
+        return jsonify(sales_report(start, end, period, top))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================
+# MÉTRIQUES
+# ============================================
+
+@restaurant_bp.route('/api/admin/metrics')
+@admin_required
+def api_admin_metrics():
+    """Histogrammes par route au format texte Prometheus"""
+    if 'restaurant_profiling' not in current_app.extensions:
+        return jsonify({'error': 'Instrumentation désactivée (RESTAURANT_PROFILING)'}), 404
+    response = current_app.response_class(profiling.metrics.render(), mimetype='text/plain')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 # ============================================
 # UPLOAD D'IMAGES
 # ============================================
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+UPLOAD_FOLDER = os.path.join(STATIC_FOLDER, 'uploads')
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -492,7 +1289,11 @@ def allowed_file(filename):
 @restaurant_bp.route('/api/admin/upload', methods=['POST'])
 @admin_required
 def api_admin_upload():
-    """Uploader une image pour un item"""
+    """Uploader une image pour un item
+    
+    Les variantes (320/800/1600 px, AVIF/WebP/JPEG) sont produites en arrière-plan ;
+    le menu client les expose via image_srcset dès qu'elles existent.
+    """
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'Aucun fichier fourni'}), 400
@@ -505,21 +1306,22 @@ def api_admin_upload():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Type de fichier non autorisé'}), 400
         
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.urandom(4).hex()}.{ext}"
-        
-        upload_folder = os.path.join(os.path.dirname(__file__), 'static', 'uploads')
-        os.makedirs(upload_folder, exist_ok=True)
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        try:
+            filename = images.save_upload(file, UPLOAD_FOLDER)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
+        # Variantes prêtes : le menu en cache doit être reconstruit
+        processing = images.submit(os.path.join(UPLOAD_FOLDER, filename), on_done=menu_cache.invalidate)
         
         image_url = f"/restaurant/static/uploads/{filename}"
         
         return jsonify({
             'success': True, 
             'image_url': image_url, 
-            'filename': filename
+            'filename': filename,
+            'processing': processing is not None
         })
         
     except Exception as e:
@@ -527,6 +1329,74 @@ def api_admin_upload():
 
 @restaurant_bp.route('/static/uploads/<filename>')
 def serve_uploaded_file(filename):
-    """Servir les fichiers uploadés"""
-    upload_folder = os.path.join(os.path.dirname(__file__), 'static', 'uploads')
-    return send_from_directory(upload_folder, filename)
+    """Servir les fichiers uploadés (requêtes conditionnelles et Range gérées)
+    
+    Les noms empreintés par contenu sont immuables : cache navigateur d'un an.
+    """
+    if is_hashed_upload(filename):
+        response = send_from_directory(UPLOAD_FOLDER, filename, max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.immutable = True
+        return response
+    return send_from_directory(UPLOAD_FOLDER, filename)
+
+# ============================================
+# COMMANDES CLI (flask restaurant ...)
+# ============================================
+
+@restaurant_bp.cli.command('backfill-sales')
+def backfill_sales_command():
+    """Reconstruire les cumuls de ventes depuis l'historique des commandes"""
+    days = backfill_sales()
+    print(f"✅ Cumuls reconstruits ({days} jours)")
+
+@restaurant_bp.cli.command('archive-orders')
+@click.option('--days', type=int, default=None, help="Âge minimal (jours) depuis la dernière mise à jour")
+@click.option('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help="Commandes par transaction")
+@click.option('--every', type=int, default=0, help="Relancer toutes les N secondes (0 : une seule fois)")
+def archive_orders_command(days, batch_size, every):
+    """Archiver les commandes livrées / annulées anciennes"""
+    if days is None:
+        days = current_app.config.get('ORDER_ARCHIVE_DAYS', 90)
+    while True:
+        moved = archive_orders(days, batch_size)
+        print(f"📦 {moved} commande(s) archivée(s) (terminées depuis plus de {days} jours)")
+        if not every:
+            break
+        time.sleep(every)
+
+@restaurant_bp.cli.command('outbox-worker')
+@click.option('--once', is_flag=True, help="Traiter les tâches dues puis s'arrêter")
+def outbox_worker_command(once):
+    """Vider la file de tâches dans ce processus (à la place du pool intégré)"""
+    options = current_app.extensions['restaurant_outbox']
+    if not outbox.handlers:
+        print("⚠️ Aucun gestionnaire configuré (OUTBOX : kitchen_printer, webhook_url)")
+    while True:
+        processed = outbox.run_once(options)
+        if processed:
+            print(f"📨 {processed} tâche(s) traitée(s)")
+        elif once:
+            break
+        else:
+            time.sleep(options['poll_interval'])
+
+@restaurant_bp.cli.command('outbox-purge')
+@click.option('--days', type=int, default=7, help="Âge minimal des tâches terminées")
+def outbox_purge_command(days):
+    """Supprimer les tâches terminées anciennes"""
+    deleted = outbox.purge(timedelta(days=days))
+    print(f"🧹 {deleted} tâche(s) supprimée(s)")
+
+@restaurant_bp.cli.command('fake-printer')
+@click.option('--port', type=int, default=9100)
+def fake_printer_command(port):
+    """Imprimante factice : affiche les tickets reçus sur le port donné (tests locaux)"""
+    import socketserver
+    
+    class TicketHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            print(self.rfile.read().decode('utf-8', 'replace'), flush=True)
+    
+    print(f"🖨️ Imprimante factice sur le port {port} (KITCHEN_PRINTER=localhost:{port})")
+    with socketserver.ThreadingTCPServer(('127.0.0.1', port), TicketHandler) as server:
+        server.serve_forever()
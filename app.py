@@ -8,11 +8,30 @@ USAGE:
 - En local: Exécuter depuis le dossier PARENT de restaurant/
   cd /chemin/vers/cv && python -m restaurant.app
   ou: PYTHONPATH=/chemin/vers/cv python /chemin/vers/cv/restaurant/app.py
+- Temps de démarrage par étape (imports, init_db, première requête) :
+  python /chemin/vers/cv/restaurant/app.py --startup-profile
+  (avec python -m restaurant.app, le paquet est importé avant la mesure)
 """
 
-from flask import Flask, send_from_directory
 import os
 import sys
+import threading
+import time
+
+_timer = time.perf_counter()
+
+from flask import Flask, send_from_directory
+import click
+
+# Durées de démarrage par étape (python app.py --startup-profile)
+startup_times = []
+
+def _timed(stage, since):
+    now = time.perf_counter()
+    startup_times.append((stage, now - since))
+    return now
+
+_timer = _timed('import flask', _timer)
 
 # === CONFIGURATION ===
 # Détecter l'environnement (PythonAnywhere ou local)
@@ -32,26 +51,108 @@ app = Flask(__name__)
 # Configuration Flask
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'restaurant-secret-key-change-in-production-2026')
 
-# Configuration SQLAlchemy pour le restaurant
-if IS_PYTHONANYWHERE:
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////home/tt665/cv/restaurant.db'
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(BASE_DIR, "restaurant.db")}'
+# ============================================
+# RESTAURANT (CHARGÉ À LA PREMIÈRE REQUÊTE)
+# ============================================
+# Le CV et le jeu n'ont besoin ni de SQLAlchemy ni de la base : le restaurant
+# (imports, configuration, init_db) n'est chargé qu'à la première requête
+# /restaurant, ce qui raccourcit chaque redémarrage de worker.
 
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+def create_restaurant_app():
+    """Application Flask du restaurant : configuration, base de données et blueprint"""
+    timer = time.perf_counter()
+    from restaurant.config import Config
+    from restaurant.database import db, configure_sqlite
+    from restaurant import restaurant_bp
+    from restaurant.models import init_db
+    timer = _timed('import restaurant (blueprint, SQLAlchemy)', timer)
 
-# === INITIALISATION BASE DE DONNÉES ===
-from restaurant.database import db
-db.init_app(app)
+    restaurant_app = Flask(__name__, static_folder=None)
+    # Même clé que le site : la session admin reste valide d'une application à l'autre
+    restaurant_app.config['SECRET_KEY'] = app.config['SECRET_KEY']
 
-# === ENREGISTREMENT DU BLUEPRINT RESTAURANT ===
-from restaurant import restaurant_bp
-app.register_blueprint(restaurant_bp)
+    # Configuration SQLAlchemy pour le restaurant
+    if IS_PYTHONANYWHERE:
+        restaurant_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////home/tt665/cv/restaurant.db'
+    else:
+        restaurant_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(BASE_DIR, "restaurant.db")}'
+    restaurant_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Réglages SQLite de production (WAL, busy_timeout, pool)
+    restaurant_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = Config.SQLALCHEMY_ENGINE_OPTIONS
+    restaurant_app.config['SQLITE_PRAGMAS'] = Config.SQLITE_PRAGMAS
+    restaurant_app.config['RESTAURANT_PROFILING'] = Config.RESTAURANT_PROFILING
+    restaurant_app.config['ORDER_ARCHIVE_DAYS'] = Config.ORDER_ARCHIVE_DAYS
+    restaurant_app.config['OUTBOX'] = Config.OUTBOX
+    restaurant_app.config['PASSWORD_HASH_METHOD'] = Config.PASSWORD_HASH_METHOD
+    restaurant_app.config['ASGI_THREADS'] = Config.ASGI_THREADS
+    restaurant_app.config['TABLE_CART_TTL'] = Config.TABLE_CART_TTL
+    restaurant_app.config['ORDER_ETA'] = Config.ORDER_ETA
+
+    # === INITIALISATION BASE DE DONNÉES ===
+    db.init_app(restaurant_app)
+    configure_sqlite(restaurant_app)
+
+    # === ENREGISTREMENT DU BLUEPRINT RESTAURANT ===
+    restaurant_app.register_blueprint(restaurant_bp)
+    restaurant_app.register_error_handler(404, not_found)
+    restaurant_app.register_error_handler(500, internal_error)
+    timer = _timed('configuration (SQLAlchemy, blueprint)', timer)
+
+    # Tables et données par défaut : rien à faire si la base est déjà à jour
+    with restaurant_app.app_context():
+        created = init_db()
+    _timed('init_db (création / migration)' if created else 'init_db (base à jour)', timer)
+    return restaurant_app
 
-# Créer les tables et données par défaut au premier démarrage
-with app.app_context():
-    from restaurant.models import init_db
-    init_db()
+
+class LazyRestaurant:
+    """Middleware WSGI : les requêtes /restaurant vont à l'application restaurant,
+    créée une seule fois à la première d'entre elles ; le reste va au site"""
+
+    def __init__(self, site_wsgi_app, prefix='/restaurant'):
+        self.site_wsgi_app = site_wsgi_app
+        self.prefix = prefix
+        self._app = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = create_restaurant_app()
+        return self._app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path == self.prefix or path.startswith(self.prefix + '/'):
+            return self.load()(environ, start_response)
+        return self.site_wsgi_app(environ, start_response)
+
+
+restaurant = LazyRestaurant(app.wsgi_app)
+app.wsgi_app = restaurant
+
+
+class RestaurantCommands(click.Group):
+    """flask --app restaurant.app restaurant ... : commandes du blueprint, exécutées
+    dans le contexte de l'application restaurant (chargée à la demande)"""
+
+    def _commands(self):
+        return restaurant.load().cli.get_command(None, 'restaurant')
+
+    def list_commands(self, ctx):
+        return self._commands().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._commands().get_command(ctx, name)
+
+    def invoke(self, ctx):
+        with restaurant.load().app_context():
+            return super().invoke(ctx)
+
+
+app.cli.add_command(RestaurantCommands('restaurant', help='Commandes du restaurant'))
 
 # ============================================
 # ROUTES PRINCIPALES (CV, Jeu, QR Scanner)
@@ -140,7 +241,24 @@ def internal_error(e):
 # POINT D'ENTRÉE
 # ============================================
 
-if __name__ == '__main__':
+def print_startup_profile():
+    """Durées d'import et d'initialisation, dans l'ordre du démarrage"""
+    print(f"{'étape':<45}{'ms':>9}")
+    for stage, seconds in startup_times:
+        print(f"{stage:<45}{seconds * 1000:>9.1f}")
+    print(f"{'total':<45}{sum(seconds for _, seconds in startup_times) * 1000:>9.1f}")
+
+_timed('application site (routes)', _timer)
+
+if __name__ == '__main__' and '--startup-profile' in sys.argv:
+    # Charger le restaurant tout de suite et servir une première requête
+    restaurant.load()
+    timer = time.perf_counter()
+    with app.test_client() as client:
+        client.get('/restaurant/api/client/menu')
+    _timed('première requête /restaurant/api/client/menu', timer)
+    print_startup_profile()
+elif __name__ == '__main__':
     print(f"🍽️ Restaurant App - Mode {'PythonAnywhere' if IS_PYTHONANYWHERE else 'Local'}")
     print(f"📁 BASE_DIR: {BASE_DIR}")
     print(f"🔗 http://localhost:5000/restaurant/")
@@ -0,0 +1,76 @@
+"""
+Archivage des commandes livrées ou annulées
+Les commandes terminées depuis plus de N jours passent de order / order_item
+à order_archive / order_item_archive par lots, chacun dans sa transaction :
+les tables vivantes restent petites et les requêtes du service rapides.
+Les cumuls de ventes ne changent pas (une commande archivée y reste comptée).
+"""
+
+from datetime import datetime, timedelta
+
+from .database import db
+from .models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem, ArchiveTotals
+from .reports import upsert_counters
+
+# Statuts définitifs : une commande archivée n'est plus modifiée
+ARCHIVABLE_STATUSES = ('delivered', 'cancelled')
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_orders(older_than_days=90, batch_size=ARCHIVE_BATCH_SIZE, now=None):
+    """Archiver les commandes terminées avant maintenant - older_than_days
+
+    Retourne le nombre de commandes déplacées. Un lot interrompu est annulé
+    en entier : une commande n'est jamais à la fois dans les deux tables.
+    """
+    if older_than_days < 1:
+        # Les stats du jour ne lisent pas l'archive
+        raise ValueError("L'âge minimal d'archivage est d'un jour")
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+
+    order_columns = [column.name for column in Order.__table__.columns]
+    item_columns = [column.name for column in OrderItem.__table__.columns]
+
+    moved = 0
+    while True:
+        ids = [order_id for (order_id,) in db.session.query(Order.id).filter(
+            Order.status.in_(ARCHIVABLE_STATUSES),
+            Order.updated_at < cutoff
+        ).order_by(Order.id).limit(batch_size)]
+        if not ids:
+            break
+
+        db.session.execute(db.insert(ArchivedOrder).from_select(
+            order_columns + ['archived_at'],
+            db.select(*Order.__table__.columns, db.literal(datetime.utcnow(), db.DateTime)).where(Order.id.in_(ids))
+        ))
+        db.session.execute(db.insert(ArchivedOrderItem).from_select(
+            item_columns,
+            db.select(*OrderItem.__table__.columns).where(OrderItem.order_id.in_(ids))
+        ))
+
+        totals = db.session.query(
+            Order.status, db.func.count(Order.id), db.func.sum(Order.total)
+        ).filter(Order.id.in_(ids)).group_by(Order.status).all()
+        upsert_counters(ArchiveTotals, ['status'], [
+            {'status': status, 'orders_count': count, 'revenue': float(revenue or 0)}
+            for status, count, revenue in totals
+        ])
+
+        db.session.execute(db.delete(OrderItem).where(OrderItem.order_id.in_(ids)))
+        db.session.execute(db.delete(Order).where(Order.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+    return moved
+
+
+def archive_horizon():
+    """created_at de la commande archivée la plus récente (None si archive vide)"""
+    return db.session.query(db.func.max(ArchivedOrder.created_at)).scalar()
+
+
+def archived_totals():
+    """[(statut, nombre, CA)] de toute l'archive, sans la parcourir"""
+    return db.session.query(
+        ArchiveTotals.status, ArchiveTotals.orders_count, ArchiveTotals.revenue
+    ).all()
@@ -0,0 +1,144 @@
+"""
+Point d'entrée ASGI (optionnel) : uvicorn restaurant.asgi:app
+Le flux SSE des commandes est servi nativement en asyncio : un écran cuisine
+connecté ne mobilise plus un thread pendant des heures. Tout le reste (menu,
+commandes, admin) passe par l'application Flask via a2wsgi, dans un pool de
+ASGI_THREADS threads par worker ; les vues et SQLite restent synchrones.
+
+Usage (depuis le dossier parent de restaurant/) :
+    pip install uvicorn a2wsgi
+    uvicorn restaurant.asgi:app --workers 1
+
+Un seul worker : la diffusion des événements (events.py) et les paniers de
+table (carts.py) sont propres au processus.
+"""
+
+import asyncio
+
+from a2wsgi import WSGIMiddleware
+from flask import url_for
+from werkzeug.http import parse_cookie
+
+from .auth import admin_cache
+from .events import order_events
+
+DEFAULT_THREADS = 10
+
+
+class RestaurantASGI:
+    """Application ASGI : SSE admin en asyncio, requêtes ordinaires déléguées à Flask"""
+
+    def __init__(self, flask_app, threads=None, site_app=None):
+        self.flask_app = flask_app
+        # site_app : application WSGI qui sert tout le reste (par défaut flask_app)
+        self.wsgi = WSGIMiddleware(
+            site_app or flask_app, workers=threads or flask_app.config.get('ASGI_THREADS') or DEFAULT_THREADS
+        )
+        with flask_app.test_request_context():
+            self.stream_path = url_for('restaurant.api_admin_orders_stream')
+            self.login_path = url_for('restaurant.admin_login')
+        # Sans cookie de session signé, la route Flask (synchrone) reste utilisée
+        interface = flask_app.session_interface
+        self.serializer = interface.get_signing_serializer(flask_app) \
+            if hasattr(interface, 'get_signing_serializer') else None
+        self._streams = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == self.stream_path \
+                and scope['method'] == 'GET' and self.serializer is not None:
+            await self._orders_stream(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Les flux SSE ne se terminent jamais d'eux-mêmes : les fermer
+                # pour que l'arrêt gracieux n'attende pas leur délai maximal
+                for task in list(self._streams):
+                    task.cancel()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # ============================================
+    # FLUX SSE DES COMMANDES
+    # ============================================
+
+    def _session_admin(self, scope):
+        """admin_id de la session Flask signée, ou None (mêmes règles qu'admin_required)"""
+        headers = dict(scope['headers'])
+        cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+        value = cookies.get(self.flask_app.config['SESSION_COOKIE_NAME'])
+        if not value:
+            return None
+        max_age = int(self.flask_app.permanent_session_lifetime.total_seconds())
+        try:
+            return self.serializer.loads(value, max_age=max_age).get('admin_id')
+        except Exception:  # signature invalide ou expirée
+            return None
+
+    def _is_active(self, admin_id):
+        with self.flask_app.app_context():
+            return admin_cache.is_active(admin_id)
+
+    async def _orders_stream(self, scope, receive, send):
+        admin_id = self._session_admin(scope)
+        # admin_cache peut lire la base : hors de la boucle d'événements
+        if admin_id is None or not await asyncio.to_thread(self._is_active, admin_id):
+            await send({'type': 'http.response.start', 'status': 302,
+                        'headers': [(b'location', self.login_path.encode())]})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        subscription = order_events.subscribe_async()
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        sender = asyncio.create_task(self._send_frames(send, subscription))
+        watcher = asyncio.create_task(self._wait_disconnect(receive))
+        self._streams.add(sender)
+        try:
+            await asyncio.wait({sender, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            disconnected = watcher.done()
+        finally:
+            sender.cancel()
+            watcher.cancel()
+            self._streams.discard(sender)
+            order_events.unsubscribe(subscription)
+        if not disconnected:
+            # Arrêt du serveur : terminer proprement la réponse
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    @staticmethod
+    async def _send_frames(send, subscription):
+        async for frame in order_events.stream_async(subscription):
+            await send({'type': 'http.response.body', 'body': frame.encode('utf-8'),
+                        'more_body': True})
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+
+def create_asgi_app(flask_app, threads=None, site_app=None):
+    """Envelopper une application Flask dont le blueprint restaurant est enregistré"""
+    return RestaurantASGI(flask_app, threads, site_app)
+
+
+def __getattr__(name):
+    # restaurant.asgi:app crée l'application complète (app.py) au premier accès
+    # seulement : importer create_asgi_app n'ouvre pas la base du site.
+    # Le flux SSE a besoin du restaurant dès le démarrage : il est chargé ici.
+    if name == 'app':
+        from .app import app as site_app, restaurant
+        globals()['app'] = asgi_app = create_asgi_app(restaurant.load(), site_app=site_app)
+        return asgi_app
+    raise AttributeError(name)
@@ -0,0 +1,72 @@
+"""
+URLs d'assets empreintées par contenu (css/client.3f2a1b9c0d.css)
+Une URL empreintée ne change jamais de contenu : elle est servie avec
+Cache-Control immutable et les visites suivantes ne la redemandent plus.
+"""
+
+import hashlib
+import os
+import re
+import threading
+
+from werkzeug.security import safe_join
+
+HASH_LENGTH = 10
+# Un an : le maximum conseillé pour une ressource immuable
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_HASHED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^./]+)$' % HASH_LENGTH)
+
+
+class AssetManifest:
+    """Chemin d'asset → empreinte, recalculée seulement si le fichier a changé"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._entries = {}  # chemin -> (mtime, empreinte)
+
+    def fingerprint(self, path):
+        """Empreinte courte du contenu de path (relatif au dossier static)"""
+        full_path = safe_join(self.folder, path)
+        if full_path is None:
+            raise FileNotFoundError(path)
+        mtime = os.stat(full_path).st_mtime_ns
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with open(full_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+        with self._lock:
+            self._entries[path] = (mtime, digest)
+        return digest
+
+    def hashed_path(self, path):
+        """css/client.css → css/client.<empreinte>.css"""
+        stem, ext = os.path.splitext(path)
+        return f'{stem}.{self.fingerprint(path)}{ext}'
+
+    def preload(self):
+        """Calculer toutes les empreintes d'avance (au démarrage)"""
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.relpath(os.path.join(root, name), self.folder)
+                if not path.startswith('uploads'):
+                    self.fingerprint(path.replace(os.sep, '/'))
+
+
+# Noms produits par images.save_upload : <empreinte>.<ext> ou <empreinte>-<largeur>.<ext>
+_HASHED_UPLOAD = re.compile(r'^[0-9a-f]{16}(-\d+)?\.[a-z0-9]+$')
+
+
+def is_hashed_upload(filename):
+    return bool(_HASHED_UPLOAD.match(filename))
+
+
+def split_hashed_name(filename):
+    """css/client.<empreinte>.css → ('css/client.css', empreinte), sinon (filename, None)"""
+    match = _HASHED_NAME.match(filename)
+    if not match:
+        return filename, None
+    return match.group('stem') + match.group('ext'), match.group('hash')
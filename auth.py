@@ -0,0 +1,110 @@
+"""
+Authentification admin : limitation des tentatives de connexion et cache des comptes
+check_password_hash est volontairement coûteux : sans limite, une rafale de
+mauvais mots de passe occupe les threads dont les commandes ont besoin.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from werkzeug.security import generate_password_hash
+
+from .database import db
+from .models import AdminUser
+
+
+class TokenBucketLimiter:
+    """Seau à jetons par clé : capacity tentatives, rechargées sur per_seconds"""
+
+    def __init__(self, capacity, per_seconds, maxsize=10000):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds  # jetons par seconde
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # clé -> (jetons, horodatage)
+
+    def _refill(self, key, now):
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def acquire(self, key):
+        """Consommer un jeton ; retourne 0 si autorisé, sinon les secondes à attendre"""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            # Les clés les plus anciennes (seaux sans doute pleins) sortent en premier
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return 0 if allowed else (1 - tokens) / self.rate
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Par adresse IP : 20 tentatives, rechargées en 5 minutes
+login_ip_limiter = TokenBucketLimiter(capacity=20, per_seconds=300)
+# Par nom d'utilisateur : 5 tentatives, rechargées en 1 minute
+login_user_limiter = TokenBucketLimiter(capacity=5, per_seconds=60)
+
+
+def login_retry_after(ip, username):
+    """0 si la tentative est autorisée, sinon le délai (secondes) avant la prochaine"""
+    wait_ip = login_ip_limiter.acquire(ip)
+    wait_user = login_user_limiter.acquire(username.lower())
+    return max(wait_ip, wait_user)
+
+
+class AdminCache:
+    """Comptes admin actifs en mémoire : admin_required ne lit plus la base à chaque requête
+
+    Une désactivation faite par un autre worker est vue au plus tard après ttl secondes.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # id -> (actif, expiration)
+
+    def is_active(self, admin_id):
+        now = time.monotonic()
+        entry = self._entries.get(admin_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        row = db.session.query(AdminUser.is_active).filter(AdminUser.id == admin_id).first()
+        active = bool(row and row.is_active)
+        with self._lock:
+            self._entries[admin_id] = (active, now + self.ttl)
+        return active
+
+    def invalidate(self, admin_id=None):
+        with self._lock:
+            if admin_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(admin_id, None)
+
+
+admin_cache = AdminCache()
+
+_hash_prefixes = {}
+
+
+def needs_rehash(password_hash, method=None):
+    """Vrai si le hash n'utilise pas la méthode / les paramètres configurés"""
+    key = method or 'default'
+    prefix = _hash_prefixes.get(key)
+    if prefix is None:
+        # "scrypt" → "scrypt:32768:8:1" : les paramètres effectifs de werkzeug
+        probe = generate_password_hash('', method) if method else generate_password_hash('')
+        prefix = _hash_prefixes[key] = probe.split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != prefix
@@ -0,0 +1,7 @@
+"""
+Benchmarks et test de charge du blueprint restaurant
+
+Usage (depuis le dossier parent de restaurant/) :
+    python -m restaurant.benchmarks --orders 100000 --requests 200 --concurrency 8
+    python -m restaurant.benchmarks --output bench.json --compare bench_precedent.json
+"""
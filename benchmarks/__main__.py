@@ -0,0 +1,125 @@
+"""
+python -m restaurant.benchmarks [--orders N] [--requests N] [--concurrency N]
+                                [--mode client|http|both|connections] [--output FICHIER] [--compare FICHIER]
+python -m restaurant.benchmarks --mode connections [--connections 10,100,500] [--threads 8]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+from .seed import create_app, seed
+from .runner import run_test_client, run_http
+from .connections import run_connections
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(mode, results):
+    print(f"\n== {mode} ==")
+    print(f"{'scénario':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'SQL/req':>9}{'err':>6}")
+    for name, r in results.items():
+        print(f"{name:<20}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+              f"{r['throughput_rps']:>9}{r['queries_per_request']:>9}{r['errors']:>6}")
+
+
+def print_connections(results, threads):
+    print(f"\n== flux SSE ouverts, un worker à {threads} threads ==")
+    print(f"{'serveur':<9}{'flux':>7}{'servis':>8}{'menu p50':>10}{'menu KO':>9}"
+          f"{'événements':>12}")
+    for server, rows in results.items():
+        for r in rows:
+            p50 = '-' if r['menu_p50_ms'] is None else r['menu_p50_ms']
+            print(f"{server:<9}{r['connections']:>7}{r['streams_served']:>8}{p50:>10}"
+                  f"{r['menu_timeouts']:>9}{r['events_delivered']:>12}")
+
+
+def print_comparison(current, previous):
+    """Écart de p50 / p95 / SQL par requête par rapport à un résultat précédent"""
+    print(f"\n== comparaison avec {previous['meta'].get('commit') or 'précédent'} ==")
+    for mode, results in current['results'].items():
+        for name, r in results.items():
+            old = previous['results'].get(mode, {}).get(name)
+            if not old:
+                continue
+            deltas = []
+            for key in ('p50_ms', 'p95_ms', 'queries_per_request'):
+                if old[key]:
+                    deltas.append(f"{key} {(r[key] - old[key]) / old[key] * 100:+.0f}%")
+            print(f"{mode:<7}{name:<20}{'  '.join(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du blueprint restaurant')
+    parser.add_argument('--orders', type=int, default=10000, help='commandes synthétiques à créer')
+    parser.add_argument('--requests', type=int, default=200, help='requêtes par scénario')
+    parser.add_argument('--concurrency', type=int, default=8, help='clients HTTP simultanés')
+    parser.add_argument('--mode', choices=['client', 'http', 'both', 'connections'], default='both')
+    parser.add_argument('--connections', default='10,100,500',
+                        help='flux SSE simultanés à ouvrir (mode connections), séparés par des virgules')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='threads du worker WSGI et du pool ASGI (mode connections)')
+    parser.add_argument('--db', help='fichier SQLite (réutilisé s\'il existe, sinon temporaire)')
+    parser.add_argument('--output', help='enregistrer les résultats en JSON')
+    parser.add_argument('--compare', help='résultats JSON précédents à comparer')
+    args = parser.parse_args()
+
+    reuse = bool(args.db and os.path.exists(args.db))
+    app, db_path = create_app(args.db)
+    if not reuse:
+        t = time.perf_counter()
+        seed(app, orders=args.orders)
+        print(f"🌱 {args.orders} commandes créées en {time.perf_counter() - t:.1f}s ({db_path})")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'orders': args.orders,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'mode': args.mode,
+        },
+        'results': {}
+    }
+    if args.mode in ('client', 'both'):
+        report['results']['client'] = run_test_client(app, args.requests)
+        print_results('client de test', report['results']['client'])
+    if args.mode in ('http', 'both'):
+        report['results']['http'] = run_http(app, args.requests, args.concurrency)
+        print_results(f'HTTP x{args.concurrency}', report['results']['http'])
+    if args.mode == 'connections':
+        # Hors de 'results' : lignes par niveau, non comparables avec --compare
+        report['connections'] = run_connections(
+            app, [int(n) for n in args.connections.split(',')], args.threads
+        )
+        print_connections(report['connections'], args.threads)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+    if not args.db:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
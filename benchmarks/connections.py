@@ -0,0 +1,212 @@
+"""
+Connexions simultanées par worker : serveur WSGI à threads fixes contre entrée ASGI
+N flux SSE admin sont ouverts et gardés, puis on mesure sur le même worker :
+combien de flux sont servis, si le menu répond encore, et combien de flux
+reçoivent une nouvelle commande.
+"""
+
+import http.client
+import json
+import logging
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+from .runner import _login, order_body_factory, percentile
+
+MENU_PATH = '/restaurant/api/client/menu'
+ORDER_PATH = '/restaurant/api/client/order'
+STREAM_PATH = '/restaurant/api/admin/orders/stream'
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Worker synchrone à `threads` threads (comme uWSGI / gunicorn gthread) :
+    au-delà, les connexions attendent qu'un thread se libère"""
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_wsgi(app, threads):
+    server = PooledWSGIServer('127.0.0.1', 0, app, threads)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+    return server.server_address[:2], stop
+
+
+def start_asgi(app, threads):
+    import uvicorn
+    from ..asgi import create_asgi_app
+
+    port = _free_port()
+    config = uvicorn.Config(create_asgi_app(app, threads), host='127.0.0.1', port=port,
+                            log_level='warning', lifespan='on', timeout_graceful_shutdown=1)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError('uvicorn n\'a pas démarré')
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join(5)
+    return ('127.0.0.1', port), stop
+
+
+def open_streams(address, cookie, count, timeout):
+    """Ouvrir `count` flux SSE (sockets brutes, sans thread côté client) ;
+    retourne (sockets, nombre de flux ayant reçu leur première trame)"""
+    request = (f'GET {STREAM_PATH} HTTP/1.1\r\nHost: {address[0]}\r\n'
+               f'Cookie: {cookie}\r\nAccept: text/event-stream\r\n\r\n').encode()
+    sockets = []
+    for _ in range(count):
+        try:
+            sock = socket.create_connection(address, timeout=timeout)
+            sock.sendall(request)
+        except OSError:
+            break
+        sock.setblocking(False)
+        sockets.append(sock)
+    return sockets, len(wait_for(sockets, b'retry:', timeout))
+
+
+def wait_for(sockets, marker, timeout):
+    """Sockets dont le flux contient `marker` avant `timeout` secondes"""
+    selector = selectors.DefaultSelector()
+    buffers = {}
+    for sock in sockets:
+        selector.register(sock, selectors.EVENT_READ)
+        buffers[sock] = b''
+    matched = set()
+    deadline = time.monotonic() + timeout
+    while len(matched) < len(sockets):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        for key, _ in selector.select(remaining):
+            sock = key.fileobj
+            try:
+                chunk = sock.recv(65536)
+            except BlockingIOError:
+                continue
+            except OSError:
+                chunk = b''
+            if not chunk:
+                selector.unregister(sock)
+                continue
+            buffers[sock] = (buffers[sock] + chunk)[-4096:]
+            if marker in buffers[sock]:
+                matched.add(sock)
+                selector.unregister(sock)
+    selector.close()
+    return matched
+
+
+def probe_menu(address, probes, timeout):
+    """Latences du menu (une connexion par requête) ; None si sans réponse"""
+    latencies = []
+    for _ in range(probes):
+        conn = http.client.HTTPConnection(*address, timeout=timeout)
+        t = time.perf_counter()
+        try:
+            conn.request('GET', MENU_PATH)
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - t if response.status < 400 else None)
+        except (OSError, http.client.HTTPException):
+            latencies.append(None)
+        finally:
+            conn.close()
+    return latencies
+
+
+def post_order(address, body, timeout):
+    conn = http.client.HTTPConnection(*address, timeout=timeout)
+    try:
+        conn.request('POST', ORDER_PATH, body=json.dumps(body),
+                     headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        return response.status < 400
+    except (OSError, http.client.HTTPException):
+        return False
+    finally:
+        conn.close()
+
+
+def measure(address, cookie, connections, make_body, probes=10, timeout=3.0):
+    sockets, served = open_streams(address, cookie, connections, timeout)
+    try:
+        latencies = probe_menu(address, probes, timeout)
+        ok = sorted(latency for latency in latencies if latency is not None)
+        ordered = post_order(address, make_body(), timeout)
+        delivered = len(wait_for(sockets, b'event: order', timeout)) if ordered else 0
+        return {
+            'connections': connections,
+            'opened': len(sockets),
+            'streams_served': served,
+            'menu_p50_ms': round(percentile(ok, 50) * 1000, 2) if ok else None,
+            'menu_timeouts': len(latencies) - len(ok),
+            'order_ok': ordered,
+            'events_delivered': delivered,
+        }
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def run_connections(app, levels=(10, 100, 500), threads=8, servers=('wsgi', 'asgi')):
+    """Pour chaque serveur et chaque niveau : N flux SSE ouverts sur un seul worker"""
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    make_body = order_body_factory(app)
+    starters = {'wsgi': start_wsgi, 'asgi': start_asgi}
+    cookie = None
+    results = {}
+    for name in servers:
+        results[name] = []
+        for connections in levels:
+            # Un serveur neuf par niveau : les threads bloqués du niveau précédent
+            # ne faussent pas la mesure
+            address, stop = starters[name](app, threads)
+            try:
+                # Une seule connexion : la session signée vaut pour tous les serveurs,
+                # et le limiteur de tentatives refuserait des connexions répétées
+                cookie = cookie or _login(*address)
+                results[name].append(measure(address, cookie, connections, make_body))
+            finally:
+                stop()
+    return results
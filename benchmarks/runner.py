@@ -0,0 +1,181 @@
+"""
+Scénarios de benchmark : client de test Flask et générateur de charge HTTP multi-thread
+"""
+
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+from ..database import db
+from ..models import MenuItem
+
+# (nom, méthode, chemin, admin requis)
+SCENARIOS = [
+    ('client_menu', 'GET', '/restaurant/api/client/menu', False),
+    ('admin_orders', 'GET', '/restaurant/api/admin/orders', True),
+    ('admin_order_stats', 'GET', '/restaurant/api/admin/orders/stats', True),
+    ('admin_dashboard', 'GET', '/restaurant/admin/', True),
+    # En dernier : chaque exécution ajoute des commandes
+    ('client_order', 'POST', '/restaurant/api/client/order', False),
+]
+
+
+class QueryCounter:
+    """Nombre de requêtes SQL exécutées par le moteur"""
+
+    def __init__(self, engine):
+        self._lock = threading.Lock()
+        self.value = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        with self._lock:
+            self.value += 1
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed, queries, errors):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(sum(latencies) / count * 1000, 2) if count else 0.0,
+        'throughput_rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'queries_per_request': round(queries / count, 2) if count else 0.0,
+    }
+
+
+def order_body_factory(app):
+    with app.app_context():
+        item_ids = [item_id for (item_id,) in db.session.query(MenuItem.id).filter_by(available=True)]
+    rng = random.Random(7)
+
+    def make_body():
+        return {
+            'table_number': str(rng.randint(1, 40)),
+            'items': [{'id': item_id, 'quantity': rng.randint(1, 3)}
+                      for item_id in rng.sample(item_ids, min(3, len(item_ids)))]
+        }
+    return make_body
+
+
+def run_test_client(app, requests=200, warmup=10):
+    """Chaque scénario en séquence via app.test_client() (pas de réseau)"""
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+    make_body = order_body_factory(app)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_id'] = 1
+        session['admin_username'] = 'admin'
+
+    results = {}
+    for name, method, path, _ in SCENARIOS:
+        for _ in range(warmup):
+            client.open(path, method=method, json=make_body() if method == 'POST' else None)
+
+        latencies, errors = [], 0
+        queries_before = counter.value
+        start = time.perf_counter()
+        for _ in range(requests):
+            t = time.perf_counter()
+            response = client.open(path, method=method, json=make_body() if method == 'POST' else None)
+            latencies.append(time.perf_counter() - t)
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - start
+        results[name] = summarize(latencies, elapsed, counter.value - queries_before, errors)
+    return results
+
+
+def _login(host, port):
+    """Cookie de session admin (identifiants par défaut créés par init_db)"""
+    conn = http.client.HTTPConnection(host, port)
+    conn.request('POST', '/restaurant/admin/login',
+                  body=urlencode({'username': 'admin', 'password': 'admin123'}),
+                  headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie', '')
+    conn.close()
+    return cookie.split(';', 1)[0]
+
+
+def run_http(app, requests=200, concurrency=8):
+    """Chaque scénario contre un serveur WSGI multi-thread local, `concurrency` clients"""
+    # Pas de ligne de log par requête pendant la mesure
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    host, port = server.server_address[:2]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+    make_body = order_body_factory(app)
+    body_lock = threading.Lock()
+
+    try:
+        cookie = _login(host, port)
+        local = threading.local()
+
+        def one_request(method, path, admin):
+            if not hasattr(local, 'conn'):
+                local.conn = http.client.HTTPConnection(host, port, timeout=30)
+            headers = {'Accept-Encoding': 'gzip'}
+            if admin:
+                headers['Cookie'] = cookie
+            body = None
+            if method == 'POST':
+                with body_lock:
+                    body = json.dumps(make_body())
+                headers['Content-Type'] = 'application/json'
+            t = time.perf_counter()
+            try:
+                local.conn.request(method, path, body=body, headers=headers)
+                response = local.conn.getresponse()
+                response.read()
+                ok = response.status < 400
+                if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                    local.conn.close()
+                    del local.conn
+            except (OSError, http.client.HTTPException):
+                local.conn.close()
+                del local.conn
+                ok = False
+            return time.perf_counter() - t, ok
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name, method, path, admin in SCENARIOS:
+                queries_before = counter.value
+                start = time.perf_counter()
+                outcomes = list(pool.map(lambda _: one_request(method, path, admin), range(requests)))
+                elapsed = time.perf_counter() - start
+                results[name] = summarize(
+                    [latency for latency, _ in outcomes], elapsed,
+                    counter.value - queries_before,
+                    sum(1 for _, ok in outcomes if not ok)
+                )
+        return results
+    finally:
+        server.shutdown()
@@ -0,0 +1,85 @@
+"""
+Application de benchmark et base SQLite synthétique
+"""
+
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from ..config import Config
+from ..database import db, configure_sqlite
+from ..models import MenuCategory, MenuItem, Order, OrderItem, ArchivedOrder, ORDER_STATUSES, init_db
+from ..reports import backfill_sales
+
+# Insertion par paquets : la mémoire reste constante même pour des millions de lignes
+CHUNK_SIZE = 10000
+
+
+def create_app(db_path=None):
+    """Application Flask minimale (blueprint seul) sur une base SQLite dédiée"""
+    from .. import restaurant_bp
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='restaurant-bench-', suffix='.db')
+        os.close(fd)
+
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'benchmark'
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = Config.SQLALCHEMY_ENGINE_OPTIONS
+    app.config['SQLITE_PRAGMAS'] = Config.SQLITE_PRAGMAS
+
+    db.init_app(app)
+    configure_sqlite(app)
+    app.register_blueprint(restaurant_bp)
+
+    with app.app_context():
+        init_db()
+    return app, db_path
+
+
+def seed(app, orders=1000, categories=8, items_per_category=12, days=90, random_seed=42):
+    """Ajouter un menu et `orders` commandes réparties sur `days` jours"""
+    rng = random.Random(random_seed)
+    with app.app_context():
+        menu_ids = []
+        for c in range(categories):
+            category = MenuCategory(name=f'Catégorie {c}', description='Benchmark', order=c)
+            db.session.add(category)
+            db.session.flush()
+            for i in range(items_per_category):
+                item = MenuItem(name=f'Plat {c}-{i}', description='Description du plat',
+                                price=round(rng.uniform(4, 30), 2), category_id=category.id,
+                                available=True, order=i)
+                db.session.add(item)
+                db.session.flush()
+                menu_ids.append((item.id, item.price))
+        db.session.commit()
+
+        # Au-delà des ids archivés aussi : l'archive garde les ids d'origine
+        next_id = max(db.session.query(db.func.max(model.id)).scalar() or 0
+                      for model in (Order, ArchivedOrder)) + 1
+        now = datetime.utcnow()
+        for start in range(0, orders, CHUNK_SIZE):
+            order_rows, line_rows = [], []
+            for order_id in range(next_id + start, next_id + min(start + CHUNK_SIZE, orders)):
+                created_at = now - timedelta(seconds=rng.uniform(0, days * 86400))
+                lines = rng.sample(menu_ids, rng.randint(1, 5))
+                total = 0.0
+                for menu_item_id, price in lines:
+                    quantity = rng.randint(1, 3)
+                    total += price * quantity
+                    line_rows.append({'order_id': order_id, 'menu_item_id': menu_item_id,
+                                      'quantity': quantity, 'unit_price': price})
+                order_rows.append({'id': order_id, 'table_number': str(rng.randint(1, 40)),
+                                   'status': rng.choice(ORDER_STATUSES), 'created_at': created_at,
+                                   'updated_at': created_at, 'total': round(total, 2)})
+            db.session.execute(db.insert(Order), order_rows)
+            db.session.execute(db.insert(OrderItem), line_rows)
+            db.session.commit()
+
+        backfill_sales()
@@ -0,0 +1,147 @@
+"""
+Caches en mémoire (par processus)
+Le menu est sérialisé une seule fois par version : chaque écriture admin
+sur les catégories ou les items incrémente la version et invalide l'instantané
+(au plus 60 s de retard pour les écritures faites par un autre worker).
+Les statistiques passent par un cache à durée de vie courte.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class MenuCache:
+    """Instantané versionné du menu (corps JSON + ETag)
+    
+    Les écritures de ce processus invalident l'instantané aussitôt ; l'âge maximal
+    borne le retard vis-à-vis des écritures faites par un autre worker.
+    """
+
+    def __init__(self, max_age=60):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.version = 0
+        self._snapshot = None  # (version, construit à, body, etag)
+
+    def invalidate(self):
+        """À appeler après chaque commit modifiant le menu"""
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+
+    def get(self, builder):
+        """Retourne (body, etag), en reconstruisant via builder() si la version a changé"""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == self.version and now - snapshot[1] < self.max_age:
+            return snapshot[2], snapshot[3]
+
+        # Capturer la version avant de lire la base : une écriture concurrente
+        # l'incrémentera et l'instantané construit ici ne sera pas conservé
+        version = self.version
+        body = builder()
+        # ETag tiré du contenu : inchangé après expiration si le menu n'a pas bougé
+        etag = hashlib.sha1(body).hexdigest()
+
+        with self._lock:
+            if self.version == version:
+                self._snapshot = (version, now, body, etag)
+        return body, etag
+
+
+class PriceIndex:
+    """Prix et disponibilité des items, rechargés quand la version du menu change
+    
+    L'âge maximal borne le retard vis-à-vis des écritures faites par un autre worker.
+    """
+
+    def __init__(self, menu_cache, max_age=60):
+        self._menu_cache = menu_cache
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._snapshot = None  # (version, chargé à, index)
+
+    def get(self, loader):
+        """Retourne {item_id: (prix, disponible, nom)}, rechargé via loader() si périmé"""
+        version = self._menu_cache.version
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == version and now - snapshot[1] < self.max_age:
+            return snapshot[2]
+
+        index = loader()
+
+        with self._lock:
+            if self._menu_cache.version == version:
+                self._snapshot = (version, now, index)
+        return index
+
+
+# Un cache par processus (chaque worker WSGI a le sien)
+menu_cache = MenuCache()
+price_index = PriceIndex(menu_cache)
+
+
+class TTLCache:
+    """Petit cache clé → valeur à durée de vie courte, borné en taille"""
+
+    def __init__(self, ttl, maxsize=64):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clé -> (expiration, valeur)
+        self._generation = 0
+
+    def get(self, key, builder):
+        """Retourne la valeur en cache, ou la calcule via builder() si absente ou expirée"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        value = builder()
+
+        with self._lock:
+            # Un clear() pendant le calcul rend la valeur potentiellement périmée
+            if self._generation == generation:
+                self._entries[key] = (now + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+class LRUCache:
+    """Cache clé → valeur borné, les entrées les moins récemment lues sortent en premier"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,175 @@
+"""
+Paniers partagés par table (en mémoire, par processus)
+Tous les appareils d'une table remplissent le même panier, validé en une seule
+commande : une écriture et un ticket cuisine au lieu d'un par convive.
+Chaque modification reçoit une version : une mise à jour conditionnelle
+portant une version périmée est refusée (concurrence optimiste).
+Les paniers inactifs expirent après ttl secondes.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 3 * 3600
+MAX_TABLES = 1000
+MAX_CART_LINES = 50
+
+
+class CartConflict(Exception):
+    """Version attendue périmée : un autre appareil a modifié le panier entre-temps"""
+
+    def __init__(self, snapshot):
+        super().__init__('Panier modifié par un autre appareil')
+        self.snapshot = snapshot
+
+
+class CartFull(Exception):
+    pass
+
+
+class TableCart:
+    __slots__ = ('table_number', 'lines', 'version', 'touched')
+
+    def __init__(self, table_number, version, now):
+        self.table_number = table_number
+        self.lines = {}  # item_id -> [quantité, version de la ligne]
+        self.version = version
+        self.touched = now
+
+    def snapshot(self):
+        return {
+            'table_number': self.table_number,
+            'version': self.version,
+            'lines': [(item_id, quantity, version) for item_id, (quantity, version) in self.lines.items()],
+        }
+
+
+def empty_snapshot(table_number):
+    return {'table_number': table_number, 'version': 0, 'lines': []}
+
+
+class CartStore:
+    """Paniers par numéro de table, du moins au plus récemment modifié
+
+    Les versions viennent d'un compteur unique au processus : un panier recréé
+    après une commande ne reprend jamais une version déjà vue par un appareil.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=MAX_TABLES):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._carts = OrderedDict()
+        self._versions = itertools.count(1)
+
+    def _evict(self, now):
+        # Les plus anciens en tête : on s'arrête au premier panier encore valide
+        while self._carts:
+            cart = next(iter(self._carts.values()))
+            if now - cart.touched < self.ttl and len(self._carts) <= self.maxsize:
+                break
+            del self._carts[cart.table_number]
+
+    def _cart(self, table_number, now):
+        cart = self._carts.get(table_number)
+        if cart is None:
+            cart = self._carts[table_number] = TableCart(table_number, 0, now)
+        return cart
+
+    def _touch(self, cart, now):
+        cart.version = next(self._versions)
+        cart.touched = now
+        self._carts.move_to_end(cart.table_number)
+
+    def get(self, table_number):
+        """Instantané du panier (version 0 et aucune ligne s'il n'existe pas)"""
+        with self._lock:
+            self._evict(time.monotonic())
+            cart = self._carts.get(table_number)
+            return cart.snapshot() if cart else empty_snapshot(table_number)
+
+    def add(self, table_number, item_id, delta, max_quantity):
+        """Ajouter delta (négatif pour retirer) à une ligne ; sans condition de version,
+        deux appareils qui ajoutent le même plat en même temps sont tous deux comptés"""
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            cart = self._cart(table_number, now)
+            quantity = cart.lines.get(item_id, [0])[0]
+            self._write(cart, item_id, min(max_quantity, max(0, quantity + delta)), now)
+            return cart.snapshot()
+
+    def set(self, table_number, item_id, quantity, expected_version):
+        """Fixer la quantité d'une ligne si elle est toujours à expected_version
+        (0 : la ligne ne doit pas exister) ; lève CartConflict sinon"""
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            cart = self._cart(table_number, now)
+            current = cart.lines.get(item_id, [0, 0])[1]
+            if current != expected_version:
+                raise CartConflict(cart.snapshot())
+            self._write(cart, item_id, quantity, now)
+            return cart.snapshot()
+
+    def _write(self, cart, item_id, quantity, now):
+        if quantity and item_id not in cart.lines and len(cart.lines) >= MAX_CART_LINES:
+            raise CartFull(f'{MAX_CART_LINES} lignes maximum par panier')
+        self._touch(cart, now)
+        if quantity:
+            cart.lines[item_id] = [quantity, cart.version]
+        else:
+            cart.lines.pop(item_id, None)
+        if not cart.lines:
+            # Panier vidé : la version reste connue des appareils, pas le panier
+            del self._carts[cart.table_number]
+
+    def checkout(self, table_number, expected_version):
+        """Retirer le panier pour le commander s'il est à expected_version ;
+        retourne le TableCart (None s'il est vide), lève CartConflict sinon"""
+        with self._lock:
+            self._evict(time.monotonic())
+            cart = self._carts.get(table_number)
+            version = cart.version if cart else 0
+            if version != expected_version:
+                raise CartConflict(cart.snapshot() if cart else empty_snapshot(table_number))
+            return self._carts.pop(table_number, None)
+
+    def restore(self, cart, max_quantity):
+        """Remettre un panier dont la commande a échoué ; fusionné avec les lignes
+        ajoutées entre-temps par les autres appareils de la table
+
+        Au-delà de MAX_CART_LINES lignes, les lignes du panier remis qui n'ont
+        plus de place sont abandonnées (celles ajoutées entre-temps sont gardées).
+        """
+        with self._lock:
+            now = time.monotonic()
+            current = self._carts.get(cart.table_number)
+            if current is None:
+                self._carts[cart.table_number] = cart
+                current = cart
+            else:
+                for item_id, (quantity, _) in cart.lines.items():
+                    line = current.lines.get(item_id)
+                    if line is None and len(current.lines) >= MAX_CART_LINES:
+                        continue
+                    total = (line[0] if line else 0) + quantity
+                    current.lines[item_id] = [min(max_quantity, total), 0]
+            self._touch(current, now)
+            for line in current.lines.values():
+                line[1] = line[1] or current.version
+            return current.snapshot()
+
+    def clear(self):
+        with self._lock:
+            self._carts.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._carts)
+
+
+# Un magasin par processus : l'application doit tourner dans un seul processus
+table_carts = CartStore()
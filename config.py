@@ -14,6 +14,68 @@ class Config:
         SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(BASE_DIR, "restaurant.db")}'
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Pool de connexions (un worker WSGI multi-thread partage ce pool)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': 3600,
+        'connect_args': {'timeout': 5, 'check_same_thread': False},
+    }
+    
+    # PRAGMA appliqués à chaque connexion (voir database.configure_sqlite)
+    # WAL : les lecteurs ne bloquent plus les écritures de commandes et inversement
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('DB_BUSY_TIMEOUT', 5000)),  # ms
+        'cache_size': -20000,  # ~20 Mo
+        'mmap_size': 128 * 1024 * 1024,
+        # Laissé à OFF : supprimer un item déjà commandé laisse des lignes orphelines
+        # (affichées « Item supprimé »), ce que ON refuserait
+        'foreign_keys': os.environ.get('DB_FOREIGN_KEYS', 'OFF'),
+    }
+    
+    # Instrumentation des requêtes (voir profiling.py), désactivée par défaut
+    RESTAURANT_PROFILING = {
+        'enabled': os.environ.get('RESTAURANT_PROFILING', '0') == '1',
+        'slow_query_ms': int(os.environ.get('PROFILING_SLOW_QUERY_MS', 100)),
+        'n_plus_one_threshold': int(os.environ.get('PROFILING_N_PLUS_ONE', 10)),
+        'profile_sample_rate': float(os.environ.get('PROFILING_SAMPLE_RATE', 0)),
+        'profile_threshold_ms': int(os.environ.get('PROFILING_THRESHOLD_MS', 500)),
+        'profile_dir': os.environ.get('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles')),
+    }
+    
+    # Commandes livrées / annulées archivées après ce délai (flask restaurant archive-orders)
+    ORDER_ARCHIVE_DAYS = int(os.environ.get('ORDER_ARCHIVE_DAYS', 90))
+    
+    # File de tâches après commande (voir outbox.py) ; sans gestionnaire, rien n'est mis en file
+    OUTBOX = {
+        'workers': int(os.environ.get('OUTBOX_WORKERS', 1)),  # 0 : flask restaurant outbox-worker
+        'kitchen_printer': os.environ.get('KITCHEN_PRINTER'),  # hôte:port (imprimante réseau brute)
+        'ticket_timezone': os.environ.get('KITCHEN_TIMEZONE'),  # heure des tickets (ex. Europe/Paris)
+        'webhook_url': os.environ.get('ORDER_WEBHOOK_URL'),
+    }
+    
+    # Méthode de hash des mots de passe admin (ex. 'scrypt:65536:8:1') ; les hashs
+    # plus anciens sont refaits à la connexion suivante. Vide : défaut de werkzeug
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or None
+    
+    # Estimation des délais (voir eta.py) : commandes préparées en parallèle,
+    # durée supposée d'un plat encore jamais mesuré et âge maximal d'une commande
+    # comptée dans la file (au-delà : oubliée en attente / en préparation)
+    ORDER_ETA = {
+        'stations': int(os.environ.get('KITCHEN_STATIONS', 2)),
+        'default_prep_minutes': int(os.environ.get('DEFAULT_PREP_MINUTES', 12)),
+        'queue_window_hours': int(os.environ.get('KITCHEN_QUEUE_WINDOW_HOURS', 4)),
+    }
+    
+    # Paniers partagés par table (voir carts.py) : durée de vie d'un panier inactif, en secondes
+    TABLE_CART_TTL = int(os.environ.get('TABLE_CART_TTL', 3 * 3600))
+    
+    # Entrée ASGI (voir asgi.py) : threads qui exécutent les vues Flask par worker
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 10))
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
\ No newline at end of file
@@ -1,3 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+def configure_sqlite(app):
+    """Appliquer app.config['SQLITE_PRAGMAS'] à chaque nouvelle connexion SQLite
+    
+    À appeler après db.init_app(app), avant la première requête.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS', {})
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
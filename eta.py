@@ -0,0 +1,210 @@
+"""
+Estimation du délai de préparation des commandes (ETA)
+La durée de préparation de chaque item est apprise des passages
+preparing → ready (moyenne mobile exponentielle), tenue en mémoire et
+sauvegardée périodiquement dans item_prep_stats. L'ETA combine la durée des
+items commandés et la file des commandes en attente ou en préparation.
+Chaque mise à jour coûte O(1) par item : l'historique n'est jamais relu.
+La mémoire n'est modifiée qu'après le commit de la transition (apply) : une
+transaction annulée ne laisse aucune trace dans les moyennes ni dans la file.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects.sqlite import insert
+
+from .database import db
+from .models import ItemPrepStats, Order
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'alpha': 0.2,                 # poids d'une nouvelle mesure
+    'default_prep_minutes': 12,   # item encore jamais mesuré
+    'stations': 2,                # commandes préparées en parallèle en cuisine
+    'min_sample_seconds': 30,     # en dehors : statut oublié ou clic par erreur
+    'max_sample_seconds': 3 * 3600,
+    'checkpoint_interval': 60,    # secondes entre deux sauvegardes
+    'queue_refresh': 30,          # secondes avant de recompter la file en base
+    'queue_window_hours': 4,      # plus ancienne : commande oubliée, hors de la file
+}
+
+# Commandes qui occupent la cuisine
+ACTIVE_STATUSES = ('pending', 'preparing')
+# Ligne de item_prep_stats pour la durée d'une commande entière
+ORDER_KEY = 0
+
+
+class Ewma:
+    """Moyenne mobile exponentielle ; moyenne simple tant que samples < 1/alpha"""
+
+    __slots__ = ('mean', 'samples')
+
+    def __init__(self, mean=0.0, samples=0):
+        self.mean = mean
+        self.samples = samples
+
+    def update(self, value, alpha):
+        self.samples += 1
+        self.mean += max(alpha, 1 / self.samples) * (value - self.mean)
+
+
+class PrepEstimator:
+    """Durées de préparation par item et profondeur de la file (par processus)
+
+    Chargées depuis la base au premier usage ; chaque worker apprend des
+    transitions qu'il traite et sauvegarde sa vue (la dernière écriture gagne).
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(options or DEFAULTS)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Oublier les statistiques et la file (relues en base au prochain usage)"""
+        self._stats = None  # menu_item_id -> Ewma
+        self._dirty = set()
+        self._checkpointed = time.monotonic()
+        self._queue = None  # (commandes actives, compté à)
+
+    def configure(self, options):
+        self.options = options
+
+    def _load(self):
+        if self._stats is None:
+            stats = {row.menu_item_id: Ewma(row.mean_seconds, row.samples)
+                     for row in ItemPrepStats.query}
+            with self._lock:
+                if self._stats is None:
+                    self._stats = stats
+        return self._stats
+
+    def prep_seconds(self, item_id):
+        stat = self._load().get(item_id)
+        return stat.mean if stat else self.options['default_prep_minutes'] * 60
+
+    # ============================================
+    # FILE DE LA CUISINE
+    # ============================================
+
+    def queue_since(self, now=None):
+        """Création la plus ancienne comptée dans la file : au-delà, une commande
+        restée en attente ou en préparation est considérée comme oubliée"""
+        return (now or datetime.utcnow()) - timedelta(hours=self.options['queue_window_hours'])
+
+    def queue_depth(self):
+        """Commandes récentes en attente ou en préparation ; recomptée en base (index
+        status, created_at) au plus toutes les queue_refresh secondes"""
+        queue = self._queue
+        now = time.monotonic()
+        if queue is None or now - queue[1] > self.options['queue_refresh']:
+            count = Order.query.filter(
+                Order.status.in_(ACTIVE_STATUSES), Order.created_at >= self.queue_since()
+            ).count()
+            queue = self._queue = (count, now)
+        return queue[0]
+
+    def queue_changed(self, delta):
+        """Reporter une entrée (+1) ou une sortie (-1) de la file sans relire la base"""
+        with self._lock:
+            if self._queue is not None:
+                self._queue = (max(0, self._queue[0] + delta), self._queue[1])
+
+    # ============================================
+    # ESTIMATION ET APPRENTISSAGE
+    # ============================================
+
+    def estimate(self, item_ids, queue_depth=0):
+        """Secondes avant qu'une commande de ces items soit prête
+
+        Les plats d'une commande sont préparés en parallèle (le plus long compte) ;
+        les commandes déjà en file passent avant, réparties sur les postes.
+        """
+        own = max((self.prep_seconds(item_id) for item_id in set(item_ids)), default=0)
+        backlog = queue_depth * self.prep_seconds(ORDER_KEY) / max(1, self.options['stations'])
+        return own + backlog
+
+    def observe(self, item_ids, seconds):
+        """Durée mesurée d'une commande ; ignorée si hors des bornes plausibles"""
+        options = self.options
+        if not options['min_sample_seconds'] <= seconds <= options['max_sample_seconds']:
+            return False
+        stats = self._load()
+        with self._lock:
+            for key in set(item_ids) | {ORDER_KEY}:
+                stat = stats.get(key)
+                if stat is None:
+                    stat = stats[key] = Ewma(options['default_prep_minutes'] * 60)
+                stat.update(seconds, options['alpha'])
+                self._dirty.add(key)
+        return True
+
+    def record_transition(self, order, old_status, new_status, now):
+        """À appeler avant de changer order.status et order.updated_at
+
+        Seule la commande est modifiée (ETA au passage en préparation) ; retourne
+        (variation de la file, mesure ou None) à passer à apply() après le commit.
+        """
+        item_ids = [line.menu_item_id for line in order.items]
+        if new_status == 'preparing':
+            # En cuisine : plus de file devant elle
+            order.estimated_ready_at = now + timedelta(seconds=round(self.estimate(item_ids)))
+        queued = order.created_at is not None and order.created_at >= self.queue_since(now)
+        delta = (new_status in ACTIVE_STATUSES) - (old_status in ACTIVE_STATUSES) if queued else 0
+        sample = None
+        if old_status == 'preparing' and new_status == 'ready' and order.updated_at:
+            # updated_at : passage en préparation
+            sample = (item_ids, (now - order.updated_at).total_seconds())
+        return delta, sample
+
+    def apply(self, transitions):
+        """Après le commit : reporter les transitions sur la file et les moyennes"""
+        self.queue_changed(sum(delta for delta, _ in transitions))
+        learned = [self.observe(*sample) for _, sample in transitions if sample]
+        if any(learned):
+            self.checkpoint()
+
+    def checkpoint(self, force=False):
+        """Sauvegarder les statistiques modifiées, dans leur propre transaction
+        (si l'intervalle est écoulé) ; retourne le nombre de lignes écrites"""
+        now = time.monotonic()
+        if not force and now - self._checkpointed < self.options['checkpoint_interval']:
+            return 0
+        updated_at = datetime.utcnow()
+        with self._lock:
+            dirty = set(self._dirty)
+            rows = [{'menu_item_id': key, 'mean_seconds': self._stats[key].mean,
+                     'samples': self._stats[key].samples, 'updated_at': updated_at}
+                    for key in dirty]
+            self._dirty.clear()
+            self._checkpointed = now
+        if not rows:
+            return 0
+        table = ItemPrepStats.__table__
+        stmt = insert(table)
+        try:
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['menu_item_id'],
+                set_={name: stmt.excluded[name] for name in ('mean_seconds', 'samples', 'updated_at')}
+            ), rows)
+            db.session.commit()
+        except Exception:
+            # Les moyennes restent en mémoire : nouvel essai au prochain checkpoint
+            db.session.rollback()
+            with self._lock:
+                self._dirty |= dirty
+            logger.exception('Sauvegarde des durées de préparation impossible')
+            return 0
+        return len(rows)
+
+
+prep_estimator = PrepEstimator()
+
+
+def options_for(app):
+    """Réglages de app.config['ORDER_ETA'] complétés par DEFAULTS"""
+    return {**DEFAULTS, **(app.config.get('ORDER_ETA') or {})}
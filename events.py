@@ -0,0 +1,140 @@
+"""
+Diffusion en mémoire des événements de commandes (Server-Sent Events)
+Les routes publient, chaque écran cuisine connecté reçoit via sa propre file bornée.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+
+
+class Subscription:
+    """File d'événements d'un abonné"""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        # Positionné quand la file déborde : l'abonné doit se resynchroniser
+        self.overflowed = False
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+
+class AsyncSubscription:
+    """File asyncio d'un abonné servi par une boucle d'événements (voir asgi.py)
+
+    publish() est appelé depuis des threads : le message est remis à la boucle.
+    """
+
+    def __init__(self, maxsize, loop):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.loop = loop
+        self.overflowed = False
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # boucle fermée : le serveur s'arrête
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroker:
+    """Pub/sub thread-safe, un abonné par connexion SSE"""
+
+    def __init__(self, queue_size=100, heartbeat=15):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def subscribe_async(self):
+        """Abonnement consommé depuis la boucle asyncio courante"""
+        subscription = AsyncSubscription(self.queue_size, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event, data):
+        """Envoyer un événement à tous les abonnés sans jamais bloquer l'appelant"""
+        message = format_sse(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def stream(self, subscription):
+        """Générateur de trames SSE ; se désabonne à la déconnexion du client"""
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                if subscription.overflowed:
+                    self._drain(subscription)
+                    yield format_sse('resync', {})
+                    continue
+                try:
+                    yield subscription.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+    async def stream_async(self, subscription):
+        """Équivalent asyncio de stream() : aucun thread bloqué par connexion"""
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                if subscription.overflowed:
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.overflowed = False
+                    yield format_sse('resync', {})
+                    continue
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': heartbeat\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+    @staticmethod
+    def _drain(subscription):
+        try:
+            while True:
+                subscription.queue.get_nowait()
+        except queue.Empty:
+            pass
+        subscription.overflowed = False
+
+
+def format_sse(event, data):
+    """Sérialiser une trame SSE"""
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+# Un broker par processus
+order_events = EventBroker()
@@ -0,0 +1,104 @@
+"""
+Soumission idempotente des commandes (en-tête Idempotency-Key)
+Les réponses sont conservées en base, dans la transaction de la commande,
+avec un LRU en mémoire devant pour que les renvois ne coûtent rien.
+Une clé n'est rejouée que pour la même requête (empreinte du chemin et du
+corps) et pendant KEY_RETENTION, en mémoire comme en base.
+"""
+
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from .database import db
+from .models import IdempotencyKey
+from .cache import LRUCache
+
+MAX_KEY_LENGTH = 64
+# Au-delà, une clé peut être réutilisée par une nouvelle commande
+KEY_RETENTION = timedelta(hours=24)
+
+# clé -> (réponse, empreinte de la requête, created_at)
+recent_responses = LRUCache(maxsize=1024)
+
+# clé -> [verrou, requêtes qui le tiennent ou l'attendent] (ce processus)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class KeyReused(Exception):
+    """Clé déjà utilisée pour une requête différente (corps ou chemin)"""
+
+    def __init__(self):
+        super().__init__('Idempotency-Key déjà utilisée pour une autre requête')
+
+
+def request_fingerprint(path, data):
+    """Empreinte d'une requête : chemin et corps JSON, indépendante de l'ordre des clés"""
+    body = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(f'{path}\n{body}'.encode('utf-8')).hexdigest()
+
+
+def lookup(key, fingerprint=None):
+    """Réponse déjà enregistrée pour cette clé, ou None
+
+    Lève KeyReused si la clé a accompagné une autre requête (empreinte différente).
+    """
+    entry = recent_responses.get(key)
+    if entry is None:
+        row = db.session.query(
+            IdempotencyKey.response, IdempotencyKey.request_hash, IdempotencyKey.created_at
+        ).filter(IdempotencyKey.key == key).first()
+        if row is None:
+            return None
+        entry = (json.loads(row.response), row.request_hash, row.created_at)
+        recent_responses.put(key, entry)
+
+    payload, request_hash, created_at = entry
+    if created_at < datetime.utcnow() - KEY_RETENTION:
+        return None
+    # Clés enregistrées avant les empreintes : pas de vérification possible
+    if fingerprint and request_hash and request_hash != fingerprint:
+        raise KeyReused()
+    return payload
+
+
+def remember(key, order_id, payload, fingerprint=None):
+    """Enregistrer la réponse dans la transaction en cours (avant le commit) ; retourne created_at"""
+    now = datetime.utcnow()
+    # Purge des clés expirées : parcours d'index, généralement vide
+    IdempotencyKey.query.filter(
+        IdempotencyKey.created_at < now - KEY_RETENTION
+    ).delete(synchronize_session=False)
+    db.session.add(IdempotencyKey(
+        key=key, order_id=order_id, response=json.dumps(payload),
+        request_hash=fingerprint, created_at=now
+    ))
+    return now
+
+
+def remembered(key, payload, fingerprint, created_at):
+    """Après le commit : garder la réponse en mémoire"""
+    recent_responses.put(key, (payload, fingerprint, created_at))
+
+
+@contextmanager
+def exclusive(key):
+    """Une seule requête à la fois par clé dans ce processus : un renvoi concurrent
+    attend la fin de la première, puis trouve sa réponse avec lookup()"""
+    if not key:
+        yield
+        return
+    with _in_flight_lock:
+        entry = _in_flight.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _in_flight_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _in_flight[key]
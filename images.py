@@ -0,0 +1,138 @@
+"""
+Traitement des images uploadées : variantes redimensionnées et formats modernes
+Les fichiers sont nommés par empreinte du contenu ; les variantes sont produites
+en arrière-plan pour ne pas ralentir l'upload.
+"""
+
+import glob
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Largeurs des variantes (jamais agrandies au-delà de l'original)
+VARIANT_WIDTHS = {'thumb': 320, 'medium': 800, 'full': 1600}
+# Formats produits pour chaque largeur, du plus compact au plus compatible
+VARIANT_FORMATS = ['avif', 'webp', 'jpeg']
+FORMAT_EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+FORMAT_QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 80}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='images')
+
+_pillow_modules = None
+
+
+def pillow():
+    """(Image, ImageOps, features), importés au premier upload plutôt qu'au démarrage ;
+    None si Pillow est absent (seules les images d'origine sont servies)"""
+    global _pillow_modules
+    if _pillow_modules is None:
+        try:
+            from PIL import Image, ImageOps, features
+            _pillow_modules = (Image, ImageOps, features)
+        except ImportError:
+            _pillow_modules = ()
+    return _pillow_modules or None
+
+
+def supported_formats():
+    """Formats de variantes disponibles avec le Pillow installé"""
+    modules = pillow()
+    if modules is None:
+        return []
+    features = modules[2]
+    return [fmt for fmt in VARIANT_FORMATS if fmt == 'jpeg' or features.check(fmt)]
+
+
+def save_upload(file, upload_folder):
+    """Enregistrer un fichier sous <empreinte>.<ext> ; retourne le nom de fichier
+
+    Lève ValueError si le contenu n'est pas une image lisible.
+    """
+    data = file.read()
+    modules = pillow()
+    if modules is not None:
+        try:
+            modules[0].open(io.BytesIO(data)).verify()
+        except Exception:
+            raise ValueError('Image invalide')
+
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    filename = f"{hashlib.sha256(data).hexdigest()[:16]}.{ext}"
+
+    filepath = os.path.join(upload_folder, filename)
+    if not os.path.exists(filepath):
+        with open(filepath, 'wb') as f:
+            f.write(data)
+    return filename
+
+
+def submit(filepath, on_done=None):
+    """Produire les variantes de filepath en arrière-plan"""
+    if pillow() is None:
+        return None
+    return _executor.submit(_process, filepath, on_done)
+
+
+def _process(filepath, on_done):
+    try:
+        create_variants(filepath)
+    except Exception:
+        logger.exception("Échec du traitement de l'image %s", filepath)
+        return
+    if on_done:
+        on_done()
+
+
+def create_variants(filepath):
+    """Écrire <empreinte>-<largeur>.<format> à côté de l'original"""
+    base = os.path.splitext(filepath)[0]
+    formats = supported_formats()
+    Image, ImageOps, _ = pillow()
+
+    with Image.open(filepath) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ('RGB', 'RGBA'):
+            transparent = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if transparent else 'RGB')
+
+        for width in sorted({min(w, image.width) for w in VARIANT_WIDTHS.values()}):
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+
+            for fmt in formats:
+                target = f"{base}-{width}.{FORMAT_EXTENSIONS[fmt]}"
+                if os.path.exists(target):
+                    continue
+                variant = resized
+                if fmt == 'jpeg' and variant.mode == 'RGBA':
+                    # JPEG sans transparence : fond blanc
+                    variant = Image.new('RGB', variant.size, 'white')
+                    variant.paste(resized, mask=resized.getchannel('A'))
+                # Écriture atomique : jamais de variante à moitié écrite servie
+                tmp = f"{target}.tmp"
+                variant.save(tmp, format=fmt.upper(), quality=FORMAT_QUALITY[fmt])
+                os.replace(tmp, target)
+
+
+def image_srcset(image_url, upload_folder):
+    """{format: 'url 320w, url 800w'} pour les variantes existantes d'une image uploadée"""
+    if not image_url or '/uploads/' not in image_url:
+        return {}
+    url_base, filename = image_url.rsplit('/', 1)
+    stem = os.path.splitext(filename)[0]
+
+    srcset = {}
+    for fmt in VARIANT_FORMATS:
+        ext = FORMAT_EXTENSIONS[fmt]
+        widths = []
+        for path in glob.glob(os.path.join(glob.escape(upload_folder), f"{glob.escape(stem)}-*.{ext}")):
+            width = os.path.basename(path)[len(stem) + 1:-len(ext) - 1]
+            if width.isdigit():
+                widths.append(int(width))
+        if widths:
+            srcset[fmt] = ', '.join(f"{url_base}/{stem}-{width}.{ext} {width}w" for width in sorted(widths))
+    return srcset
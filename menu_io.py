@@ -0,0 +1,233 @@
+"""
+Import / export du menu complet (CSV ou NDJSON)
+L'import lit le corps de la requête ligne à ligne, valide chaque ligne et
+crée ou met à jour catégories et items par lots, un commit par lot.
+L'export est produit par un générateur : le menu n'est jamais en mémoire en entier.
+"""
+
+import csv
+import io
+import json
+import math
+
+from .database import db
+from .models import MenuCategory, MenuItem
+
+# Colonnes, dans l'ordre du CSV exporté (et attendu à l'import)
+COLUMNS = ['id', 'category', 'category_order', 'name', 'description',
+           'price', 'image_url', 'available', 'order']
+IMPORT_BATCH_SIZE = 500
+# Au-delà, les erreurs suivantes sont seulement comptées
+MAX_REPORTED_ERRORS = 200
+
+_TRUE = {'1', 'true', 'yes', 'oui', 'y', 'o'}
+_FALSE = {'0', 'false', 'no', 'non', 'n', ''}
+
+
+def read_rows(stream, fmt):
+    """Itérer (numéro de ligne, dict) sur un flux binaire CSV ou NDJSON"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def _text(row, name, max_length=None):
+    value = row.get(name)
+    value = '' if value is None else str(value).strip()
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{name} : {max_length} caractères maximum')
+    return value
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    value = '' if value is None else str(value).strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f'available invalide : {value}')
+
+
+def _integer(row, name, default=0):
+    value = row.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} doit être un entier')
+
+
+def validate_row(row):
+    """Ligne brute → valeurs propres ; lève ValueError avec un message lisible"""
+    if row is None:
+        raise ValueError('Ligne illisible')
+    name = _text(row, 'name', 200)
+    if not name:
+        raise ValueError('name requis')
+    category = _text(row, 'category', 100)
+    if not category:
+        raise ValueError('category requis')
+    try:
+        price = float(row.get('price'))
+    except (TypeError, ValueError):
+        raise ValueError('price doit être un nombre')
+    if not math.isfinite(price) or price < 0:
+        raise ValueError('price doit être positif')
+
+    available = row.get('available')
+    return {
+        'id': _integer(row, 'id', None),
+        'category': category,
+        'category_order': _integer(row, 'category_order', None),
+        'name': name,
+        'description': _text(row, 'description'),
+        'price': round(price, 2),
+        'image_url': _text(row, 'image_url', 500),
+        'available': True if available is None or available == '' else _boolean(available),
+        'order': _integer(row, 'order'),
+    }
+
+
+class MenuImporter:
+    """Upsert de lignes du menu : item repris par id, sinon par (catégorie, nom)"""
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.categories = {category.name: category for category in MenuCategory.query}
+        self.items_by_id = {}
+        self.items_by_key = {}
+        # Clé courante de chaque item, sans relire l'objet expiré après un commit
+        self._keys = {}
+        for item in MenuItem.query:
+            self.items_by_id[item.id] = item
+            self._index(item, (item.category_id, item.name))
+        self.report = {'rows': 0, 'created': 0, 'updated': 0, 'categories_created': 0,
+                       'failed': 0, 'errors': []}
+        self._pending = 0
+
+    def _category(self, values):
+        category = self.categories.get(values['category'])
+        if category is None:
+            order = values['category_order']
+            category = MenuCategory(name=values['category'], description='',
+                                    order=order if order is not None else len(self.categories) + 1)
+            db.session.add(category)
+            db.session.flush()  # id nécessaire aux items
+            self.categories[category.name] = category
+            self.report['categories_created'] += 1
+        elif values['category_order'] is not None:
+            category.order = values['category_order']
+        return category
+
+    def add(self, line_number, row):
+        self.report['rows'] += 1
+        try:
+            values = validate_row(row)
+            if values['id'] is not None and values['id'] not in self.items_by_id:
+                raise ValueError(f"item {values['id']} introuvable")
+        except ValueError as e:
+            self.report['failed'] += 1
+            if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+                self.report['errors'].append({'line': line_number, 'error': str(e)})
+            return
+
+        category = self._category(values)
+        item = self.items_by_id.get(values['id']) if values['id'] is not None else \
+            self.items_by_key.get((category.id, values['name']))
+        if item is None:
+            item = MenuItem()
+            db.session.add(item)
+            self.report['created'] += 1
+        else:
+            self.items_by_key.pop(self._keys.get(item), None)
+            self.report['updated'] += 1
+
+        item.name = values['name']
+        item.description = values['description']
+        item.price = values['price']
+        item.category_id = category.id
+        item.image_url = values['image_url']
+        item.available = values['available']
+        item.order = values['order']
+        self._index(item, (category.id, values['name']))
+
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+
+    def _index(self, item, key):
+        self.items_by_key[key] = item
+        self._keys[item] = key
+
+    def commit(self):
+        db.session.commit()
+        self._pending = 0
+
+
+def import_menu(stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """Importer un flux CSV / NDJSON ; retourne le rapport (compteurs et erreurs par ligne)"""
+    session = db.session()
+    # Les objets chargés au départ restent utilisables d'un lot à l'autre
+    # (sinon chaque item serait relu après chaque commit)
+    expire_on_commit, session.expire_on_commit = session.expire_on_commit, False
+    try:
+        importer = MenuImporter(batch_size)
+        for line_number, row in read_rows(stream, fmt):
+            importer.add(line_number, row)
+        importer.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+    return importer.report
+
+
+def _export_rows():
+    categories = {category.id: category for category in MenuCategory.query}
+    items = MenuItem.query.order_by(MenuItem.category_id, MenuItem.order, MenuItem.id)
+    for item in items.yield_per(IMPORT_BATCH_SIZE):
+        category = categories.get(item.category_id)
+        yield {
+            'id': item.id,
+            'category': category.name if category else '',
+            'category_order': category.order if category else 0,
+            'name': item.name,
+            'description': item.description or '',
+            'price': float(item.price),
+            'image_url': item.image_url or '',
+            'available': bool(item.available),
+            'order': item.order or 0,
+        }
+
+
+def export_menu(fmt):
+    """Générateur de chunks texte du menu complet (en-tête compris pour le CSV)"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+        writer.writeheader()
+        for count, row in enumerate(_export_rows(), start=1):
+            writer.writerow({**row, 'available': int(row['available'])})
+            if count % 100 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    for row in _export_rows():
+        yield json.dumps(row, ensure_ascii=False) + '\n'
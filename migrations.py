@@ -0,0 +1,190 @@
+"""
+Migrations légères du schéma SQLite
+create_all crée les tables manquantes mais ne modifie jamais une table existante.
+Chaque migration est une fonction idempotente ; PRAGMA user_version retient la
+dernière appliquée, pour ne rejouer que les nouvelles au démarrage.
+schema_stamp retient l'empreinte des modèles : tant qu'elle ne change pas,
+init_db ne fait qu'une lecture au démarrage.
+"""
+
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateTable
+
+from .database import db
+from .models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem, SchemaStamp
+from .reports import backfill_sales
+
+
+def create_missing_indexes():
+    """Créer les index déclarés dans les modèles qui manquent en base"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+def backfill_updated_at():
+    """Le flux incrémental des commandes s'appuie sur updated_at"""
+    Order.query.filter(Order.updated_at.is_(None)).update(
+        {Order.updated_at: Order.created_at},
+        synchronize_session=False
+    )
+
+
+def add_column(table, column, ddl_type):
+    """ALTER TABLE ADD COLUMN si la colonne manque (create_all ne le fait pas)"""
+    columns = {row[1] for row in db.session.execute(text(f'PRAGMA table_info("{table}")'))}
+    if column not in columns:
+        db.session.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl_type}'))
+
+
+def add_estimated_ready_at():
+    """Colonne ETA des commandes, aussi dans l'archive (qui copie toutes les colonnes)"""
+    for table in ('order', 'order_archive'):
+        add_column(table, 'estimated_ready_at', 'DATETIME')
+
+
+def add_idempotency_request_hash():
+    """Empreinte de la requête d'origine ; NULL pour les clés déjà enregistrées"""
+    add_column('idempotency_key', 'request_hash', 'VARCHAR(64)')
+
+
+def rebuild_table(table):
+    """Recréer une table selon son modèle en gardant ses lignes (SQLite ne sait pas
+    modifier une clé primaire) : nouvelle table, copie, suppression, renommage"""
+    temporary = f'{table.name}_rebuild'
+    ddl = str(CreateTable(table).compile(dialect=db.engine.dialect))
+    db.session.execute(text(f'CREATE TABLE "{temporary}" {ddl[ddl.index("("):]}'))
+    columns = ', '.join(f'"{column.name}"' for column in table.columns)
+    db.session.execute(text(f'INSERT INTO "{temporary}" ({columns}) SELECT {columns} FROM "{table.name}"'))
+    # Supprime aussi les index ; les références des autres tables (par nom) restent valides
+    db.session.execute(text(f'DROP TABLE "{table.name}"'))
+    db.session.execute(text(f'ALTER TABLE "{temporary}" RENAME TO "{table.name}"'))
+    for index in table.indexes:
+        index.create(bind=db.session.connection())
+
+
+def max_id(*columns):
+    return max(db.session.query(db.func.max(column)).scalar() or 0 for column in columns)
+
+
+def renumber_archived_ids():
+    """Donner un nouvel id aux commandes et lignes vivantes dont l'id est déjà archivé
+    (réutilisé par SQLite avant AUTOINCREMENT) : sinon l'archivage échoue à chaque passage"""
+    next_id = max_id(Order.id, ArchivedOrder.id) + 1
+    colliding = db.session.query(Order.id).filter(
+        Order.id.in_(db.select(ArchivedOrder.id))
+    ).order_by(Order.id).all()
+    for (order_id,) in colliding:
+        # updated_at inchangé (onupdate) : la commande n'a pas été modifiée
+        db.session.execute(db.update(Order).where(Order.id == order_id).values(
+            id=next_id, updated_at=Order.updated_at
+        ))
+        db.session.execute(db.update(OrderItem).where(OrderItem.order_id == order_id).values(order_id=next_id))
+        db.session.execute(text('UPDATE idempotency_key SET order_id = :new WHERE order_id = :old'),
+                           {'new': next_id, 'old': order_id})
+        next_id += 1
+
+    next_id = max_id(OrderItem.id, ArchivedOrderItem.id) + 1
+    colliding = db.session.query(OrderItem.id).filter(
+        OrderItem.id.in_(db.select(ArchivedOrderItem.id))
+    ).order_by(OrderItem.id).all()
+    for (item_id,) in colliding:
+        db.session.execute(db.update(OrderItem).where(OrderItem.id == item_id).values(id=next_id))
+        next_id += 1
+
+
+def autoincrement_order_ids():
+    """order / order_item en AUTOINCREMENT, compteurs au-delà des ids vivants et archivés
+
+    Sans AUTOINCREMENT, SQLite reprend max(id) + 1 : une fois les dernières
+    commandes archivées, leurs ids revenaient et entraient en collision avec
+    order_archive à l'archivage suivant.
+    """
+    foreign_keys = db.session.execute(text('PRAGMA foreign_keys')).scalar()
+    # DROP TABLE vérifierait les références des lignes (sans effet dans une transaction)
+    db.session.execute(text('PRAGMA foreign_keys = OFF'))
+    for table in (Order.__table__, OrderItem.__table__):
+        ddl = db.session.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': table.name}).scalar()
+        if 'AUTOINCREMENT' not in ddl.upper():
+            rebuild_table(table)
+    renumber_archived_ids()
+    for model, archive in ((Order, ArchivedOrder), (OrderItem, ArchivedOrderItem)):
+        seq = max_id(model.id, archive.id)
+        name = model.__tablename__
+        updated = db.session.execute(text(
+            'UPDATE sqlite_sequence SET seq = max(seq, :seq) WHERE name = :name'
+        ), {'seq': seq, 'name': name}).rowcount
+        if not updated:
+            db.session.execute(text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'),
+                               {'name': name, 'seq': seq})
+    db.session.commit()
+    if foreign_keys:
+        db.session.execute(text('PRAGMA foreign_keys = ON'))
+
+
+def fill_sales_rollups():
+    """Cumuls de ventes calculés depuis l'historique
+
+    Les tables daily_sales / daily_item_sales arrivent vides sur une base
+    existante : sans ce remplissage, annuler une commande antérieure les
+    rendait négatives (record_status_change retire la commande des cumuls).
+    """
+    backfill_sales()
+
+
+# Ordre d'application ; n'ajouter qu'à la fin (le numéro est la position)
+MIGRATIONS = [
+    backfill_updated_at,     # 1
+    create_missing_indexes,  # 2 : index des requêtes fréquentes (dates, statut, lignes, menu)
+    add_estimated_ready_at,  # 3
+    add_idempotency_request_hash,  # 4
+    autoincrement_order_ids,  # 5 : ids de commandes jamais réutilisés (archive)
+    fill_sales_rollups,      # 6 : cumuls de ventes des commandes déjà en base
+]
+
+
+def schema_version():
+    return db.session.execute(text('PRAGMA user_version')).scalar() or 0
+
+
+def migrate():
+    """Appliquer les migrations pas encore passées ; retourne la liste des numéros appliqués"""
+    applied = []
+    version = schema_version()
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        migration()
+        # PRAGMA n'accepte pas de paramètre lié ; number est un entier
+        db.session.execute(text(f'PRAGMA user_version = {int(number)}'))
+        db.session.commit()
+        applied.append(number)
+    return applied
+
+
+def schema_fingerprint():
+    """Empreinte des tables, colonnes et index déclarés, et du nombre de migrations"""
+    parts = [str(len(MIGRATIONS))]
+    for table in db.metadata.sorted_tables:
+        parts.append(table.name)
+        parts += [f'{column.name}:{column.type}' for column in table.columns]
+        parts += sorted(index.name for index in table.indexes)
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+
+def read_stamp():
+    """Empreinte enregistrée par le dernier init_db complet, None pour une base neuve"""
+    try:
+        return db.session.execute(text('SELECT fingerprint FROM schema_stamp WHERE id = 1')).scalar()
+    except OperationalError:  # table absente
+        db.session.rollback()
+        return None
+
+
+def write_stamp(fingerprint):
+    db.session.merge(SchemaStamp(id=1, fingerprint=fingerprint, stamped_at=datetime.utcnow()))
+    db.session.commit()
@@ -20,25 +20,143 @@ class MenuItem(db.Model):
     category_id = db.Column(db.Integer, db.ForeignKey('menu_category.id'), nullable=False)
     available = db.Column(db.Boolean, default=True)
     order = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (
+        # Items disponibles d'une catégorie, dans l'ordre d'affichage
+        db.Index('ix_menu_item_category_available_order', 'category_id', 'available', 'order'),
+    )
+
+# Statuts possibles d'une commande, dans l'ordre du service
+ORDER_STATUSES = ['pending', 'preparing', 'ready', 'delivered', 'cancelled']
+
+# Transitions autorisées ; livrée et annulée sont définitives (voir archive.py)
+ORDER_TRANSITIONS = {
+    'pending': {'preparing', 'ready', 'cancelled'},
+    'preparing': {'ready', 'cancelled'},
+    'ready': {'delivered', 'preparing'},  # retour en cuisine
+    'delivered': set(),
+    'cancelled': set(),
+}
+
+def can_transition(old_status, new_status):
+    """Vrai si une commande peut passer de old_status à new_status"""
+    return new_status in ORDER_TRANSITIONS.get(old_status, ())
 
 class Order(db.Model):
     __tablename__ = 'order'
     id = db.Column(db.Integer, primary_key=True)
     table_number = db.Column(db.String(50))
     status = db.Column(db.String(50), default='pending')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     total = db.Column(db.Float, default=0)
+    estimated_ready_at = db.Column(db.DateTime)  # ETA (voir eta.py)
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Filtre par statut trié par date ; sert aussi les recherches sur status seul
+        db.Index('ix_order_status_created_at', 'status', 'created_at'),
+        # Ids jamais réutilisés : l'archive garde les ids d'origine (voir archive.py)
+        {'sqlite_autoincrement': True},
+    )
 
 class OrderItem(db.Model):
     __tablename__ = 'order_item'
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
-    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_item.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_item.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, default=1)
     unit_price = db.Column(db.Float)
     menu_item = db.relationship('MenuItem')
+    
+    __table_args__ = ({'sqlite_autoincrement': True},)
+
+class ArchivedOrder(db.Model):
+    """Commande livrée ou annulée sortie de la table order (voir archive.py)"""
+    __tablename__ = 'order_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # id d'origine
+    table_number = db.Column(db.String(50))
+    status = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime)
+    total = db.Column(db.Float, default=0)
+    estimated_ready_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ArchivedOrderItem(db.Model):
+    """Ligne d'une commande archivée"""
+    __tablename__ = 'order_item_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, nullable=False, index=True)
+    menu_item_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, default=1)
+    unit_price = db.Column(db.Float)
+
+class ArchiveTotals(db.Model):
+    """Nombre et CA des commandes archivées par statut (stats sans parcourir l'archive)"""
+    __tablename__ = 'order_archive_totals'
+    status = db.Column(db.String(50), primary_key=True)
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+class DailySales(db.Model):
+    """Cumul journalier des commandes non annulées (jour de created_at, UTC)"""
+    __tablename__ = 'daily_sales'
+    day = db.Column(db.Date, primary_key=True)
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+class DailyItemSales(db.Model):
+    """Cumul journalier par item de menu"""
+    __tablename__ = 'daily_item_sales'
+    day = db.Column(db.Date, primary_key=True)
+    menu_item_id = db.Column(db.Integer, primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+class ItemPrepStats(db.Model):
+    """Durée de préparation apprise par item (moyenne mobile, voir eta.py)"""
+    __tablename__ = 'item_prep_stats'
+    menu_item_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 0 : commande entière
+    mean_seconds = db.Column(db.Float, nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class IdempotencyKey(db.Model):
+    """Réponse d'une commande déjà créée, rejouée si le client renvoie la même clé"""
+    __tablename__ = 'idempotency_key'
+    key = db.Column(db.String(64), primary_key=True)
+    order_id = db.Column(db.Integer)
+    response = db.Column(db.Text, nullable=False)
+    request_hash = db.Column(db.String(64))  # empreinte de la requête d'origine
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class OutboxJob(db.Model):
+    """Tâche différée (ticket cuisine, notification), écrite avec la commande (voir outbox.py)"""
+    __tablename__ = 'outbox_job'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(32))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    done_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        # Tâches dues : status = 'pending' AND available_at <= maintenant
+        db.Index('ix_outbox_job_status_available_at', 'status', 'available_at'),
+    )
+
+class SchemaStamp(db.Model):
+    """Empreinte du schéma initialisé : init_db ne refait rien tant qu'elle correspond"""
+    __tablename__ = 'schema_stamp'
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    stamped_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class AdminUser(db.Model):
     __tablename__ = 'admin_user'
@@ -47,17 +165,30 @@ class AdminUser(db.Model):
     password_hash = db.Column(db.String(200), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password, method=None):
+        """method : méthode werkzeug (ex. 'scrypt:65536:8:1'), défaut de werkzeug sinon"""
+        self.password_hash = generate_password_hash(password, method) if method else generate_password_hash(password)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
 # Initialiser les données par défaut
 def init_db():
-    """Créer les tables et données par défaut"""
+    """Créer les tables et données par défaut
+    
+    Une seule lecture si la base porte déjà l'empreinte du schéma courant (cas de
+    chaque redémarrage) ; retourne True si la base a été créée ou migrée.
+    """
+    from .migrations import migrate, read_stamp, schema_fingerprint, write_stamp
+    fingerprint = schema_fingerprint()
+    if read_stamp() == fingerprint:
+        return False
+    
     db.create_all()
     
+    # create_all ne touche pas aux tables existantes : migrations du schéma
+    migrate()
+    
     # Créer admin par défaut (une seule fois)
     if not AdminUser.query.filter_by(username='admin').first():
         admin = AdminUser(username='admin')
@@ -78,4 +209,7 @@ def init_db():
             MenuItem(name='Tiramisu', description='Dessert italien classique', price=7.50, category_id=category2.id, available=True, order=1)
         ]
         db.session.add_all(items)
-        db.session.commit()
\ No newline at end of file
+        db.session.commit()
+    
+    write_stamp(fingerprint)
+    return True
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""
+File de tâches locale (outbox) : ticket cuisine, notifications...
+Les tâches sont écrites dans outbox_job dans la même transaction que la
+commande : rien n'est perdu si le processus s'arrête, et la commande du
+client ne dépend jamais de la disponibilité de l'imprimante ou du webhook.
+Un pool de threads vide la file, avec reprises et délai exponentiel.
+"""
+
+import json
+import logging
+import random
+import socket
+import threading
+import uuid
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from .database import db
+from .models import OutboxJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'workers': 1,
+    'poll_interval': 5.0,  # secondes, si aucun wake() n'arrive
+    'batch_size': 10,
+    'max_attempts': 8,
+    'base_delay': 2.0,     # secondes, doublé à chaque échec
+    'max_delay': 300.0,
+    'lease': 60.0,         # une tâche « running » plus vieille est reprise
+    'kitchen_printer': None,  # "hôte:port"
+    'ticket_timezone': None,  # ex. "Europe/Paris" ; None : fuseau du serveur
+    'webhook_url': None,
+}
+
+
+# ============================================
+# GESTIONNAIRES
+# ============================================
+
+# type de tâche -> callable(payload) ; une exception déclenche une reprise
+handlers = {}
+
+
+def register(kind, handler):
+    handlers[kind] = handler
+
+
+def local_time(utc_iso, tz_name=None):
+    """HH:MM d'un datetime UTC naïf (created_at) dans le fuseau tz_name, ou celui du serveur"""
+    moment = datetime.fromisoformat(utc_iso).replace(tzinfo=timezone.utc)
+    return moment.astimezone(ZoneInfo(tz_name) if tz_name else None).strftime('%H:%M')
+
+
+def format_ticket(payload, tz_name=None):
+    """Ticket cuisine en texte brut (une imprimante ESC/POS l'accepte tel quel)"""
+    lines = [
+        f"COMMANDE #{payload['order_id']}",
+        f"Table {payload['table_number']}",
+        local_time(payload['created_at'], tz_name),
+        '-' * 32,
+    ]
+    lines += [f"{item['quantity']:>3} x {item['name']}" for item in payload['items']]
+    lines += ['-' * 32, '', '']
+    return '\n'.join(lines)
+
+
+class SocketPrinter:
+    """Imprimante réseau brute (port 9100) : le ticket est envoyé sur une connexion TCP"""
+
+    def __init__(self, address, timeout=5, tz_name=None):
+        host, port = address.rsplit(':', 1)
+        self.host, self.port, self.timeout = host, int(port), timeout
+        self.tz_name = tz_name
+
+    def __call__(self, payload):
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as conn:
+            conn.sendall(format_ticket(payload, self.tz_name).encode('utf-8'))
+
+
+class Webhook:
+    """POST JSON vers une URL ; tout statut HTTP d'erreur est retenté"""
+
+    def __init__(self, url, timeout=5):
+        self.url, self.timeout = url, timeout
+
+    def __call__(self, payload):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def configure_handlers(options):
+    """Enregistrer les gestionnaires configurés ; retourne les types de tâches actifs"""
+    if options['kitchen_printer']:
+        register('kitchen_ticket', SocketPrinter(options['kitchen_printer'], tz_name=options['ticket_timezone']))
+    if options['webhook_url']:
+        register('order_webhook', Webhook(options['webhook_url']))
+    return list(handlers)
+
+
+# ============================================
+# FILE
+# ============================================
+
+def enqueue(kind, payload, delay=0):
+    """Ajouter une tâche à la session courante (validée avec la transaction appelante)"""
+    now = datetime.utcnow()
+    db.session.add(OutboxJob(
+        kind=kind,
+        payload=json.dumps(payload, ensure_ascii=False),
+        available_at=now + timedelta(seconds=delay),
+        created_at=now
+    ))
+
+
+def enqueue_order(order, lines, names):
+    """Tâches déclenchées par une nouvelle commande (aucune si aucun gestionnaire)"""
+    if not handlers:
+        return
+    payload = {
+        'order_id': order.id,
+        'table_number': order.table_number,
+        'created_at': (order.created_at or datetime.utcnow()).isoformat(),
+        'total': order.total,
+        'items': [{'name': names.get(line.menu_item_id, ''), 'quantity': line.quantity}
+                  for line in lines],
+    }
+    for kind in handlers:
+        enqueue(kind, payload)
+
+
+def retry_delay(attempts, options):
+    """Délai exponentiel avec gigue : base * 2^(n-1), borné, ±20 %"""
+    delay = min(options['max_delay'], options['base_delay'] * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(token, options):
+    """Réserver un lot de tâches dues pour ce worker (une seule instruction UPDATE)"""
+    now = datetime.utcnow()
+    due = db.select(OutboxJob.id).where(db.or_(
+        db.and_(OutboxJob.status == 'pending', OutboxJob.available_at <= now),
+        db.and_(OutboxJob.status == 'running', OutboxJob.locked_until < now)
+    )).order_by(OutboxJob.id).limit(options['batch_size'])
+    db.session.execute(db.update(OutboxJob).where(OutboxJob.id.in_(due)).values(
+        status='running', locked_by=token,
+        locked_until=now + timedelta(seconds=options['lease'])
+    ))
+    db.session.commit()
+    return OutboxJob.query.filter_by(status='running', locked_by=token).order_by(OutboxJob.id).all()
+
+
+def run_job(job, options):
+    """Exécuter une tâche réservée et enregistrer le résultat ; retourne True si réussie"""
+    handler = handlers.get(job.kind)
+    job.attempts += 1
+    try:
+        if handler is None:
+            raise LookupError(f'Aucun gestionnaire pour {job.kind}')
+        handler(json.loads(job.payload))
+    except Exception as e:
+        job.last_error = f'{type(e).__name__}: {e}'[:500]
+        if job.attempts >= options['max_attempts']:
+            job.status = 'failed'
+            logger.error('Tâche %s (%s) abandonnée après %d essais : %s',
+                         job.id, job.kind, job.attempts, job.last_error)
+        else:
+            job.status = 'pending'
+            job.available_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts, options))
+        ok = False
+    else:
+        job.status = 'done'
+        job.done_at = datetime.utcnow()
+        ok = True
+    job.locked_by = None
+    job.locked_until = None
+    db.session.commit()
+    return ok
+
+
+def run_once(options, token=None):
+    """Traiter un lot de tâches dues ; retourne le nombre de tâches traitées"""
+    jobs = claim(token or uuid.uuid4().hex, options)
+    for job in jobs:
+        run_job(job, options)
+    return len(jobs)
+
+
+def purge(older_than=timedelta(days=7)):
+    """Supprimer les tâches terminées anciennes ; retourne le nombre supprimé"""
+    deleted = OutboxJob.query.filter(
+        OutboxJob.status == 'done', OutboxJob.done_at < datetime.utcnow() - older_than
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+# ============================================
+# POOL DE WORKERS
+# ============================================
+
+class WorkerPool:
+    """Threads qui vident la file ; wake() après un commit évite d'attendre le prochain tour
+
+    Démarrés à la première requête de chaque processus (voir ensure_started) :
+    les tâches laissées par un redémarrage et les reprises en attente sont
+    traitées sans attendre une nouvelle commande.
+    """
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self, app, options):
+        """Démarrer les threads s'ils ne tournent pas (après un fork, ils ont disparu)"""
+        with self._lock:
+            if self.running or options['workers'] < 1:
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._loop, args=(app, options),
+                                 name=f'outbox-{n}', daemon=True)
+                for n in range(options['workers'])
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def ensure_started(self, app, options):
+        """Démarrer le pool s'il ne tourne pas ; un simple test une fois démarré"""
+        if not self.running:
+            self.start(app, options)
+
+    def wake(self, app=None, options=None):
+        """Signaler de nouvelles tâches ; démarre le pool au premier appel si app est donnée"""
+        if app is not None and not self.running:
+            self.start(app, options)
+        self._wakeup.set()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _loop(self, app, options):
+        token = uuid.uuid4().hex
+        while not self._stopping.is_set():
+            try:
+                with app.app_context():
+                    processed = run_once(options, token)
+            except Exception:
+                logger.exception('Erreur du worker outbox')
+                processed = 0
+            if not processed:
+                self._wakeup.wait(options['poll_interval'])
+                self._wakeup.clear()
+
+
+workers = WorkerPool()
+
+
+def options_for(app):
+    """Réglages de app.config['OUTBOX'] complétés par DEFAULTS"""
+    return {**DEFAULTS, **(app.config.get('OUTBOX') or {})}
@@ -0,0 +1,273 @@
+"""
+Instrumentation des requêtes du blueprint (désactivée par défaut)
+Durée par requête, nombre et durée des requêtes SQL, requêtes lentes,
+motifs N+1, en-tête Server-Timing et profil cProfile échantillonné.
+Les histogrammes par route sont exposés au format texte Prometheus.
+"""
+
+import contextvars
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'enabled': False,
+    'slow_query_ms': 100,
+    # Même requête SQL exécutée au moins N fois dans une requête HTTP
+    'n_plus_one_threshold': 10,
+    # Fraction des requêtes profilées ; le profil n'est gardé qu'au-delà du seuil
+    'profile_sample_rate': 0.0,
+    'profile_threshold_ms': 500,
+    'profile_dir': None,
+}
+
+# Bornes (secondes) des histogrammes de durée
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bornes des histogrammes du nombre de requêtes SQL
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+# Mesures de la requête HTTP en cours (None hors instrumentation)
+_current = contextvars.ContextVar('restaurant_request_stats', default=None)
+
+
+class RequestStats:
+    """Compteurs SQL d'une requête HTTP"""
+
+    __slots__ = ('start', 'queries', 'db_time', 'slow_queries', 'statements', 'profiler')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slow_queries = 0
+        self.statements = Counter()
+        self.profiler = None
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (compteurs Prometheus)"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # dernière case : +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Métriques par route, mises à jour en O(1) à la fin de chaque requête"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # (route, méthode) -> dict de métriques
+        self._statuses = Counter()  # (route, méthode, statut) -> nombre
+
+    def observe(self, route, method, status, duration, stats, n_plus_one=False):
+        key = (route, method)
+        with self._lock:
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = {
+                    'duration': Histogram(DURATION_BUCKETS),
+                    'queries': Histogram(QUERY_BUCKETS),
+                    'db_seconds': 0.0,
+                    'slow_queries': 0,
+                    'n_plus_one': 0,
+                }
+            metrics['duration'].observe(duration)
+            metrics['queries'].observe(stats.queries)
+            metrics['db_seconds'] += stats.db_time
+            metrics['slow_queries'] += stats.slow_queries
+            metrics['n_plus_one'] += bool(n_plus_one)
+            self._statuses[(route, method, status)] += 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._statuses.clear()
+
+    def render(self):
+        """Exposition au format texte Prometheus 0.0.4"""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            statuses = sorted(self._statuses.items())
+
+            lines = [
+                '# HELP restaurant_requests_total Requêtes HTTP traitées',
+                '# TYPE restaurant_requests_total counter',
+            ]
+            for (route, method, status), count in statuses:
+                lines.append(f'restaurant_requests_total{{{_labels(route, method)},status="{status}"}} {count}')
+
+            _render_histograms(lines, routes, 'duration', 'restaurant_request_duration_seconds',
+                               'Durée des requêtes HTTP')
+            _render_histograms(lines, routes, 'queries', 'restaurant_db_queries_per_request',
+                               'Requêtes SQL par requête HTTP')
+
+            for name, key, help_text in (
+                ('restaurant_db_duration_seconds_total', 'db_seconds', 'Temps passé en SQL'),
+                ('restaurant_db_slow_queries_total', 'slow_queries', 'Requêtes SQL lentes'),
+                ('restaurant_n_plus_one_total', 'n_plus_one', 'Requêtes HTTP avec un motif N+1'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (route, method), metrics in routes:
+                    lines.append(f'{name}{{{_labels(route, method)}}} {_number(metrics[key])}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(route, method):
+    return f'route="{_escape(route)}",method="{method}"'
+
+
+def _number(value):
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def _render_histograms(lines, routes, key, name, help_text):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (route, method), metrics in routes:
+        histogram = metrics[key]
+        labels = _labels(route, method)
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{labels}}} {_number(histogram.sum)}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+
+metrics = MetricsRegistry()
+
+
+# ============================================
+# ÉVÉNEMENTS SQLALCHEMY
+# ============================================
+
+_listening = False
+_listen_lock = threading.Lock()
+_slow_query_seconds = DEFAULTS['slow_query_ms'] / 1000
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('restaurant_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get('restaurant_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats.queries += 1
+    stats.db_time += elapsed
+    stats.statements[statement] += 1
+    if elapsed >= _slow_query_seconds:
+        stats.slow_queries += 1
+        logger.warning('Requête SQL lente (%.1f ms) : %s', elapsed * 1000, statement)
+
+
+def install(options):
+    """Écouter les requêtes SQL de tous les moteurs (une seule fois par processus)"""
+    global _listening, _slow_query_seconds
+    _slow_query_seconds = options['slow_query_ms'] / 1000
+    with _listen_lock:
+        if not _listening:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _listening = True
+    if options['profile_sample_rate'] and options['profile_dir']:
+        os.makedirs(options['profile_dir'], exist_ok=True)
+
+
+def options_for(app):
+    """Réglages de app.config['RESTAURANT_PROFILING'] complétés par DEFAULTS"""
+    return {**DEFAULTS, **(app.config.get('RESTAURANT_PROFILING') or {})}
+
+
+# ============================================
+# CYCLE DE VIE D'UNE REQUÊTE
+# ============================================
+
+def start_request(options):
+    stats = RequestStats()
+    if options['profile_sample_rate'] and random.random() < options['profile_sample_rate']:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            stats.profiler = profiler
+        except ValueError:
+            pass  # un autre profileur est déjà actif
+    _current.set(stats)
+
+
+def finish_request(response, request, options):
+    """Enregistrer les métriques et ajouter Server-Timing ; retourne la réponse"""
+    stats = _current.get()
+    _current.set(None)
+    if stats is None:
+        return response
+    duration = time.perf_counter() - stats.start
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    repeated = [(sql, count) for sql, count in stats.statements.items()
+                if count >= options['n_plus_one_threshold']]
+    metrics.observe(route, request.method, response.status_code, duration, stats, bool(repeated))
+    for sql, count in repeated:
+        logger.warning('N+1 probable sur %s %s : %d × %s', request.method, route, count, sql)
+
+    if stats.profiler is not None:
+        stats.profiler.disable()
+        if duration * 1000 >= options['profile_threshold_ms']:
+            _dump_profile(stats.profiler, route, options['profile_dir'])
+
+    response.headers.add('Server-Timing', f'app;dur={(duration - stats.db_time) * 1000:.1f}')
+    response.headers.add('Server-Timing', f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"')
+    return response
+
+
+def _dump_profile(profiler, route, profile_dir):
+    if not profile_dir:
+        return
+    name = route.strip('/').replace('/', '_').replace('<', '').replace('>', '').replace(':', '-') or 'root'
+    path = os.path.join(profile_dir, f'{name}-{int(time.time() * 1000)}.prof')
+    try:
+        profiler.dump_stats(path)
+    except OSError:
+        logger.exception('Impossible d\'écrire le profil %s', path)
+    else:
+        logger.info('Profil enregistré : %s', path)
+
+
+def abandon_request():
+    """Requête terminée sans passer par finish_request (exception non gérée)"""
+    stats = _current.get()
+    _current.set(None)
+    if stats is not None and stats.profiler is not None:
+        stats.profiler.disable()
@@ -0,0 +1,150 @@
+"""
+Cumuls de ventes (DailySales / DailyItemSales) et rapports de CA
+Les cumuls sont tenus à jour dans la même transaction que les commandes :
+un rapport coûte une lecture de quelques lignes, pas un parcours complet.
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy.dialects.sqlite import insert
+
+from .database import db
+from .models import Order, OrderItem, MenuItem, DailySales, DailyItemSales, ArchivedOrder, ArchivedOrderItem
+
+
+def upsert_counters(model, keys, rows):
+    """Ajouter les compteurs de chaque ligne à la ligne de même clé (créée si besoin)"""
+    table = model.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={name: table.c[name] + stmt.excluded[name] for name in rows[0] if name not in keys}
+    )
+    db.session.execute(stmt, rows)
+
+
+def record_order(order, lines, sign=1):
+    """Reporter une commande dans les cumuls (sign=-1 pour l'annuler)
+
+    lines : objets ayant menu_item_id, quantity et unit_price.
+    À appeler avant le commit de la commande.
+    """
+    day = order.created_at.date()
+    upsert_counters(DailySales, ['day'], [{
+        'day': day,
+        'orders_count': sign,
+        'revenue': sign * float(order.total or 0)
+    }])
+
+    per_item = {}
+    for line in lines:
+        row = per_item.setdefault(line.menu_item_id, {
+            'day': day, 'menu_item_id': line.menu_item_id, 'quantity': 0, 'revenue': 0.0
+        })
+        row['quantity'] += sign * line.quantity
+        row['revenue'] += sign * line.quantity * float(line.unit_price or 0)
+    if per_item:
+        upsert_counters(DailyItemSales, ['day', 'menu_item_id'], list(per_item.values()))
+
+
+def record_status_change(order, old_status, new_status):
+    """Retirer des cumuls une commande annulée (ou la réintégrer)"""
+    if old_status != 'cancelled' and new_status == 'cancelled':
+        record_order(order, order.items, sign=-1)
+    elif old_status == 'cancelled' and new_status != 'cancelled':
+        record_order(order, order.items)
+
+
+def _sales_by_day(order_model, item_model):
+    order_day = db.func.date(order_model.created_at)
+    days = db.session.query(
+        order_day, db.func.count(order_model.id), db.func.sum(order_model.total)
+    ).filter(order_model.status != 'cancelled').group_by(order_day).all()
+
+    item_days = db.session.query(
+        order_day, item_model.menu_item_id,
+        db.func.sum(item_model.quantity),
+        db.func.sum(item_model.quantity * item_model.unit_price)
+    ).join(order_model, item_model.order_id == order_model.id).filter(
+        order_model.status != 'cancelled'
+    ).group_by(order_day, item_model.menu_item_id).all()
+    return days, item_days
+
+
+def backfill_sales():
+    """Reconstruire les cumuls depuis les commandes (et l'archive) ; retourne le nombre de jours"""
+    days, item_days = {}, {}
+    for order_model, item_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+        order_rows, item_rows = _sales_by_day(order_model, item_model)
+        for day, count, revenue in order_rows:
+            totals = days.setdefault(day, [0, 0.0])
+            totals[0] += count
+            totals[1] += float(revenue or 0)
+        for day, item_id, quantity, revenue in item_rows:
+            totals = item_days.setdefault((day, item_id), [0, 0.0])
+            totals[0] += quantity or 0
+            totals[1] += float(revenue or 0)
+
+    DailyItemSales.query.delete()
+    DailySales.query.delete()
+    db.session.add_all([
+        DailySales(day=date.fromisoformat(day), orders_count=count, revenue=revenue)
+        for day, (count, revenue) in days.items()
+    ])
+    db.session.add_all([
+        DailyItemSales(day=date.fromisoformat(day), menu_item_id=item_id, quantity=quantity, revenue=revenue)
+        for (day, item_id), (quantity, revenue) in item_days.items()
+    ])
+    db.session.commit()
+    return len(days)
+
+
+def _period_start(day, period):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def sales_report(start, end, period='day', top=10):
+    """CA par jour / semaine / mois entre start et end (inclus) et meilleurs items"""
+    rows = DailySales.query.filter(
+        DailySales.day >= start, DailySales.day <= end
+    ).order_by(DailySales.day).all()
+
+    buckets = {}
+    for row in rows:
+        key = _period_start(row.day, period)
+        bucket = buckets.setdefault(key, {'period': key.isoformat(), 'orders': 0, 'revenue': 0.0})
+        bucket['orders'] += row.orders_count
+        bucket['revenue'] += row.revenue
+
+    quantity = db.func.sum(DailyItemSales.quantity)
+    top_items = db.session.query(
+        DailyItemSales.menu_item_id, quantity, db.func.sum(DailyItemSales.revenue)
+    ).filter(
+        DailyItemSales.day >= start, DailyItemSales.day <= end
+    ).group_by(DailyItemSales.menu_item_id).having(quantity > 0).order_by(quantity.desc()).limit(top).all()
+
+    names = dict(db.session.query(MenuItem.id, MenuItem.name).filter(
+        MenuItem.id.in_([item_id for item_id, _, _ in top_items])
+    ).all())
+
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'period': period,
+        'series': [
+            {**bucket, 'revenue': round(bucket['revenue'], 2)}
+            for bucket in buckets.values()
+        ],
+        'total_orders': sum(row.orders_count for row in rows),
+        'total_revenue': round(sum(row.revenue for row in rows), 2),
+        'top_items': [{
+            'menu_item_id': item_id,
+            'name': names.get(item_id, 'Item supprimé'),
+            'quantity': qty or 0,
+            'revenue': round(float(revenue or 0), 2)
+        } for item_id, qty, revenue in top_items]
+    }
@@ -0,0 +1,103 @@
+"""
+Couche de réponse du blueprint : JSON compact et compression gzip / brotli
+Les corps associés à un ETag (menu, assets) sont compressés une seule fois.
+Le cache est indexé par l'empreinte du corps : un ETag qui ne dérive pas du
+contenu (version du panier) ne peut pas resservir un corps périmé.
+"""
+
+import gzip
+import hashlib
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import brotli
+except ImportError:  # brotli optionnel : gzip seul
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # orjson optionnel : json de la bibliothèque standard
+    orjson = None
+
+from .cache import LRUCache
+
+# En dessous, les en-têtes coûtent plus que le gain
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'text/javascript',
+    'text/css', 'text/html', 'text/plain', 'text/csv', 'image/svg+xml',
+}
+
+# Corps compressés des réponses avec ETag : (empreinte du corps, encodage) -> bytes
+compressed_bodies = LRUCache(maxsize=256)
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """JSON sans espaces ni tri des clés, UTF-8 brut, orjson si disponible"""
+
+    sort_keys = False
+    ensure_ascii = False
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and kwargs.get('indent') is None:
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+            except TypeError:
+                pass  # type non géré par orjson : repli sur json
+        kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+
+
+def install_json_provider(app):
+    """Remplacer le fournisseur JSON par défaut de l'application (pas un fournisseur personnalisé)"""
+    if type(app.json) is DefaultJSONProvider:
+        app.json = CompactJSONProvider(app)
+
+
+def available_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def _compress(data, encoding, cacheable):
+    # Corps réutilisé (ETag) : compression maximale, payée une seule fois
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if cacheable else 5)
+    return gzip.compress(data, compresslevel=9 if cacheable else 6)
+
+
+def compress_response(response, request):
+    """Compresser la réponse selon Accept-Encoding si elle s'y prête"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if etag:
+        key = (hashlib.sha1(data).digest(), encoding)
+        body = compressed_bodies.get(key)
+        if body is None:
+            body = _compress(data, encoding, cacheable=True)
+            compressed_bodies.put(key, body)
+        # Même contenu, autre encodage : l'ETag ne peut rester fort
+        if not weak:
+            response.set_etag(etag, weak=True)
+    else:
+        body = _compress(data, encoding, cacheable=False)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
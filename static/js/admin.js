@@ -221,6 +221,24 @@ document.getElementById('item-form')?.addEventListener('submit', async (e) => {
     }
     
     try {
+        // Uploader l'image d'abord (le serveur en produit les variantes)
+        const imageFile = document.getElementById('item-image')?.files[0];
+        if (imageFile) {
+            const formData = new FormData();
+            formData.append('file', imageFile);
+            const upload = await fetch('/restaurant/api/admin/upload', {
+                method: 'POST',
+                credentials: 'include',
+                body: formData
+            });
+            const uploadResult = await upload.json();
+            if (!upload.ok) {
+                alert('Erreur image: ' + (uploadResult.error || 'Inconnue'));
+                return;
+            }
+            data.image_url = uploadResult.image_url;
+        }
+        
         const editId = document.getElementById('item-form').dataset.editId;
         const url = editId 
             ? `/restaurant/api/admin/items/${editId}`
@@ -292,6 +310,48 @@ function resetItemForm() {
     }
 }
 
+// ============================================
+// IMPORT / EXPORT DU MENU
+// ============================================
+
+async function importMenu() {
+    const file = document.getElementById('menu-import-file')?.files[0];
+    if (!file) {
+        alert('Choisissez un fichier CSV ou NDJSON');
+        return;
+    }
+    
+    const isCsv = file.name.toLowerCase().endsWith('.csv');
+    const report = document.getElementById('menu-import-report');
+    report.textContent = '⏳ Import en cours...';
+    
+    try {
+        // Le fichier est envoyé tel quel : un seul appel pour tout le menu
+        const response = await fetch(`/restaurant/api/admin/menu/import?format=${isCsv ? 'csv' : 'ndjson'}`, {
+            method: 'POST',
+            headers: { 'Content-Type': isCsv ? 'text/csv' : 'application/x-ndjson' },
+            credentials: 'include',
+            body: file
+        });
+        const result = await response.json();
+        if (!response.ok) {
+            report.textContent = '❌ ' + (result.error || 'Erreur inconnue');
+            return;
+        }
+        
+        const errors = result.errors.map(e => `<li>Ligne ${e.line} : ${escapeHtml(e.error)}</li>`).join('');
+        report.innerHTML = `
+            ✅ ${result.created} créé(s), ${result.updated} modifié(s), ${result.categories_created} catégorie(s) créée(s)
+            ${result.failed ? `<br>⚠️ ${result.failed} ligne(s) rejetée(s)<ul>${errors}</ul>` : ''}
+        `;
+        loadCategories();
+        loadItems();
+    } catch (error) {
+        console.error('Erreur import:', error);
+        report.textContent = '❌ Erreur serveur';
+    }
+}
+
 // ============================================
 // GESTION DES ONGLETS
 // ============================================
@@ -1,6 +1,8 @@
 class RestaurantClient {
     constructor() {
+        // Panier partagé de la table, tenu par le serveur (voir carts.py)
         this.cart = [];
+        this.cartVersion = 0;
         this.menu = [];
         this.tableNumber = localStorage.getItem('table_number') || '';
         this.init();
@@ -11,8 +13,64 @@ class RestaurantClient {
         document.getElementById('table-number').addEventListener('change', (e) => {
             this.tableNumber = e.target.value;
             localStorage.setItem('table_number', this.tableNumber);
+            this.setCart({ items: [], version: 0 });
+            this.refreshCart();
         });
         this.loadMenu();
+        this.refreshCart();
+        // Les ajouts des autres appareils de la table ; 304 tant que rien ne change
+        setInterval(() => this.refreshCart(), CART_POLL_INTERVAL);
+    }
+
+    cartUrl(path = '') {
+        return `/restaurant/api/client/cart/${encodeURIComponent(this.tableNumber.trim())}${path}`;
+    }
+
+    async refreshCart() {
+        if (!this.tableNumber.trim() || document.hidden) return;
+        try {
+            const response = await fetch(this.cartUrl(), {
+                headers: { 'If-None-Match': `"cart-${this.cartVersion}"` }
+            });
+            if (response.status === 200) this.setCart(await response.json());
+        } catch (error) {
+            console.error('Erreur:', error);
+        }
+    }
+
+    setCart(cart) {
+        this.cart = cart.items;
+        this.cartVersion = cart.version;
+        this.updateCart();
+    }
+
+    async cartRequest(method, path, body, conflictMessage) {
+        try {
+            const response = await fetch(this.cartUrl(path), {
+                method,
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(body)
+            });
+            const result = await response.json();
+            if (response.ok) {
+                this.setCart(result);
+            } else if (response.status === 409) {
+                this.setCart(result.cart);
+                alert(conflictMessage);
+            } else {
+                alert('Erreur: ' + (result.error || 'Inconnue'));
+            }
+        } catch (error) {
+            console.error('Erreur:', error);
+            alert('Erreur de connexion, réessayez.');
+        }
+    }
+
+    requireTable() {
+        if (this.tableNumber.trim()) return true;
+        alert('Numéro de table requis.');
+        document.getElementById('table-number').focus();
+        return false;
     }
 
     async loadMenu() {
@@ -52,6 +110,7 @@ class RestaurantClient {
         const unavailableClass = !item.available ? 'menu-item-unavailable' : '';
         return `
             <div class="menu-item ${unavailableClass}" onclick="${item.available ? `addToCart(${item.id})` : ''}">
+                ${this.renderMenuItemImage(item)}
                 <div class="menu-item-info">
                     <div class="menu-item-name">${item.name}</div>
                     <div class="menu-item-description">${item.description || ''}</div>
@@ -61,13 +120,25 @@ class RestaurantClient {
         `;
     }
 
+    renderMenuItemImage(item) {
+        if (!item.image_url) return '';
+        const srcset = item.image_srcset || {};
+        // Le navigateur choisit le premier format supporté et la largeur adaptée à l'écran
+        const sources = ['avif', 'webp', 'jpeg']
+            .filter(fmt => srcset[fmt])
+            .map(fmt => `<source type="image/${fmt}" srcset="${srcset[fmt]}" sizes="${MENU_IMAGE_SIZES}">`)
+            .join('');
+        return `
+            <picture class="menu-item-image">
+                ${sources}
+                <img src="${item.image_url}" alt="" loading="lazy" decoding="async">
+            </picture>
+        `;
+    }
+
     addToCart(itemId) {
-        const item = this.findItemById(itemId);
-        if (!item) return;
-        const existing = this.cart.find(i => i.id === itemId);
-        if (existing) existing.quantity++;
-        else this.cart.push({...item, quantity: 1});
-        this.updateCart();
+        if (!this.findItemById(itemId) || !this.requireTable()) return;
+        this.cartRequest('POST', '/items', { id: itemId, delta: 1 });
     }
 
     findItemById(id) {
@@ -79,6 +150,7 @@ class RestaurantClient {
     }
 
     updateCart() {
+        this.orderKey = null;
         document.getElementById('cart-count').textContent = this.cart.reduce((s, i) => s + i.quantity, 0);
         const total = this.cart.reduce((s, i) => s + (i.price * i.quantity), 0);
         document.getElementById('cart-total').textContent = `${total.toFixed(2)}€`;
@@ -111,51 +183,51 @@ class RestaurantClient {
         `).join('');
     }
 
+    // +/- sont relatifs : deux convives qui ajoutent en même temps sont tous deux comptés
     decreaseQuantity(itemId) {
-        const item = this.cart.find(i => i.id === itemId);
-        if (item) {
-            if (item.quantity > 1) item.quantity--;
-            else this.cart = this.cart.filter(i => i.id !== itemId);
-            this.updateCart();
-        }
+        this.cartRequest('POST', '/items', { id: itemId, delta: -1 });
     }
 
     increaseQuantity(itemId) {
-        const item = this.cart.find(i => i.id === itemId);
-        if (item) { item.quantity++; this.updateCart(); }
+        this.cartRequest('POST', '/items', { id: itemId, delta: 1 });
     }
 
     removeFromCart(itemId) {
-        this.cart = this.cart.filter(i => i.id !== itemId);
-        this.updateCart();
+        const item = this.cart.find(i => i.id === itemId);
+        if (!item) return;
+        // Refusé si un autre appareil a modifié la ligne depuis qu'elle est affichée
+        this.cartRequest('PUT', `/items/${itemId}`, { quantity: 0, version: item.version },
+            'Cette ligne vient d\'être modifiée par un autre appareil : panier mis à jour.');
     }
 
     async checkout() {
-        if (!this.tableNumber.trim()) { alert('Numéro de table requis.'); return; }
+        if (!this.requireTable()) return;
         if (this.cart.length === 0) { alert('Panier vide.'); return; }
 
-        const data = {
-            table_number: this.tableNumber,
-            total: this.cart.reduce((s, i) => s + (i.price * i.quantity), 0),
-            items: this.cart.map(i => ({ id: i.id, quantity: i.quantity, price: i.price }))
-        };
+        // Tout le panier de la table, tel qu'affiché (version) : une seule commande
+        const data = { version: this.cartVersion };
+
+        // Même clé pour tous les renvois de ce panier : le serveur ne crée qu'une commande
+        if (!this.orderKey) this.orderKey = newIdempotencyKey();
 
         try {
-            const response = await fetch('/restaurant/api/client/order', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(data)
-            });
+            const response = await this.postOrder(this.cartUrl('/checkout'), data, this.orderKey);
             const result = await response.json();
-            if (result.success) {
+            if (response.status === 409) {
+                this.setCart(result.cart);
+                alert('Le panier a été modifié par un autre appareil. Vérifiez-le puis commandez à nouveau.');
+            } else if (result.success) {
                 document.getElementById('order-number').textContent = result.order_id;
                 document.getElementById('order-table').textContent = this.tableNumber;
-                document.getElementById('order-total').textContent = `${data.total.toFixed(2)}€`;
+                document.getElementById('order-total').textContent = `${result.total.toFixed(2)}€`;
+                // Estimation du serveur : plats commandés et file de la cuisine
+                document.getElementById('order-eta').textContent = result.eta_minutes;
+                document.getElementById('order-eta-line').classList.toggle('hidden', !result.eta_minutes);
                 document.getElementById('order-modal').classList.add('visible');
-                this.cart = [];
-                this.updateCart();
+                this.setCart({ items: [], version: 0 });
             } else {
                 alert('Erreur: ' + (result.error || 'Inconnue'));
+                this.refreshCart();
             }
         } catch (error) {
             console.error('Erreur:', error);
@@ -163,11 +235,36 @@ class RestaurantClient {
         }
     }
 
+    async postOrder(url, data, key, attempts = 3) {
+        for (let attempt = 1; ; attempt++) {
+            try {
+                return await fetch(url, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json', 'Idempotency-Key': key },
+                    body: JSON.stringify(data)
+                });
+            } catch (error) {
+                if (attempt >= attempts) throw error;
+                await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+            }
+        }
+    }
+
     closeOrderModal() {
         document.getElementById('order-modal').classList.remove('visible');
     }
 }
 
+// Largeur d'affichage des photos du menu (voir client.css), pour le choix de variante
+const MENU_IMAGE_SIZES = '(max-width: 600px) 100vw, 96px';
+// Intervalle de rafraîchissement du panier partagé (ms)
+const CART_POLL_INTERVAL = 5000;
+
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
 let app;
 function addToCart(id) { app.addToCart(id); }
 function decreaseQuantity(id) { app.decreaseQuantity(id); }
@@ -0,0 +1,64 @@
+"""
+Agrégats des commandes pour le dashboard et /api/admin/orders/stats
+Une seule requête groupée par statut, avec des bornes de date indexables.
+"""
+
+from datetime import datetime, timedelta
+
+from .database import db
+from .models import Order, ORDER_STATUSES
+from .cache import TTLCache
+
+# Les chiffres peuvent avoir quelques secondes de retard entre workers
+stats_cache = TTLCache(ttl=5)
+
+
+def day_range(day):
+    """Bornes [début, fin[ d'une journée, comparables directement à created_at"""
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def order_stats(query=None, day=None, archived=()):
+    """Compteurs par statut, CA total, commandes et CA du jour en une requête
+    
+    Le CA exclut les commandes annulées. archived : lignes (statut, nombre, CA)
+    de commandes archivées à ajouter (jamais du jour).
+    """
+    if query is None:
+        query = Order.query
+    start, end = day_range(day or datetime.utcnow().date())
+    in_day = db.and_(Order.created_at >= start, Order.created_at < end)
+    
+    rows = query.with_entities(
+        Order.status,
+        db.func.count(Order.id),
+        db.func.sum(Order.total),
+        db.func.sum(db.case((in_day, 1), else_=0)),
+        db.func.sum(db.case((in_day, Order.total), else_=0))
+    ).group_by(Order.status).all()
+    
+    stats = {
+        'total': 0,
+        'by_status': {status: 0 for status in ORDER_STATUSES},
+        'total_revenue': 0.0,
+        'today_orders': 0,
+        'today_revenue': 0.0
+    }
+    for status, count, revenue, today_count, today_revenue in rows:
+        stats['total'] += count
+        stats['by_status'][status] = count
+        stats['today_orders'] += today_count or 0
+        if status != 'cancelled':
+            stats['total_revenue'] += float(revenue or 0)
+            stats['today_revenue'] += float(today_revenue or 0)
+    
+    for status, count, revenue in archived:
+        stats['total'] += count
+        stats['by_status'][status] = stats['by_status'].get(status, 0) + count
+        if status != 'cancelled':
+            stats['total_revenue'] += float(revenue or 0)
+    
+    stats['total_revenue'] = round(stats['total_revenue'], 2)
+    stats['today_revenue'] = round(stats['today_revenue'], 2)
+    return stats
@@ -0,0 +1,126 @@
+"""
+Fixtures des tests : une application Flask par test, avec le blueprint
+restaurant enregistré comme dans app.py, sur une base SQLite temporaire.
+
+Lancer depuis le dossier restaurant/ : python -m pytest -q
+"""
+
+import importlib.util
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_restaurant():
+    # Les modules s'importent en restaurant.* (imports relatifs) : le paquet est
+    # chargé sous ce nom quel que soit le nom du dossier (clone, copie de travail)
+    if 'restaurant' in sys.modules:
+        return
+    spec = importlib.util.spec_from_file_location(
+        'restaurant', os.path.join(ROOT, '__init__.py'), submodule_search_locations=[ROOT]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['restaurant'] = module
+    spec.loader.exec_module(module)
+
+
+_import_restaurant()
+
+from flask import Flask  # noqa: E402
+
+from restaurant import restaurant_bp  # noqa: E402
+from restaurant import idempotency  # noqa: E402
+from restaurant.auth import admin_cache, login_ip_limiter, login_user_limiter  # noqa: E402
+from restaurant.cache import menu_cache  # noqa: E402
+from restaurant.carts import table_carts  # noqa: E402
+from restaurant.config import Config  # noqa: E402
+from restaurant.database import db, configure_sqlite  # noqa: E402
+from restaurant.eta import prep_estimator  # noqa: E402
+from restaurant.models import init_db  # noqa: E402
+from restaurant.stats import stats_cache  # noqa: E402
+
+
+def reset_process_state():
+    """Vider les caches du processus : chaque test a sa propre base"""
+    menu_cache.invalidate()  # recharge aussi l'index des prix
+    stats_cache.clear()
+    admin_cache.invalidate()
+    login_ip_limiter.clear()
+    login_user_limiter.clear()
+    idempotency.recent_responses.clear()
+    table_carts.clear()
+    prep_estimator.reset()
+
+
+@pytest.fixture
+def app(tmp_path):
+    reset_process_state()
+    app = Flask('restaurant_tests')
+    app.config.update(
+        SECRET_KEY='test',
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "restaurant.db"}',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 5, 'check_same_thread': False}},
+        SQLITE_PRAGMAS=Config.SQLITE_PRAGMAS,
+    )
+    db.init_app(app)
+    configure_sqlite(app)
+    app.register_blueprint(restaurant_bp)
+    with app.app_context():
+        init_db()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    """Client avec une session admin (compte créé par init_db)"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_id'] = 1
+        session['admin_username'] = 'admin'
+    return client
+
+
+@pytest.fixture
+def count_selects(app):
+    """with count_selects() as selects: ... ; len(selects) = nombre de SELECT exécutés"""
+    with app.app_context():
+        engine = db.engine
+
+    @contextmanager
+    def counter():
+        selects = []
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                selects.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', on_execute)
+        try:
+            yield selects
+        finally:
+            event.remove(engine, 'before_cursor_execute', on_execute)
+
+    return counter
+
+
+def order(client, table='1', items=((1, 1),), **headers):
+    """Passer une commande via l'API client ; retourne la réponse"""
+    return client.post('/restaurant/api/client/order', headers=headers, json={
+        'table_number': table,
+        'items': [{'id': item_id, 'quantity': quantity} for item_id, quantity in items],
+    })
@@ -0,0 +1,100 @@
+"""Liste admin des commandes : requêtes SQL en nombre constant, pages par curseur, filtres"""
+
+from datetime import datetime
+
+from restaurant.database import db
+from restaurant.models import Order
+
+from conftest import order
+
+ORDERS_URL = '/restaurant/api/admin/orders'
+
+
+def seed_orders(client, count):
+    for n in range(count):
+        response = order(client, table=str(n % 7 + 1), items=((1, 2), (2, 1), (3, 1)))
+        assert response.status_code == 200
+
+
+def selects_for_orders_list(admin_client, count_selects):
+    with count_selects() as selects:
+        response = admin_client.get(ORDERS_URL)
+    assert response.status_code == 200
+    return len(selects), response.get_json()['orders']
+
+
+def test_orders_list_query_count_does_not_grow_with_orders(client, admin_client, count_selects):
+    seed_orders(client, 2)
+    # Premier appel : remplit le cache des comptes admin
+    admin_client.get(ORDERS_URL)
+    few, orders = selects_for_orders_list(admin_client, count_selects)
+    assert len(orders) == 2
+
+    seed_orders(client, 30)
+    many, orders = selects_for_orders_list(admin_client, count_selects)
+    assert len(orders) == 32
+    assert many == few
+
+
+def test_orders_list_includes_lines(client, admin_client):
+    seed_orders(client, 1)
+    lines = admin_client.get(ORDERS_URL).get_json()['orders'][0]['items']
+    assert [(line['name'], line['quantity']) for line in lines] == [
+        ('Pizza Margherita', 2), ('Pâtes Carbonara', 1), ('Tiramisu', 1)
+    ]
+
+
+def stamp_orders(app, created_at):
+    """Même created_at pour toutes les commandes : départage par id"""
+    with app.app_context():
+        Order.query.update({Order.created_at: created_at})
+        db.session.commit()
+
+
+def test_pages_walk_every_order_once(app, client, admin_client):
+    seed_orders(client, 12)
+    stamp_orders(app, datetime(2026, 3, 1, 12, 0))
+    seed_orders(client, 3)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = {'limit': 4, **({'cursor': cursor} if cursor else {})}
+        data = admin_client.get(ORDERS_URL, query_string=query).get_json()
+        assert len(data['orders']) <= 4
+        seen += [placed['id'] for placed in data['orders']]
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert pages == 4
+    # Plus récentes d'abord, puis ids décroissants à created_at égal
+    assert seen == [15, 14, 13] + list(range(12, 0, -1))
+
+
+def test_filters_by_table_status_and_day(app, client, admin_client):
+    seed_orders(client, 7)  # tables 1 à 7
+    with app.app_context():
+        for order_id, created_at in ((1, datetime(2026, 3, 1, 23, 30)), (2, datetime(2026, 3, 2, 0, 30))):
+            db.session.get(Order, order_id).created_at = created_at
+        db.session.get(Order, 3).status = 'preparing'
+        db.session.commit()
+
+    def ids(**query):
+        response = admin_client.get(ORDERS_URL, query_string=query)
+        assert response.status_code == 200
+        return sorted(placed['id'] for placed in response.get_json()['orders'])
+
+    assert ids(table='2') == [2]
+    assert ids(status='preparing') == [3]
+    # Borne de fin « jour » : le jour entier est inclus
+    assert ids(**{'from': '2026-03-01', 'to': '2026-03-01'}) == [1]
+    assert ids(**{'from': '2026-03-01', 'to': '2026-03-02'}) == [1, 2]
+
+
+def test_limit_is_capped_and_bad_parameters_are_rejected(client, admin_client):
+    seed_orders(client, 3)
+    assert len(admin_client.get(ORDERS_URL, query_string={'limit': 0}).get_json()['orders']) == 1
+    assert admin_client.get(ORDERS_URL, query_string={'limit': 'x'}).status_code == 400
+    assert admin_client.get(ORDERS_URL, query_string={'cursor': 'abc'}).status_code == 400
+    assert admin_client.get(ORDERS_URL, query_string={'from': 'hier'}).status_code == 400
@@ -0,0 +1,91 @@
+"""Archivage : les ids des commandes archivées ne sont jamais réutilisés"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateTable
+
+from restaurant.archive import archive_orders
+from restaurant.database import db
+from restaurant.migrations import migrate, schema_version
+from restaurant.models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem
+
+from conftest import order
+
+
+def finish_orders(app, days_ago=200):
+    """Passer toutes les commandes vivantes à livrées, terminées il y a days_ago jours"""
+    with app.app_context():
+        past = datetime.utcnow() - timedelta(days=days_ago)
+        Order.query.update({Order.status: 'delivered', Order.updated_at: past, Order.created_at: past})
+        db.session.commit()
+
+
+def test_new_orders_never_reuse_archived_ids(app, client):
+    ids = [order(client).get_json()['order_id'] for _ in range(3)]
+    finish_orders(app)
+    with app.app_context():
+        assert archive_orders(older_than_days=90) == 3
+
+    new_id = order(client).get_json()['order_id']
+    assert new_id > max(ids)
+
+    finish_orders(app)
+    with app.app_context():
+        assert archive_orders(older_than_days=90) == 1
+        assert ArchivedOrder.query.count() == 4
+
+
+def recreate_without_autoincrement(table):
+    """Table telle que créée avant la migration 5 (ids réutilisables)"""
+    ddl = str(CreateTable(table).compile(dialect=db.engine.dialect)).replace(' AUTOINCREMENT', '')
+    db.session.execute(text(f'DROP TABLE "{table.name}"'))
+    db.session.execute(text(ddl))
+    for index in table.indexes:
+        index.create(bind=db.session.connection())
+
+
+def test_migration_rebuilds_tables_and_renumbers_colliding_orders(app):
+    with app.app_context():
+        for table in (Order.__table__, OrderItem.__table__):
+            recreate_without_autoincrement(table)
+        db.session.execute(text('DELETE FROM sqlite_sequence'))
+        past = datetime.utcnow() - timedelta(days=200)
+        # Commandes 1 et 2 archivées, puis id 1 réutilisé par une commande vivante
+        for order_id in (1, 2):
+            db.session.add(ArchivedOrder(id=order_id, status='delivered', created_at=past, updated_at=past, total=10))
+            db.session.add(ArchivedOrderItem(id=order_id, order_id=order_id, menu_item_id=1, quantity=1, unit_price=10))
+        db.session.add(Order(id=1, table_number='9', status='delivered', created_at=past, updated_at=past, total=12.5))
+        db.session.add(OrderItem(id=1, order_id=1, menu_item_id=1, quantity=1, unit_price=12.5))
+        db.session.execute(text('PRAGMA user_version = 4'))
+        db.session.commit()
+
+        migrate()
+        assert schema_version() >= 5
+        for name in ('order', 'order_item'):
+            ddl = db.session.execute(text("SELECT sql FROM sqlite_master WHERE name = :name"), {'name': name}).scalar()
+            assert 'AUTOINCREMENT' in ddl
+        indexes = {row[1] for row in db.session.execute(text('PRAGMA index_list("order")'))}
+        assert 'ix_order_status_created_at' in indexes
+
+        # La commande vivante a changé d'id avec sa ligne
+        live = Order.query.one()
+        assert live.id == 3
+        assert [(line.id, line.order_id) for line in live.items] == [(3, 3)]
+
+        assert archive_orders(older_than_days=90) == 1
+        assert sorted(order_id for (order_id,) in db.session.query(ArchivedOrder.id)) == [1, 2, 3]
+
+
+def test_migration_keeps_counters_above_archive(app, client):
+    with app.app_context():
+        past = datetime.utcnow() - timedelta(days=200)
+        db.session.add(ArchivedOrder(id=50, status='delivered', created_at=past, updated_at=past, total=1))
+        db.session.add(ArchivedOrderItem(id=80, order_id=50, menu_item_id=1, quantity=1, unit_price=1))
+        db.session.execute(text('PRAGMA user_version = 4'))
+        db.session.commit()
+        migrate()
+
+    assert order(client).get_json()['order_id'] == 51
+    with app.app_context():
+        assert db.session.query(db.func.min(OrderItem.id)).scalar() == 81
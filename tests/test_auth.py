@@ -0,0 +1,96 @@
+"""Connexion admin : limitation des tentatives, comptes désactivés, hash refait"""
+
+from restaurant import auth
+from restaurant.database import db
+from restaurant.models import AdminUser
+
+LOGIN_URL = '/restaurant/admin/login'
+ADMIN_API = '/restaurant/api/admin/orders'
+
+
+def login(client, password='admin123', username='admin'):
+    return client.post(LOGIN_URL, data={'username': username, 'password': password})
+
+
+def password_hash(app):
+    with app.app_context():
+        return db.session.get(AdminUser, 1).password_hash
+
+
+def deactivate(app):
+    with app.app_context():
+        db.session.get(AdminUser, 1).is_active = False
+        db.session.commit()
+
+
+def test_login_is_throttled_after_too_many_attempts(client):
+    for _ in range(auth.login_user_limiter.capacity):
+        assert login(client, 'mauvais').status_code == 401
+
+    response = login(client)
+    assert response.status_code == 429
+    # 5 tentatives par minute : un jeton toutes les 12 s
+    assert 1 <= int(response.headers['Retry-After']) <= 12
+    # Même avec le bon mot de passe : pas de session ouverte
+    assert client.get(ADMIN_API).status_code == 302
+
+
+def test_login_is_throttled_per_address(client):
+    for number in range(auth.login_ip_limiter.capacity):
+        assert login(client, 'mauvais', username=f'inconnu{number}').status_code == 401
+    response = login(client)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_successful_login_resets_user_bucket(client):
+    for _ in range(auth.login_user_limiter.capacity - 1):
+        login(client, 'mauvais')
+    assert login(client).status_code == 302
+    for _ in range(auth.login_user_limiter.capacity - 1):
+        assert login(client, 'mauvais').status_code == 401
+
+
+def test_deactivated_admin_is_logged_out_after_cache_ttl(app, admin_client, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(auth.time, 'monotonic', lambda: clock[0])
+    assert admin_client.get(ADMIN_API).status_code == 200
+
+    # Désactivation faite par un autre worker : le cache de ce processus l'ignore
+    deactivate(app)
+    assert admin_client.get(ADMIN_API).status_code == 200
+
+    clock[0] += auth.admin_cache.ttl
+    response = admin_client.get(ADMIN_API)
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(LOGIN_URL)
+    with admin_client.session_transaction() as session:
+        assert 'admin_id' not in session
+
+
+def test_deactivated_admin_is_logged_out_at_once_after_invalidation(app, admin_client):
+    assert admin_client.get(ADMIN_API).status_code == 200
+    deactivate(app)
+    auth.admin_cache.invalidate(1)
+    assert admin_client.get(ADMIN_API).status_code == 302
+
+
+def test_deactivated_admin_cannot_log_in(app, client):
+    deactivate(app)
+    assert login(client).status_code == 401
+
+
+def test_password_is_rehashed_with_configured_method(app, client):
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    assert not password_hash(app).startswith('pbkdf2:sha256:1000$')
+
+    assert login(client, 'mauvais').status_code == 401
+    assert not password_hash(app).startswith('pbkdf2:sha256:1000$')
+
+    assert login(client).status_code == 302
+    rehashed = password_hash(app)
+    assert rehashed.startswith('pbkdf2:sha256:1000$')
+
+    # Déjà à jour : pas de nouveau hash, et le mot de passe reste valide
+    assert login(app.test_client()).status_code == 302
+    assert password_hash(app) == rehashed
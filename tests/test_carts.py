@@ -0,0 +1,70 @@
+"""Paniers de table : fusion bornée après échec, commandes simultanées de la même clé"""
+
+import threading
+import time
+
+import restaurant
+from restaurant.carts import CartStore, MAX_CART_LINES
+from restaurant.models import Order
+
+CART_URL = '/restaurant/api/client/cart/7'
+
+
+def test_restore_keeps_cart_within_line_limit():
+    store = CartStore()
+    for item_id in range(1, 31):
+        store.add('7', item_id, 1, 100)
+    failed = store.checkout('7', store.get('7')['version'])
+
+    # Pendant la commande, 30 autres plats sont ajoutés par les autres appareils
+    for item_id in range(101, 131):
+        store.add('7', item_id, 1, 100)
+    snapshot = store.restore(failed, 100)
+
+    item_ids = {item_id for item_id, _, _ in snapshot['lines']}
+    assert len(item_ids) == MAX_CART_LINES
+    assert set(range(101, 131)) <= item_ids
+
+
+def test_restore_merges_quantities_of_existing_lines():
+    store = CartStore()
+    store.add('7', 1, 2, 100)
+    failed = store.checkout('7', store.get('7')['version'])
+    store.add('7', 1, 1, 100)
+    snapshot = store.restore(failed, 100)
+    assert [(item_id, quantity) for item_id, quantity, _ in snapshot['lines']] == [(1, 3)]
+
+
+def test_concurrent_checkouts_with_same_key_replay_one_order(app, monkeypatch):
+    client = app.test_client()
+    version = client.post(f'{CART_URL}/items', json={'id': 1, 'delta': 2}).get_json()['version']
+
+    # Commande lente : le second envoi arrive pendant le premier
+    place_order = restaurant.place_order
+
+    def slow_place_order(*args, **kwargs):
+        time.sleep(0.3)
+        return place_order(*args, **kwargs)
+
+    monkeypatch.setattr(restaurant, 'place_order', slow_place_order)
+
+    start = threading.Barrier(2)
+    responses = []
+
+    def checkout():
+        start.wait()
+        response = app.test_client().post(f'{CART_URL}/checkout', json={'version': version},
+                                          headers={'Idempotency-Key': 'same-key'})
+        responses.append(response)
+
+    threads = [threading.Thread(target=checkout) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert sorted(response.status_code for response in responses) == [200, 200]
+    assert len({response.get_json()['order_id'] for response in responses}) == 1
+    assert [response.headers.get('Idempotent-Replayed') for response in responses].count('true') == 1
+    with app.app_context():
+        assert Order.query.count() == 1
@@ -0,0 +1,89 @@
+"""Estimation des délais : file bornée aux commandes récentes, mémoire modifiée après commit"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import restaurant
+from restaurant.database import db
+from restaurant.eta import prep_estimator, ORDER_KEY
+from restaurant.models import Order, ItemPrepStats
+
+from conftest import order
+
+DEFAULT_PREP_SECONDS = 12 * 60
+
+
+@pytest.fixture(autouse=True)
+def eta_options(app, monkeypatch):
+    monkeypatch.setitem(prep_estimator.options, 'checkpoint_interval', 0)
+    monkeypatch.setitem(prep_estimator.options, 'queue_refresh', 0)
+
+
+def queue_depth(app):
+    with app.app_context():
+        return prep_estimator.queue_depth()
+
+
+def set_status(admin_client, order_id, status):
+    return admin_client.put(f'/restaurant/api/admin/orders/{order_id}/status', json={'status': status})
+
+
+def started_minutes_ago(app, order_id, minutes):
+    with app.app_context():
+        db.session.get(Order, order_id).updated_at = datetime.utcnow() - timedelta(minutes=minutes)
+        db.session.commit()
+
+
+def test_abandoned_orders_do_not_inflate_eta(app, client):
+    with app.app_context():
+        old = datetime.utcnow() - timedelta(days=3)
+        db.session.add_all(Order(table_number='1', status=status, created_at=old, updated_at=old, total=10)
+                           for status in ['pending', 'preparing'] * 100)
+        db.session.commit()
+
+    response = order(client).get_json()
+    assert response['eta_minutes'] == 12
+    assert queue_depth(app) == 1
+
+
+def test_recent_queue_adds_to_eta(client):
+    for _ in range(4):
+        order(client)
+    # 4 commandes devant, 2 postes : 2 durées de commande en plus
+    assert order(client).get_json()['eta_minutes'] == 12 + 2 * 12
+
+
+def test_transition_is_learned_after_commit(app, client, admin_client):
+    order_id = order(client).get_json()['order_id']
+    set_status(admin_client, order_id, 'preparing')
+    started_minutes_ago(app, order_id, 6)
+
+    assert set_status(admin_client, order_id, 'ready').status_code == 200
+    with app.app_context():
+        assert prep_estimator.prep_seconds(ORDER_KEY) == pytest.approx(360, abs=2)
+    assert queue_depth(app) == 0
+    with app.app_context():
+        rows = {row.menu_item_id: (round(row.mean_seconds), row.samples) for row in ItemPrepStats.query}
+    assert rows == {ORDER_KEY: (360, 1), 1: (360, 1)}
+
+
+def test_failed_status_change_leaves_estimator_untouched(app, client, admin_client, monkeypatch):
+    order_id = order(client).get_json()['order_id']
+    set_status(admin_client, order_id, 'preparing')
+    started_minutes_ago(app, order_id, 6)
+    monkeypatch.setitem(prep_estimator.options, 'queue_refresh', 3600)
+    depth = queue_depth(app)
+
+    # Échec entre la transition et le commit : la transaction est annulée
+    def broken(order):
+        raise RuntimeError('sérialisation impossible')
+    monkeypatch.setattr(restaurant, 'serialize_order', broken)
+    assert set_status(admin_client, order_id, 'ready').status_code == 500
+
+    with app.app_context():
+        assert prep_estimator.prep_seconds(ORDER_KEY) == DEFAULT_PREP_SECONDS
+    assert queue_depth(app) == depth
+    with app.app_context():
+        assert db.session.get(Order, order_id).status == 'preparing'
+        assert ItemPrepStats.query.count() == 0
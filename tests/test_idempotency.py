@@ -0,0 +1,69 @@
+"""Idempotency-Key : rejeu, corps différent (422), expiration en mémoire et en base"""
+
+from datetime import timedelta
+
+from restaurant import idempotency
+from restaurant.database import db
+from restaurant.models import IdempotencyKey, Order
+
+from conftest import order
+
+
+def order_count(app):
+    with app.app_context():
+        return Order.query.count()
+
+
+def test_same_key_and_body_replays_original_response(app, client):
+    first = order(client, items=((1, 2),), **{'Idempotency-Key': 'k-1'})
+    again = order(client, items=((1, 2),), **{'Idempotency-Key': 'k-1'})
+    assert again.status_code == 200
+    assert again.headers['Idempotent-Replayed'] == 'true'
+    assert again.get_json() == first.get_json()
+    assert order_count(app) == 1
+
+
+def test_replay_from_database_after_memory_is_lost(app, client):
+    first = order(client, **{'Idempotency-Key': 'k-db'})
+    idempotency.recent_responses.clear()
+    again = order(client, **{'Idempotency-Key': 'k-db'})
+    assert again.get_json() == first.get_json()
+    assert order_count(app) == 1
+
+
+def test_same_key_with_different_body_is_rejected(app, client):
+    order(client, items=((1, 1),), **{'Idempotency-Key': 'k-2'})
+    other = order(client, items=((3, 4),), **{'Idempotency-Key': 'k-2'})
+    assert other.status_code == 422
+    # Aussi depuis la base, sans le LRU
+    idempotency.recent_responses.clear()
+    assert order(client, items=((3, 4),), **{'Idempotency-Key': 'k-2'}).status_code == 422
+    assert order_count(app) == 1
+
+
+def test_key_order_in_body_does_not_matter(app, client):
+    body = {'table_number': '2', 'items': [{'id': 1, 'quantity': 1}]}
+    client.post('/restaurant/api/client/order', json=body, headers={'Idempotency-Key': 'k-3'})
+    reordered = {'items': [{'quantity': 1, 'id': 1}], 'table_number': '2'}
+    again = client.post('/restaurant/api/client/order', json=reordered, headers={'Idempotency-Key': 'k-3'})
+    assert again.headers.get('Idempotent-Replayed') == 'true'
+
+
+def test_expired_key_in_memory_is_not_replayed(app, client, monkeypatch):
+    order(client, **{'Idempotency-Key': 'k-old'})
+    # Entrée encore dans le LRU, mais plus vieille que la rétention
+    monkeypatch.setattr(idempotency, 'KEY_RETENTION', timedelta(0))
+    again = order(client, **{'Idempotency-Key': 'k-old'})
+    assert again.status_code == 200
+    assert 'Idempotent-Replayed' not in again.headers
+    assert order_count(app) == 2
+
+
+def test_key_recorded_without_fingerprint_still_replays(app, client):
+    order(client, **{'Idempotency-Key': 'k-legacy'})
+    with app.app_context():
+        db.session.get(IdempotencyKey, 'k-legacy').request_hash = None
+        db.session.commit()
+    idempotency.recent_responses.clear()
+    again = order(client, items=((2, 1),), **{'Idempotency-Key': 'k-legacy'})
+    assert again.headers.get('Idempotent-Replayed') == 'true'
@@ -0,0 +1,61 @@
+"""Menu client en cache : 304 sur If-None-Match, ETag renouvelé par les écritures"""
+
+from restaurant import cache
+from restaurant.database import db
+from restaurant.models import MenuItem
+
+MENU_URL = '/restaurant/api/client/menu'
+
+
+def prices(response):
+    return {item['id']: item['price'] for category in response.get_json() for item in category['items']}
+
+
+def test_if_none_match_returns_304(client):
+    response = client.get(MENU_URL)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    cached = client.get(MENU_URL, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+    assert client.get(MENU_URL, headers={'If-None-Match': '"autre"'}).status_code == 200
+
+
+def test_admin_write_changes_etag(client, admin_client):
+    before = client.get(MENU_URL)
+    etag = before.headers['ETag']
+
+    assert admin_client.put('/restaurant/api/admin/items/1', json={'price': 13.5}).status_code == 200
+
+    after = client.get(MENU_URL, headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+    assert prices(after)[1] == 13.5
+
+
+def test_write_from_another_worker_is_seen_after_max_age(app, client, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: clock[0])
+    etag = client.get(MENU_URL).headers['ETag']
+
+    # Écriture d'un autre processus : pas d'invalidation dans celui-ci
+    with app.app_context():
+        db.session.get(MenuItem, 1).price = 15.0
+        db.session.commit()
+    assert client.get(MENU_URL, headers={'If-None-Match': etag}).status_code == 304
+
+    clock[0] += cache.menu_cache.max_age
+    response = client.get(MENU_URL, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert prices(response)[1] == 15.0
+
+
+def test_expired_snapshot_keeps_etag_when_menu_is_unchanged(client, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: clock[0])
+    etag = client.get(MENU_URL).headers['ETag']
+
+    clock[0] += cache.menu_cache.max_age
+    assert client.get(MENU_URL, headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,98 @@
+"""Import / export du menu : lignes validées une à une, export réimportable tel quel"""
+
+import io
+import json
+
+from restaurant.database import db
+from restaurant.menu_io import import_menu
+from restaurant.models import MenuCategory, MenuItem
+
+IMPORT_URL = '/restaurant/api/admin/menu/import'
+EXPORT_URL = '/restaurant/api/admin/menu/export'
+
+
+def menu(app):
+    """{(catégorie, nom): (prix, disponible)} lu en base"""
+    with app.app_context():
+        rows = db.session.query(MenuCategory.name, MenuItem.name, MenuItem.price, MenuItem.available).join(
+            MenuCategory, MenuItem.category_id == MenuCategory.id
+        ).all()
+    return {(category, name): (price, available) for category, name, price, available in rows}
+
+
+def import_csv(admin_client, text):
+    response = admin_client.post(IMPORT_URL, data=text.encode('utf-8'), content_type='text/csv')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_csv_import_creates_updates_and_reports_bad_rows(app, client, admin_client):
+    etag = client.get('/restaurant/api/client/menu').headers['ETag']
+    report = import_csv(admin_client, (
+        'category,name,price,available\n'
+        'Desserts,Tiramisu,8.00,1\n'        # existant : mis à jour
+        'Boissons,Limonade,3.5,oui\n'       # catégorie créée
+        'Boissons,Café,2,0\n'
+        'Boissons,,2,1\n'                   # ligne 5 : sans nom
+        'Boissons,Thé,gratuit,1\n'          # ligne 6 : prix invalide
+    ))
+
+    assert {key: report[key] for key in ('rows', 'created', 'updated', 'categories_created', 'failed')} == {
+        'rows': 5, 'created': 2, 'updated': 1, 'categories_created': 1, 'failed': 2,
+    }
+    assert [error['line'] for error in report['errors']] == [5, 6]
+
+    items = menu(app)
+    assert items[('Desserts', 'Tiramisu')] == (8.0, True)
+    assert items[('Boissons', 'Limonade')] == (3.5, True)
+    assert items[('Boissons', 'Café')] == (2.0, False)
+    assert len(items) == 5
+
+    # Cache du menu client invalidé après l'import
+    assert client.get('/restaurant/api/client/menu', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_export_can_be_reimported_unchanged(app, admin_client):
+    before = menu(app)
+    for fmt, content_type in (('csv', 'text/csv'), ('ndjson', 'application/x-ndjson')):
+        exported = admin_client.get(EXPORT_URL, query_string={'format': fmt})
+        assert exported.status_code == 200
+        assert exported.mimetype == content_type
+
+        report = admin_client.post(IMPORT_URL, query_string={'format': fmt}, data=exported.data,
+                                   content_type=content_type).get_json()
+        assert (report['rows'], report['created'], report['updated'], report['failed']) == (3, 0, 3, 0)
+        assert menu(app) == before
+
+
+def test_ndjson_import_matches_items_by_id(app, admin_client):
+    lines = [
+        json.dumps({'id': 1, 'category': 'Plats Principaux', 'name': 'Pizza Reine', 'price': 13}),
+        json.dumps({'id': 99, 'category': 'Desserts', 'name': 'Fantôme', 'price': 1}),
+        '{pas du json',
+        json.dumps(['liste']),
+    ]
+    response = admin_client.post(IMPORT_URL, data='\n'.join(lines) + '\n', content_type='application/x-ndjson')
+    report = response.get_json()
+    assert (report['updated'], report['created'], report['failed']) == (1, 0, 3)
+    assert [error['line'] for error in report['errors']] == [2, 3, 4]
+
+    items = menu(app)
+    assert items[('Plats Principaux', 'Pizza Reine')] == (13.0, True)
+    assert ('Plats Principaux', 'Pizza Margherita') not in items
+
+
+def test_import_in_small_batches_updates_rows_seen_in_earlier_batches(app):
+    rows = [{'category': 'Boissons', 'name': f'Jus {n}', 'price': n} for n in range(1, 6)]
+    rows += [{'category': 'Boissons', 'name': 'Jus 1', 'price': 9}]
+    body = io.BytesIO(''.join(json.dumps(row) + '\n' for row in rows).encode('utf-8'))
+
+    with app.app_context():
+        report = import_menu(body, 'ndjson', batch_size=2)
+    assert (report['created'], report['updated'], report['failed']) == (5, 1, 0)
+    assert menu(app)[('Boissons', 'Jus 1')] == (9.0, True)
+
+
+def test_unknown_format_is_rejected(admin_client):
+    assert admin_client.post(IMPORT_URL, query_string={'format': 'xml'}, data=b'').status_code == 400
+    assert admin_client.get(EXPORT_URL, query_string={'format': 'xml'}).status_code == 400
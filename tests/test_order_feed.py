@@ -0,0 +1,70 @@
+"""Flux incrémental des commandes (?since=) : changements depuis le curseur, sans trou"""
+
+from datetime import datetime, timedelta
+
+from restaurant.database import db
+from restaurant.models import Order
+
+from conftest import order
+
+ORDERS_URL = '/restaurant/api/admin/orders'
+
+
+def delta(admin_client, cursor):
+    response = admin_client.get(ORDERS_URL, query_string={'since': cursor})
+    assert response.status_code == 200
+    data = response.get_json()
+    return [placed['id'] for placed in data['orders']], data['cursor']
+
+
+def stamp(app, order_id, updated_at):
+    with app.app_context():
+        db.session.query(Order).filter(Order.id == order_id).update(
+            {Order.updated_at: updated_at}, synchronize_session=False
+        )
+        db.session.commit()
+
+
+def test_delta_returns_new_and_changed_orders(app, client, admin_client):
+    first = order(client).get_json()['order_id']
+    cursor = admin_client.get(ORDERS_URL).get_json()['feed_cursor']
+
+    second = order(client, table='2').get_json()['order_id']
+    ids, next_cursor = delta(admin_client, cursor)
+    assert second in ids
+    assert next_cursor > cursor
+
+    admin_client.put(f'{ORDERS_URL}/{first}/status', json={'status': 'preparing'})
+    ids, last_cursor = delta(admin_client, next_cursor)
+    assert ids[-1] == first
+    assert last_cursor >= next_cursor
+
+
+def test_delta_skips_orders_long_before_cursor(app, client, admin_client):
+    old = order(client).get_json()['order_id']
+    stamp(app, old, datetime.utcnow() - timedelta(hours=1))
+    order(client)
+    cursor = admin_client.get(ORDERS_URL).get_json()['feed_cursor']
+    new = order(client).get_json()['order_id']
+
+    ids, _ = delta(admin_client, cursor)
+    assert old not in ids
+    assert ids[-1] == new
+
+
+def test_delta_returns_order_committed_late_with_earlier_stamp(app, client, admin_client):
+    order(client)
+    _, cursor = delta(admin_client, admin_client.get(ORDERS_URL).get_json()['feed_cursor'])
+
+    # Écriture datée avant le curseur, commitée après avoir attendu le verrou
+    # (busy_timeout de 5 s)
+    late = order(client, table='5').get_json()['order_id']
+    stamp(app, late, datetime.fromisoformat(cursor) - timedelta(seconds=4.5))
+
+    ids, next_cursor = delta(admin_client, cursor)
+    assert late in ids
+    assert next_cursor == cursor
+
+
+def test_invalid_cursor_is_rejected(admin_client):
+    assert admin_client.get(ORDERS_URL, query_string={'since': 'hier'}).status_code == 400
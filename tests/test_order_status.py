@@ -0,0 +1,88 @@
+"""Statuts des commandes : transitions refusées en 409, lots tout ou rien"""
+
+import pytest
+
+from restaurant.database import db
+from restaurant.models import Order
+
+from conftest import order
+
+ORDERS_URL = '/restaurant/api/admin/orders'
+
+
+def set_status(admin_client, order_id, status):
+    return admin_client.put(f'{ORDERS_URL}/{order_id}/status', json={'status': status})
+
+
+def set_statuses(admin_client, **body):
+    return admin_client.put(f'{ORDERS_URL}/status', json=body)
+
+
+def statuses(app):
+    with app.app_context():
+        return dict(db.session.query(Order.id, Order.status).order_by(Order.id).all())
+
+
+def delivered_order(client, admin_client, table='1'):
+    order_id = order(client, table=table).get_json()['order_id']
+    for status in ('ready', 'delivered'):
+        assert set_status(admin_client, order_id, status).status_code == 200
+    return order_id
+
+
+def test_allowed_transition(app, client, admin_client):
+    order_id = order(client).get_json()['order_id']
+    response = set_status(admin_client, order_id, 'preparing')
+    assert response.status_code == 200
+    assert response.get_json()['order']['status'] == 'preparing'
+    assert statuses(app) == {order_id: 'preparing'}
+
+
+def test_illegal_transition_is_rejected(app, client, admin_client):
+    order_id = delivered_order(client, admin_client)
+    response = set_status(admin_client, order_id, 'pending')
+    assert response.status_code == 409
+    assert 'delivered' in response.get_json()['error']
+    assert statuses(app) == {order_id: 'delivered'}
+
+
+@pytest.mark.parametrize('url', [f'{ORDERS_URL}/1/status', f'{ORDERS_URL}/status'])
+@pytest.mark.parametrize('body', [['preparing'], 'preparing', {'status': ['preparing']}])
+def test_malformed_body_is_rejected_with_400(client, admin_client, url, body):
+    order(client)
+    assert admin_client.put(url, json=body).status_code == 400
+
+
+def test_batch_with_one_illegal_transition_changes_nothing(app, client, admin_client):
+    pending = [order(client, table='7').get_json()['order_id'] for _ in range(2)]
+    delivered = delivered_order(client, admin_client, table='7')
+    before = statuses(app)
+    report = admin_client.get('/restaurant/api/admin/reports/sales').get_json()
+
+    response = set_statuses(admin_client, status='cancelled', order_ids=[*pending, delivered, 999])
+    assert response.status_code == 409
+    rejected = {entry['id'] for entry in response.get_json()['rejected']}
+    assert rejected == {delivered, 999}
+
+    assert statuses(app) == before
+    # Les cumuls de ventes ne voient pas les annulations refusées
+    assert admin_client.get('/restaurant/api/admin/reports/sales').get_json() == report
+
+
+def test_valid_batch_changes_every_order(app, client, admin_client):
+    ids = [order(client, table='7').get_json()['order_id'] for _ in range(3)]
+    response = set_statuses(admin_client, status='preparing', order_ids=ids)
+    assert response.status_code == 200
+    assert sorted(placed['id'] for placed in response.get_json()['orders']) == ids
+    assert statuses(app) == {order_id: 'preparing' for order_id in ids}
+
+
+def test_batch_by_table_skips_orders_that_cannot_move(app, client, admin_client):
+    pending = order(client, table='7').get_json()['order_id']
+    delivered = delivered_order(client, admin_client, table='7')
+    other_table = order(client, table='8').get_json()['order_id']
+
+    response = set_statuses(admin_client, status='preparing', table='7')
+    assert response.status_code == 200
+    assert [placed['id'] for placed in response.get_json()['orders']] == [pending]
+    assert statuses(app) == {pending: 'preparing', delivered: 'delivered', other_table: 'pending'}
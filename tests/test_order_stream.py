@@ -0,0 +1,75 @@
+"""Flux SSE des commandes (/api/admin/orders/stream) via le client de test"""
+
+import json
+
+import pytest
+
+from restaurant.events import order_events
+
+from conftest import order
+
+STREAM_URL = '/restaurant/api/admin/orders/stream'
+
+
+@pytest.fixture
+def stream(admin_client, monkeypatch):
+    """Flux ouvert sans tampon : (réponse, itérateur des trames)"""
+    monkeypatch.setattr(order_events, 'heartbeat', 0.1)
+    response = admin_client.get(STREAM_URL, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    frames = iter(response.response)
+    assert next(frames).startswith(b'retry:')
+    yield response, frames
+    response.close()
+
+
+def next_event(frames, limit=50):
+    """Prochaine trame d'événement (battements de cœur ignorés) : (type, données)"""
+    for _ in range(limit):
+        frame = next(frames).decode('utf-8')
+        if frame.startswith('event:'):
+            event, data = frame.strip().split('\n')
+            return event[len('event: '):], json.loads(data[len('data: '):])
+    raise AssertionError('aucun événement reçu')
+
+
+def test_new_order_is_streamed(client, stream):
+    _, frames = stream
+    order_id = order(client, table='4').get_json()['order_id']
+
+    event, data = next_event(frames)
+    assert event == 'order'
+    assert (data['id'], data['table_number'], data['status']) == (order_id, '4', 'pending')
+
+
+def test_status_change_is_streamed(client, admin_client, stream):
+    _, frames = stream
+    order_id = order(client).get_json()['order_id']
+    next_event(frames)
+
+    response = admin_client.put(f'/restaurant/api/admin/orders/{order_id}/status', json={'status': 'preparing'})
+    assert response.status_code == 200
+    event, data = next_event(frames)
+    assert event == 'order'
+    assert (data['id'], data['status']) == (order_id, 'preparing')
+
+
+def test_disconnect_removes_subscriber(stream):
+    response, _ = stream
+    assert order_events.subscriber_count == 1
+    response.close()
+    assert order_events.subscriber_count == 0
+
+
+def test_disconnect_before_first_frame_removes_subscriber(admin_client):
+    response = admin_client.get(STREAM_URL, buffered=False)
+    assert order_events.subscriber_count == 1
+    response.close()
+    assert order_events.subscriber_count == 0
+
+
+def test_stream_requires_admin(client):
+    response = client.get(STREAM_URL)
+    assert response.status_code == 302
+    assert order_events.subscriber_count == 0
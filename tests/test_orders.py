@@ -0,0 +1,69 @@
+"""Commandes client : prix calculés par le serveur, entrées invalides refusées en 400"""
+
+import pytest
+
+from restaurant.models import Order
+
+from conftest import order
+
+ORDER_URL = '/restaurant/api/client/order'
+
+
+def order_count(app):
+    with app.app_context():
+        return Order.query.count()
+
+
+def test_client_prices_are_ignored(app, client):
+    response = client.post(ORDER_URL, json={'table_number': '3', 'total': 0.01, 'items': [
+        {'id': 1, 'quantity': 2, 'price': 0.01},
+        {'id': 3, 'quantity': 1, 'price': 0.01, 'unit_price': 0.01},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 2 * 12.5 + 7.5
+
+    with app.app_context():
+        placed = Order.query.one()
+        assert placed.total == 32.5
+        assert sorted((line.menu_item_id, line.unit_price) for line in placed.items) == [(1, 12.5), (3, 7.5)]
+
+
+def test_unknown_item_is_rejected(app, client):
+    response = order(client, items=((1, 1), (999, 1)))
+    assert response.status_code == 400
+    assert '999' in response.get_json()['error']
+    assert order_count(app) == 0
+
+
+def test_unavailable_item_is_rejected(app, client, admin_client):
+    assert admin_client.put('/restaurant/api/admin/items/2', json={'available': False}).status_code == 200
+    response = order(client, items=((2, 1),))
+    assert response.status_code == 400
+    assert 'indisponible' in response.get_json()['error']
+    assert order_count(app) == 0
+
+
+@pytest.mark.parametrize('body', [
+    [{'id': 1, 'quantity': 1}],
+    {'table_number': '1', 'items': 5},
+    {'table_number': '1', 'items': {'id': 1}},
+    {'table_number': '1', 'items': ['1']},
+    {'table_number': 12, 'items': [{'id': 1}]},
+    {'table_number': '   ', 'items': [{'id': 1}]},
+    {'table_number': 'x' * 51, 'items': [{'id': 1}]},
+    {'table_number': '1', 'items': [{'id': 1, 'quantity': 1.7}]},
+    {'table_number': '1', 'items': [{'id': True, 'quantity': 1}]},
+    {'table_number': '1', 'items': [{'id': 1, 'quantity': True}]},
+    {'table_number': '1', 'items': [{'id': None}]},
+    {'table_number': '1', 'items': [{'id': 1, 'quantity': 0}]},
+    {'table_number': '1', 'items': [{'id': 1, 'quantity': 101}]},
+])
+def test_invalid_order_is_rejected_with_400(app, client, body):
+    assert client.post(ORDER_URL, json=body).status_code == 400
+    assert order_count(app) == 0
+
+
+def test_numeric_strings_are_accepted(client):
+    response = client.post(ORDER_URL, json={'table_number': '2', 'items': [{'id': '1', 'quantity': '3'}]})
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 37.5
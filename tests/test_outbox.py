@@ -0,0 +1,159 @@
+"""File de tâches : ticket cuisine envoyé à une imprimante factice, reprises, abandon"""
+
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from restaurant import outbox
+from restaurant.database import db
+from restaurant.models import OutboxJob
+
+from conftest import order
+
+
+class FakePrinter(socketserver.ThreadingTCPServer):
+    """Imprimante réseau factice : garde le texte de chaque ticket reçu"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        self.tickets = []
+        self.received = threading.Event()
+        printer = self
+
+        class TicketHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                printer.tickets.append(self.rfile.read().decode('utf-8'))
+                printer.received.set()
+
+        super().__init__(('127.0.0.1', 0), TicketHandler)
+        self.address = '127.0.0.1:%d' % self.server_address[1]
+
+
+@pytest.fixture
+def printer():
+    server = FakePrinter()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def closed_port_address():
+    """Adresse où rien n'écoute : la connexion est refusée"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return '127.0.0.1:%d' % sock.getsockname()[1]
+
+
+@pytest.fixture
+def configure(app, monkeypatch):
+    """configure(kitchen_printer, **réglages) : gestionnaires et options, sans pool de threads"""
+    monkeypatch.setattr(outbox, 'handlers', {})
+
+    def configure(kitchen_printer, **settings):
+        options = {**outbox.DEFAULTS, 'workers': 0, 'kitchen_printer': kitchen_printer, **settings}
+        outbox.configure_handlers(options)
+        monkeypatch.setitem(app.extensions, 'restaurant_outbox', options)
+        return options
+
+    yield configure
+    outbox.workers.stop()
+
+
+def only_job(app):
+    with app.app_context():
+        job = OutboxJob.query.one()
+        db.session.expunge(job)
+        return job
+
+
+def make_due(app):
+    with app.app_context():
+        OutboxJob.query.update({OutboxJob.available_at: datetime.utcnow()})
+        db.session.commit()
+
+
+def test_ticket_is_sent_to_printer(app, client, printer, configure):
+    options = configure(printer.address, ticket_timezone='Europe/Paris')
+    order_id = order(client, table='4', items=((1, 2), (3, 1))).get_json()['order_id']
+
+    with app.app_context():
+        assert outbox.run_once(options) == 1
+    assert printer.received.wait(5)
+
+    job = only_job(app)
+    assert (job.status, job.attempts, job.last_error) == ('done', 1, None)
+    ticket = printer.tickets[0]
+    assert f'COMMANDE #{order_id}' in ticket
+    assert 'Table 4' in ticket
+    assert '  2 x Pizza Margherita' in ticket
+    assert '  1 x Tiramisu' in ticket
+
+
+def test_socket_error_is_retried_with_backoff(app, client, configure):
+    options = configure(closed_port_address(), base_delay=2.0)
+    order(client)
+
+    for attempt in (1, 2):
+        before = datetime.utcnow()
+        with app.app_context():
+            assert outbox.run_once(options) == 1
+        job = only_job(app)
+        assert (job.status, job.attempts) == ('pending', attempt)
+        assert job.last_error.startswith('ConnectionRefusedError')
+        delay = (job.available_at - before).total_seconds()
+        expected = options['base_delay'] * 2 ** (attempt - 1)
+        assert expected * 0.8 <= delay <= expected * 1.2 + 1
+        # Pas encore due : rien à traiter avant le délai
+        with app.app_context():
+            assert outbox.run_once(options) == 0
+        make_due(app)
+
+
+def test_job_fails_after_max_attempts(app, client, configure):
+    options = configure(closed_port_address(), max_attempts=3)
+    order(client)
+
+    for _ in range(3):
+        make_due(app)
+        with app.app_context():
+            assert outbox.run_once(options) == 1
+
+    job = only_job(app)
+    assert (job.status, job.attempts) == ('failed', 3)
+    make_due(app)
+    with app.app_context():
+        assert outbox.run_once(options) == 0
+
+
+def test_pool_starts_on_first_request_and_drains_pending_jobs(app, client, printer, configure):
+    configure(printer.address, workers=1, poll_interval=0.2)
+    # Tâche laissée en file par un processus précédent (aucune commande depuis)
+    with app.app_context():
+        outbox.enqueue('kitchen_ticket', {
+            'order_id': 99, 'table_number': '2', 'created_at': '2026-01-15T11:30:00',
+            'total': 7.5, 'items': [{'name': 'Tiramisu', 'quantity': 1}],
+        })
+        db.session.commit()
+    assert not outbox.workers.running
+
+    client.get('/restaurant/api/client/menu')
+    assert outbox.workers.running
+    assert printer.received.wait(5)
+    assert 'COMMANDE #99' in printer.tickets[0]
+    deadline = time.monotonic() + 5
+    while only_job(app).status != 'done' and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert only_job(app).status == 'done'
+
+
+def test_ticket_time_is_local():
+    payload = {'order_id': 1, 'table_number': '3', 'created_at': '2026-01-15T11:30:00', 'items': []}
+    assert '\n12:30\n' in outbox.format_ticket(payload, 'Europe/Paris')
+    assert '\n13:30\n' in outbox.format_ticket({**payload, 'created_at': '2026-07-15T11:30:00'}, 'Europe/Paris')
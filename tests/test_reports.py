@@ -0,0 +1,59 @@
+"""Cumuls de ventes : remplis à la migration d'une base existante, jamais négatifs"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from restaurant.database import db
+from restaurant.models import Order, OrderItem, DailySales, DailyItemSales, init_db
+
+from conftest import order
+
+REPORT_URL = '/restaurant/api/admin/reports/sales'
+
+
+def set_status(admin_client, order_id, status):
+    return admin_client.put(f'/restaurant/api/admin/orders/{order_id}/status', json={'status': status})
+
+
+def downgrade_to_baseline(app, orders):
+    """Base telle qu'avant les cumuls : commandes déjà en base, tables de cumuls absentes"""
+    with app.app_context():
+        for table_number, created_at, lines in orders:
+            placed = Order(table_number=table_number, status='pending', created_at=created_at,
+                           updated_at=created_at, total=sum(quantity * price for _, quantity, price in lines))
+            placed.items = [OrderItem(menu_item_id=item_id, quantity=quantity, unit_price=price)
+                            for item_id, quantity, price in lines]
+            db.session.add(placed)
+        for table in (DailyItemSales.__table__, DailySales.__table__):
+            db.session.execute(text(f'DROP TABLE "{table.name}"'))
+        db.session.execute(text('DELETE FROM schema_stamp'))
+        db.session.execute(text('PRAGMA user_version = 0'))
+        db.session.commit()
+
+
+def test_upgraded_database_reports_existing_orders(app, admin_client):
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    downgrade_to_baseline(app, [
+        ('3', yesterday, [(1, 2, 12.5), (3, 1, 7.5)]),
+        ('4', yesterday, [(2, 1, 14.0)]),
+    ])
+    with app.app_context():
+        assert init_db()
+
+    report = admin_client.get(REPORT_URL).get_json()
+    assert (report['total_orders'], report['total_revenue']) == (2, 46.5)
+    assert {item['menu_item_id']: item['quantity'] for item in report['top_items']} == {1: 2, 2: 1, 3: 1}
+
+
+def test_cancelling_an_order_placed_before_upgrade_keeps_totals_positive(app, client, admin_client):
+    downgrade_to_baseline(app, [('3', datetime.utcnow(), [(1, 1, 12.5), (3, 1, 20.0)])])
+    with app.app_context():
+        init_db()
+        old_id = Order.query.one().id
+    order(client, items=((2, 1),))
+
+    assert set_status(admin_client, old_id, 'cancelled').status_code == 200
+    report = admin_client.get(REPORT_URL).get_json()
+    assert (report['total_orders'], report['total_revenue']) == (1, 14.0)
+    assert [(item['menu_item_id'], item['quantity']) for item in report['top_items']] == [(2, 1)]
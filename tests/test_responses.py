@@ -0,0 +1,34 @@
+"""Compression des réponses : le cache des corps compressés suit le contenu, pas l'ETag"""
+
+import gzip
+
+from restaurant import responses
+from restaurant.responses import compress_response, compressed_bodies
+
+
+def compressed(app, body, etag):
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}) as context:
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response = compress_response(response, context.request)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    return gzip.decompress(response.get_data())
+
+
+def test_same_etag_with_new_body_is_not_served_stale(app):
+    # ETag de version (panier) : le corps change sans que l'ETag change
+    before = b'{"price":12.5,"items":"' + b'x' * 2000 + b'"}'
+    after = b'{"price":13.0,"items":"' + b'x' * 2000 + b'"}'
+    assert compressed(app, before, 'cart-7') == before
+    assert compressed(app, after, 'cart-7') == after
+
+
+def test_identical_body_is_compressed_once(app, monkeypatch):
+    compressed_bodies.clear()
+    calls = []
+    compress = responses._compress
+    monkeypatch.setattr(responses, '_compress', lambda *args, **kwargs: calls.append(1) or compress(*args, **kwargs))
+    body = b'{"menu":"' + b'y' * 3000 + b'"}'
+    assert compressed(app, body, 'etag-a') == body
+    assert compressed(app, body, 'etag-a') == body
+    assert len(calls) == 1
@@ -0,0 +1,69 @@
+"""Lectures et écritures concurrentes sur une base fichier en WAL (SQLITE_PRAGMAS)"""
+
+import threading
+
+from sqlalchemy import text
+
+from restaurant.database import db
+
+from conftest import order
+
+READERS = 6
+WRITERS = 2
+ITERATIONS = 25
+
+
+def admin_session(client):
+    with client.session_transaction() as session:
+        session['admin_id'] = 1
+        session['admin_username'] = 'admin'
+    return client
+
+
+def test_wal_is_enabled(app):
+    with app.app_context():
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+
+
+def test_parallel_readers_and_writers_never_hit_database_locked(app):
+    errors = []
+    start = threading.Barrier(READERS + WRITERS)
+
+    def run(work):
+        try:
+            start.wait()
+            for n in range(ITERATIONS):
+                work(n)
+        except Exception as e:  # noqa: BLE001 - reporté par l'assertion finale
+            errors.append(repr(e))
+
+    def reader(n):
+        client = admin_session(app.test_client())
+        for url in ('/restaurant/api/admin/orders?limit=20', '/restaurant/api/admin/orders/stats'):
+            response = client.get(url)
+            if response.status_code != 200:
+                errors.append(f'{url} : {response.status_code} {response.get_data(as_text=True)}')
+
+    def writer(n):
+        client = admin_session(app.test_client())
+        response = order(client, table=str(n % 5 + 1), items=((1, 1), (3, 2)))
+        if response.status_code != 200:
+            errors.append(f'commande : {response.status_code} {response.get_data(as_text=True)}')
+            return
+        order_id = response.get_json()['order_id']
+        response = client.put(f'/restaurant/api/admin/orders/{order_id}/status', json={'status': 'preparing'})
+        if response.status_code != 200:
+            errors.append(f'statut : {response.status_code} {response.get_data(as_text=True)}')
+
+    threads = [threading.Thread(target=run, args=(reader,)) for _ in range(READERS)]
+    threads += [threading.Thread(target=run, args=(writer,)) for _ in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert not [error for error in errors if 'locked' in error]
+    assert not errors
+    with app.app_context():
+        count = db.session.execute(text('SELECT count(*) FROM "order"')).scalar()
+    assert count == WRITERS * ITERATIONS